@@ -1,10 +1,16 @@
 from flask import Flask, request, render_template, jsonify, session, redirect, url_for
 from flask.sessions import SecureCookieSessionInterface
-import sqlite3
-import hashlib
 import secrets
+import time
 from datetime import timedelta
 import os
+import sys
+
+from db import UserDatabase
+from passwords import HashingQueueFull, PasswordHasher, needs_rehash
+# session_store.py משותף לשני השירותים (common/) - בתמונה הוא מועתק לצד app.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+from session_store import ServerSideSessionInterface, check_login, create_revocation_list, create_store
 
 app = Flask(__name__)
 # שימוש בsecret key קבוע כדי שכל השירותים יוכלו לקרוא את אותם sessions
@@ -52,28 +58,49 @@ class NoDomainSessionInterface(SecureCookieSessionInterface):
             domain=None  # Explicitly set to None to disable domain attribute
         )
 
-app.session_interface = NoDomainSessionInterface()
+# SESSION_BACKEND=cookie (ברירת מחדל) שומר את כל ה-session ב-cookie חתום;
+# memory/sqlite/redis שומרים אותו בצד השרת וב-cookie נשאר רק מזהה
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cookie')
+if SESSION_BACKEND == 'cookie':
+    app.session_interface = NoDomainSessionInterface()
+else:
+    app.session_interface = ServerSideSessionInterface(create_store(SESSION_BACKEND))
 
 DB_PATH = 'users.db'
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+# חיבור קבוע לכל thread במקום connect/close בכל ניסיון התחברות
+users_db = UserDatabase(DB_PATH, mmap_size=int(os.getenv('AUTH_DB_MMAP_SIZE', str(64 * 1024 * 1024))))
+
+# גיל מקסימלי להתחברות (בשניות) גם כשה-session מתחדש בכל בקשה
+AUTH_MAX_SESSION_AGE = int(os.getenv('AUTH_MAX_SESSION_AGE', '43200'))
+# רשימת ביטולים משותפת - quiz-app בודק אותה כשהוא מאמת sessions בעצמו
+revocations = create_revocation_list()
+
+def is_logged_in():
+    return check_login(session, revocations, AUTH_MAX_SESSION_AGE)
+
+# KDF יקר בכוונה - רץ על מאגר חסום, ובתור מלא מחזירים 503
+# המגבלות הן לכל תהליך - gunicorn.conf.py מחלק אותן בין ה-workers
+password_hasher = PasswordHasher(
+    workers=int(os.getenv('AUTH_HASH_WORKERS', '0')) or None,
+    max_queue=int(os.getenv('AUTH_HASH_QUEUE', '32'))
+)
 
 def verify_user(username, password):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    hashed_pass = hash_password(password)
-    cursor.execute('SELECT username FROM users WHERE username = ? AND password = ?', 
-                   (username, hashed_pass))
-    user = cursor.fetchone()
-    conn.close()
-    
-    return user is not None
+    stored_hash = users_db.find_password_hash(username)
+    if not password_hasher.verify(password, stored_hash):
+        return False
+    if needs_rehash(stored_hash):
+        # hash ישן (SHA-256) או פרמטרים ישנים - מחליפים כשהסיסמה ידועה
+        try:
+            users_db.update_password_hash(username, password_hasher.hash(password))
+        except HashingQueueFull:
+            pass  # ההתחברות תקינה; הגיבוב מחדש יקרה בפעם הבאה
+    return True
 
 @app.route('/login', methods=['GET'])
 def login_page():
-    if 'username' in session:
+    if is_logged_in():
         return redirect('/quiz')
     return render_template('login.html', error=None)
 
@@ -85,23 +112,36 @@ def authenticate():
     if not username or not password:
         return render_template('login.html', error='אנא מלא את כל השדות'), 400
     
-    if verify_user(username, password):
+    try:
+        valid = verify_user(username, password)
+    except HashingQueueFull:
+        return render_template('login.html', error='השרת עמוס כרגע, נסה שוב בעוד רגע'), 503, {'Retry-After': '1'}
+
+    if valid:
+        if hasattr(session, 'regenerate'):
+            # session בצד השרת - מזהה חדש בכל התחברות
+            session.regenerate()
         session.permanent = True
         session['username'] = username
+        session['auth_id'] = secrets.token_urlsafe(16)
+        session['auth_time'] = int(time.time())
         return redirect('/quiz')
     else:
         return render_template('login.html', error='שם משתמש או סיסמה שגויים'), 401
 
 @app.route('/verify', methods=['GET'])
 def verify_session():
-    if 'username' in session:
+    if is_logged_in():
         return jsonify({'authenticated': True, 'username': session['username']}), 200
     return jsonify({'authenticated': False}), 401
 
 @app.route('/logout', methods=['POST', 'GET'])
 def logout():
+    if revocations is not None and 'auth_id' in session:
+        revocations.revoke(session['auth_id'], AUTH_MAX_SESSION_AGE)
     session.clear()
     return redirect('/login')
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    # שרת פיתוח בלבד - בייצור השירות רץ תחת gunicorn (gunicorn.conf.py)
+    app.run(host='0.0.0.0', port=5001, debug=os.getenv('FLASK_DEBUG', '0') == '1')
\ No newline at end of file
@@ -1,9 +1,11 @@
 import sqlite3
-import hashlib
+
+import passwords
+from db import create_schema
 
 def hash_password(password):
-    """מצפין סיסמה עם SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """מגבב סיסמה עם KDF (scrypt/PBKDF2) ו-salt - ראו passwords.py"""
+    return passwords.hash_password(password)
 
 def create_database():
     """יוצר את מסד הנתונים ומוסיף משתמשים"""
@@ -13,14 +15,7 @@ def create_database():
     cursor = conn.cursor()
     
     # יצירת טבלת משתמשים
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
+    create_schema(conn)
     
     print("✓ טבלת users נוצרה בהצלחה")
     
@@ -1,21 +1,16 @@
 import sqlite3
-import hashlib
+
+import passwords
+from db import create_schema
 
 def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+    return passwords.hash_password(password)
 
 def create_database():
     conn = sqlite3.connect('users.db')
     cursor = conn.cursor()
     
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
+    create_schema(conn)
     
     print("✓ טבלת users נוצרה בהצלחה")
     
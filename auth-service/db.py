@@ -0,0 +1,78 @@
+"""
+שכבת גישה ל-users.db.
+
+חיבור SQLite אחד לכל thread (במקום connect/close בכל ניסיון התחברות),
+במצב WAL עם synchronous=NORMAL ו-mmap. השאילתות הן מחרוזות קבועות,
+כך שה-statement cache של sqlite3 מכין כל אחת פעם אחת לכל חיבור.
+"""
+
+import os
+import sqlite3
+import threading
+
+FIND_USER_SQL = 'SELECT password FROM users WHERE username = ?'
+UPDATE_PASSWORD_SQL = 'UPDATE users SET password = ? WHERE username = ?'
+
+USERS_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+'''
+
+
+def create_schema(conn):
+    """יצירת טבלת users אם אינה קיימת.
+
+    האינדקס היחיד שהטבלה צריכה הוא זה של UNIQUE(username): הוא משרת את
+    FIND_USER_SQL, את בדיקת הקיום ואת ה-ON CONFLICT של הייבוא. אינדקס מכסה
+    (username, password) לא נבחר ע"י ה-planner מול אינדקס ייחודי, רק מאט כתיבה.
+    """
+    with conn:
+        conn.execute(USERS_TABLE_SQL)
+
+
+class UserDatabase:
+    def __init__(self, path, mmap_size=64 * 1024 * 1024, cached_statements=64):
+        # נתיב מוחלט - החיבורים נפתחים בעצלות, אולי אחרי שינוי תיקייה
+        self.path = os.path.abspath(path)
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def connection(self):
+        """החיבור של ה-thread הנוכחי, נפתח בשימוש הראשון"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, cached_statements=self.cached_statements)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            self._local.conn = conn
+            with self._lock:
+                self.connections_opened += 1
+        return conn
+
+    def find_password_hash(self, username):
+        """ה-hash השמור של המשתמש, או None אם אינו קיים"""
+        row = self.connection().execute(FIND_USER_SQL, (username,)).fetchone()
+        return row[0] if row else None
+
+    def ensure_schema(self):
+        create_schema(self.connection())
+
+    def update_password_hash(self, username, password_hash):
+        """החלפת ה-hash השמור (גיבוב מחדש בהתחברות)"""
+        conn = self.connection()
+        with conn:
+            conn.execute(UPDATE_PASSWORD_SQL, (password_hash, username))
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,51 @@
+"""
+הגדרות gunicorn להרצה בייצור (במקום שרת הפיתוח של Flask).
+
+כל ההגדרות נקראות ממשתני סביבה:
+    WEB_WORKERS          מספר תהליכי worker (ברירת מחדל: 2 * ליבות + 1)
+    WEB_THREADS          threads לכל worker (ברירת מחדל: 4)
+    WEB_APP              האפליקציה להרצה (ברירת מחדל: app:app)
+    WEB_WORKER_CLASS     gthread (ברירת מחדל) או gevent (דורש pip install gevent)
+    WEB_TIMEOUT          שניות עד שתהליך תקוע מופעל מחדש
+    WEB_GRACEFUL_TIMEOUT שניות לסיום בקשות פתוחות בזמן reload / כיבוי
+    WEB_MAX_REQUESTS     מחזור workers אחרי מספר בקשות (0 - כבוי)
+    PORT                 פורט האזנה
+    AUTH_HASH_WORKERS    חישובי hash במקביל בכל worker (ברירת מחדל: ליבות / WEB_WORKERS)
+    AUTH_HASH_QUEUE      חישובים ממתינים בכל worker (ברירת מחדל: AUTH_HASH_TOTAL_QUEUE / WEB_WORKERS)
+    AUTH_HASH_TOTAL_QUEUE חישובים ממתינים בכל השירות (ברירת מחדל: 32)
+
+מאגר הגיבוב (passwords.py) חסום בכל תהליך בנפרד, ולכן הליבות והתור
+מחולקים בין ה-workers: סה"כ עד WEB_WORKERS * AUTH_HASH_WORKERS חישובי
+scrypt במקביל (כ-16MB כל אחד) - בברירת המחדל בערך מספר הליבות - ועד
+WEB_WORKERS * AUTH_HASH_QUEUE ממתינים. מעבר לזה השירות מחזיר 503.
+
+טעינה מחדש בלי לנתק בקשות: kill -HUP <pid של ה-master>
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = os.getenv('WEB_APP', 'app:app')
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('WEB_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('WEB_THREADS', '4'))
+worker_connections = int(os.getenv('WEB_WORKER_CONNECTIONS', '1000'))
+
+# נקרא ב-app.py בכל worker (התהליכים יורשים את הסביבה מה-master)
+os.environ.setdefault('AUTH_HASH_WORKERS', str(max(1, multiprocessing.cpu_count() // workers)))
+os.environ.setdefault('AUTH_HASH_QUEUE', str(max(1, int(os.getenv('AUTH_HASH_TOTAL_QUEUE', '32')) // workers)))
+
+timeout = int(os.getenv('WEB_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', '0'))
+
+# בלי preload - כך HUP טוען גם קוד חדש, וכל worker פותח חיבורים משלו
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ייבוא משתמשים בכמויות ל-users.db מקובץ CSV או JSONL.
+
+הקובץ נקרא בזרימה ונכתב במנות: כל מנה היא טרנזקציה אחת עם executemany.
+גיבוב הסיסמאות (KDF יקר) רץ במקביל על כל הליבות ב-ProcessPoolExecutor,
+והמנה הבאה מגובבת בזמן שהנוכחית נכתבת. משתמשים שכבר קיימים מדולגים
+לפני הגיבוב, אלא אם מבקשים --upsert ואז הסיסמה שלהם מוחלפת.
+
+CSV - שורת כותרת עם העמודות username,password
+JSONL - אובייקט {"username": ..., "password": ...} בכל שורה
+
+הרצה:
+    python3 import_users.py users.csv [--db users.db] [--batch-size 1000] [--workers N] [--upsert]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import passwords
+from db import UserDatabase
+
+INSERT_SQL = 'INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)'
+UPSERT_SQL = ('INSERT INTO users (username, password) VALUES (?, ?) '
+              'ON CONFLICT (username) DO UPDATE SET password = excluded.password')
+
+
+def read_users(path, fmt=None):
+    """זרם של (username, password) מהקובץ; שורות לא תקינות מדולגות עם אזהרה"""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for line_number, record in enumerate(records, start=1):
+            username = str(record.get('username') or '').strip()
+            password = str(record.get('password') or '').strip()
+            if not username or not password:
+                print(f'⚠ רשומה {line_number} דולגה: חסר שם משתמש או סיסמה', file=sys.stderr)
+                continue
+            yield username, password
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def existing_usernames(conn, usernames):
+    placeholders = ','.join('?' * len(usernames))
+    rows = conn.execute(f'SELECT username FROM users WHERE username IN ({placeholders})', usernames)
+    return {row[0] for row in rows}
+
+
+def import_users(source, db_path='users.db', fmt=None, batch_size=1000, workers=None,
+                 upsert=False, progress=None):
+    """ייבוא המשתמשים; מחזיר מונים של inserted/updated/skipped ומשך הריצה"""
+    workers = workers or os.cpu_count() or 1
+    db = UserDatabase(db_path)
+    db.ensure_schema()
+    conn = db.connection()
+    stats = {'read': 0, 'inserted': 0, 'updated': 0, 'skipped': 0}
+    started = time.perf_counter()
+
+    def prepare(batch):
+        stats['read'] += len(batch)
+        # כפילות בתוך המנה - האחרונה קובעת, כמו ב-upsert; הקודמות מדולגות
+        unique = list(dict(batch).items())
+        stats['skipped'] += len(batch) - len(unique)
+        batch = unique
+        if not upsert:
+            # בלי upsert אין טעם לגבב סיסמה של משתמש קיים
+            existing = existing_usernames(conn, [username for username, _ in batch])
+            stats['skipped'] += len(existing)
+            batch = [row for row in batch if row[0] not in existing]
+        chunksize = max(1, len(batch) // (workers * 4))
+        hashes = pool.map(passwords.hash_password, [password for _, password in batch], chunksize=chunksize)
+        return batch, hashes
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = None
+        for batch in batches(read_users(source, fmt), batch_size):
+            # map שולח את כל המנה לעיבוד מיד - הגיבוב שלה רץ בזמן שהקודמת נכתבת
+            ready, pending = pending, prepare(batch)
+            if ready:
+                write_batch(conn, ready, upsert, stats)
+                report(progress, stats, started)
+        if pending:
+            write_batch(conn, pending, upsert, stats)
+            report(progress, stats, started)
+
+    # סטטיסטיקות ל-planner אחרי שינוי גדול בטבלה
+    conn.execute('PRAGMA optimize')
+    db.close()
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def write_batch(conn, prepared, upsert, stats):
+    batch, hashes = prepared
+    rows = list(zip((username for username, _ in batch), hashes))
+    if not rows:
+        return
+    with conn:
+        # הבדיקה בתוך טרנזקציית הכתיבה (נעולה) - כוללת מנות קודמות שכבר נכתבו
+        conn.execute('BEGIN IMMEDIATE')
+        updated = len(existing_usernames(conn, [username for username, _ in rows])) if upsert else 0
+        changes_before = conn.total_changes
+        conn.executemany(UPSERT_SQL if upsert else INSERT_SQL, rows)
+        written = conn.total_changes - changes_before
+    if upsert:
+        stats['updated'] += updated
+        stats['inserted'] += written - updated
+    else:
+        # משתמש שהופיע גם במנה הקודמת (שעוד לא נכתבה בזמן הבדיקה)
+        stats['inserted'] += written
+        stats['skipped'] += len(rows) - written
+
+
+def report(progress, stats, started):
+    if progress is None:
+        return
+    elapsed = time.perf_counter() - started
+    rate = stats['read'] / elapsed if elapsed else 0
+    print(f"\r{stats['read']} נקראו | {stats['inserted']} נוספו | {stats['updated']} עודכנו | "
+          f"{stats['skipped']} דולגו | {rate:.0f} משתמשים/שנייה", end='', file=progress, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ייבוא משתמשים בכמויות ל-users.db')
+    parser.add_argument('source', help='קובץ CSV או JSONL')
+    parser.add_argument('--db', default='users.db')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='ברירת מחדל: לפי סיומת הקובץ')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='תהליכים לגיבוב הסיסמאות')
+    parser.add_argument('--upsert', action='store_true', help='להחליף סיסמה של משתמשים קיימים')
+    args = parser.parse_args()
+
+    stats = import_users(args.source, args.db, args.format, args.batch_size, args.workers,
+                         args.upsert, progress=sys.stderr)
+    print(file=sys.stderr)
+    print(f"✅ {stats['inserted']} נוספו, {stats['updated']} עודכנו, {stats['skipped']} דולגו "
+          f"ב-{stats['seconds']:.1f} שניות ({stats['read'] / max(stats['seconds'], 1e-9):.0f} משתמשים/שנייה)")
+
+
+if __name__ == '__main__':
+    main()
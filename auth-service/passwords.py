@@ -0,0 +1,148 @@
+"""
+גיבוב סיסמאות עם KDF מהספרייה הסטנדרטית (scrypt או PBKDF2) עם salt.
+
+פורמט השמירה:
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+hash ישן (SHA-256 בלי salt, 64 תווי hex) עדיין מאומת, ו-needs_rehash
+מסמן אותו לגיבוב מחדש בהתחברות המוצלחת הבאה.
+
+החישוב יקר בכוונה, ולכן הוא רץ ב-PasswordHasher: מאגר threads חסום
+(hashlib משחרר את ה-GIL בזמן החישוב) עם מגבלת תור. כשהתור מלא
+נזרק HashingQueueFull והשירות מחזיר 503 במקום לצבור בקשות.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SCRYPT_N = int(os.getenv('AUTH_SCRYPT_N', str(2 ** 14)))
+SCRYPT_R = int(os.getenv('AUTH_SCRYPT_R', '8'))
+SCRYPT_P = int(os.getenv('AUTH_SCRYPT_P', '1'))
+PBKDF2_ITERATIONS = int(os.getenv('AUTH_PBKDF2_ITERATIONS', '600000'))
+PASSWORD_SCHEME = os.getenv('AUTH_PASSWORD_SCHEME', 'scrypt')
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class HashingQueueFull(Exception):
+    """יותר מדי חישובי hash ממתינים - יש לדחות את הבקשה"""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    # OpenSSL דורש maxmem מפורש מעל ~32MB; 128*r*(n+p+2) הוא הצורך בפועל
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=128 * r * (n + p + 2) + 1024 * 1024, dklen=KEY_BYTES)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations, dklen=KEY_BYTES)
+
+
+def legacy_hash(password):
+    """הפורמט הישן - SHA-256 בודד בלי salt"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def hash_password(password, scheme=None, n=None, r=None, p=None, iterations=None):
+    """hash חדש עם salt אקראי בפורמט השמירה"""
+    scheme = scheme or PASSWORD_SCHEME
+    salt = secrets.token_bytes(SALT_BYTES)
+    if scheme == 'scrypt':
+        n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+        return f'scrypt${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}'
+    if scheme == 'pbkdf2_sha256':
+        iterations = iterations or PBKDF2_ITERATIONS
+        return f'pbkdf2_sha256${iterations}${_b64(salt)}${_b64(_pbkdf2(password, salt, iterations))}'
+    raise ValueError(f'unknown password scheme: {scheme}')
+
+
+def verify_password(password, stored):
+    """בדיקת סיסמה מול hash שמור בכל אחד מהפורמטים"""
+    parts = stored.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            expected = _unb64(parts[5])
+            return hmac.compare_digest(expected, _scrypt(password, _unb64(parts[4]), n, r, p))
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            expected = _unb64(parts[3])
+            return hmac.compare_digest(expected, _pbkdf2(password, _unb64(parts[2]), int(parts[1])))
+    except ValueError:
+        return False
+    if len(parts) == 1:
+        return hmac.compare_digest(stored, legacy_hash(password))
+    return False
+
+
+def needs_rehash(stored):
+    """האם ה-hash ישן או נוצר בפרמטרים שונים מהנוכחיים"""
+    if PASSWORD_SCHEME == 'scrypt':
+        return stored.split('$')[:4] != ['scrypt', str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+    return stored.split('$')[:2] != ['pbkdf2_sha256', str(PBKDF2_ITERATIONS)]
+
+
+class PasswordHasher:
+    """מריץ חישובי hash על מאגר threads חסום עם מגבלת עומק תור"""
+
+    def __init__(self, workers=None, max_queue=32):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        # מקומות פנויים = חישובים שרצים + ממתינים בתור
+        self._slots = threading.BoundedSemaphore(self.workers + max_queue)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        # hash קבוע למשתמש שלא קיים - אותו זמן תגובה כמו למשתמש קיים
+        self._dummy_hash = hash_password(secrets.token_urlsafe(16))
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingQueueFull()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._done)
+        return future.result()
+
+    def _done(self, future):
+        self._slots.release()
+        with self._lock:
+            self.completed += 1
+
+    def hash(self, password):
+        return self._run(hash_password, password)
+
+    def verify(self, password, stored):
+        """stored=None (משתמש לא קיים) עדיין משלם את מחיר החישוב"""
+        if stored is None:
+            self._run(verify_password, password, self._dummy_hash)
+            return False
+        return self._run(verify_password, password, stored)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
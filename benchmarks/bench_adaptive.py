@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק: זמן בחירת שאלה מותאמת-יכולת לפי גודל המאגר
+
+pick_adaptive (אינדקס ממוין לפי קושי + bisect) מול ניקוד כל השאלות
+הפתוחות בכל בקשה, ולצורך השוואה גם pick_unanswered (הגרלה אחידה).
+לכל גודל מאגר נמדדים משתמש חדש ומשתמש שענה כבר על חצי מהמאגר.
+
+הרצה:
+    python3 benchmarks/bench_adaptive.py
+"""
+
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from adaptive import difficulty_index, pick_adaptive
+from question_bank import QuestionBank
+from selection import pick_unanswered
+
+BANK_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def make_bank(size, rng):
+    return QuestionBank([
+        {'id': i, 'type': 'true_false', 'question': f'שאלה {i}', 'correct_answer': True,
+         'difficulty': rng.gauss(0, 1.5)}
+        for i in range(1, size + 1)
+    ])
+
+
+def score_all(bank, answered, target):
+    """החלופה הנאיבית: מעבר על כל המאגר בכל בקשה"""
+    best = min((abs(difficulty - target), position)
+               for position, difficulty in enumerate(bank.difficulties)
+               if bank.ids[position] not in answered)
+    return bank.at(best[1])
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{'N':>9} {'answered':>9} {'index ms':>9} {'adaptive µs':>12} {'random µs':>10} {'scan µs':>11}")
+    for size in BANK_SIZES:
+        bank = make_bank(size, rng)
+        started = time.perf_counter()
+        difficulty_index(bank)
+        index_ms = (time.perf_counter() - started) * 1000
+
+        for fraction in (0.0, 0.5):
+            answered = set(rng.sample(range(1, size + 1), int(size * fraction)))
+            targets = [rng.gauss(0, 1.5) for _ in range(1000)]
+            adaptive_us = per_call_us(lambda: pick_adaptive(bank, answered, rng, rng.choice(targets)), 2000)
+            random_us = per_call_us(lambda: pick_unanswered(bank, answered, rng), 2000)
+            scan_us = per_call_us(lambda: score_all(bank, answered, rng.choice(targets)),
+                                  max(1, 20_000 // size))
+            print(f"{size:>9} {fraction:>9.0%} {index_ms:>9.1f} {adaptive_us:>12.2f} "
+                  f"{random_us:>10.2f} {scan_us:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
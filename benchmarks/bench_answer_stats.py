@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק: סטטיסטיקת התשובות לכל שאלה
+
+מודד את עלות הרישום בנתיב הבקשה (record ל-shard) ואת זמן הדוח על
+היסטוריה סינתטית של מיליוני תשובות: קושי ופופולריות מקבצי המונים, ומדד
+ההבחנה שעובר על הבלוקים הגולמיים.
+
+הרצה:
+    python3 benchmarks/bench_answer_stats.py
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from answer_stats import AnswerStats, discrimination_groups, encode_item, item_report, load_counts
+
+HISTORY_SIZES = [1_000_000, 5_000_000]
+QUESTIONS = 10_000
+USERS = 50_000
+BLOCK_ROWS = 100_000
+
+
+def write_history(directory, rows):
+    """היסטוריה דרך AnswerStats: הזרקה ישירה ל-shard ו-flush לכל בלוק"""
+    rng = random.Random(1)
+    stats = AnswerStats(directory, flush_interval=3600)
+    shard = stats._shard()
+    for start in range(0, rows, BLOCK_ROWS):
+        count = min(BLOCK_ROWS, rows - start)
+        pairs = [(rng.randrange(QUESTIONS), rng.randrange(4)) for _ in range(count)]
+        shard.columns = [
+            array('Q', (encode_item(question, choice) for question, choice in pairs)),
+            array('Q', (rng.randrange(USERS) for _ in range(count))),
+            array('B', (1 if choice == question % 4 or rng.random() < 0.3 else 0
+                        for question, choice in pairs)),
+        ]
+        stats.flush()
+    stats.close()
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    try:
+        stats = AnswerStats(os.path.join(workdir, 'record'), flush_interval=3600)
+        record_us = min(timeit.repeat(lambda: stats.record('admin', 17, 2, True),
+                                      number=100_000, repeat=3)) / 100_000 * 1e6
+        stats.close()
+        print(f'record: {record_us:.2f} µs לתשובה')
+
+        print(f"{'answers':>10} {'counts s':>9} {'report s':>9} {'discrimination s':>17}")
+        for rows in HISTORY_SIZES:
+            directory = os.path.join(workdir, f'history-{rows}')
+            os.makedirs(directory)
+            write_history(directory, rows)
+            started = time.perf_counter()
+            counts = load_counts(directory)
+            loaded = time.perf_counter()
+            item_report(counts)
+            reported = time.perf_counter()
+            discrimination_groups(directory, counts)
+            finished = time.perf_counter()
+            print(f"{rows:>10} {loaded - started:>9.2f} {reported - loaded:>9.2f} {finished - reported:>17.2f}")
+            shutil.rmtree(directory)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק: quiz-app ב-Flask (gunicorn gthread) מול מצב ASGI (uvicorn)
+
+מעלה auth-service מקומי עם השהיה מלאכותית ל-/verify (מדמה רשת),
+מריץ את quiz-app במצב AUTH_VERIFY_MODE=remote בלי מטמון, ושולח
+בקשות /api/score במקביל. בנתיב הסינכרוני כל בקשה תופסת thread
+בזמן ההמתנה ל-auth-service; בנתיב האסינכרוני היא רק await.
+
+הרצה:
+    python3 benchmarks/bench_asgi.py [מספר בקשות] [מקביליות] [השהיית auth ב-ms]
+"""
+
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUIZ_DIR = os.path.join(ROOT, 'quiz-app')
+AUTH_WORKERS = 1
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def delayed_auth(environ, start_response):
+    """auth-service עם השהיה מלאכותית ל-/verify (נטען ע"י gunicorn)"""
+    import app as auth
+    if environ['PATH_INFO'] == '/verify':
+        time.sleep(float(os.environ['BENCH_AUTH_LATENCY']))
+    return auth.app(environ, start_response)
+
+
+def start_auth_service(workdir, latency):
+    # gunicorn עם הרבה threads - שרת הפיתוח של werkzeug עצמו היה צוואר הבקבוק
+    port = free_port()
+    env = dict(os.environ, BENCH_AUTH_LATENCY=str(latency))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--chdir', workdir,
+         '--pythonpath', f"{os.path.join(ROOT, 'auth-service')},{os.path.join(ROOT, 'benchmarks')}",
+         '--bind', f'127.0.0.1:{port}', '--workers', str(AUTH_WORKERS), '--worker-class', 'gthread',
+         '--threads', '256', '--log-level', 'warning', 'bench_asgi:delayed_auth'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            requests.get(f'{url}/login', timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('auth-service לא עלה')
+
+
+def start_quiz(command, port, auth_url):
+    env = dict(os.environ,
+               AUTH_SERVICE_URL=auth_url,
+               AUTH_VERIFY_MODE='remote',
+               AUTH_CACHE_POSITIVE_TTL='0',
+               AUTH_POOL_SIZE='200',
+               PORT=str(port))
+    process = subprocess.Popen(command, cwd=QUIZ_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            requests.get(f'http://127.0.0.1:{port}/api/score', timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'השרת לא עלה: {command}')
+
+
+async def load(url, cookie, total, concurrency):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60, headers={'Cookie': f'session={cookie}'}) as client:
+        queue = iter(range(total))
+        failures = 0
+
+        async def worker():
+            nonlocal failures
+            for _ in queue:
+                try:
+                    response = await client.get(url)
+                except httpx.HTTPError:
+                    failures += 1
+                    continue
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started), failures
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 200) / 1000
+    workdir = tempfile.mkdtemp()
+    shutil.copy(os.path.join(ROOT, 'auth-service', 'users.db'), workdir)
+    auth_process, auth_url = start_auth_service(workdir, latency)
+
+    login = requests.post(f'{auth_url}/auth', data={'username': 'admin', 'password': 'admin123'},
+                          allow_redirects=False)
+    cookie = login.cookies['session']
+
+    modes = {
+        'flask (gthread 1x8)': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                '--workers', '1', '--threads', '8', '--log-level', 'warning'],
+        'asgi (uvicorn x1)': [sys.executable, '-m', 'uvicorn', 'asgi:application',
+                              '--port', '{port}', '--log-level', 'warning'],
+    }
+
+    print(f"{total} בקשות, מקביליות {concurrency}, השהיית auth {latency * 1000:.0f}ms")
+    print(f"{'mode':>22} {'req/s':>10} {'failures':>9}")
+    try:
+        for name, command in modes.items():
+            port = free_port()
+            command = [part.replace('{port}', str(port)) for part in command]
+            process = start_quiz(command, port, auth_url)
+            try:
+                rate, failures = asyncio.run(load(f'http://127.0.0.1:{port}/api/score', cookie,
+                                                  total, concurrency))
+            finally:
+                process.terminate()
+                process.wait()
+            print(f"{name:>22} {rate:>10.0f} {failures:>9}")
+    finally:
+        auth_process.terminate()
+        auth_process.wait()
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
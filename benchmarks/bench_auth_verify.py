@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק לאימות בקשות ב-quiz-app: local מול remote
+
+מעלה את auth-service על פורט מקומי, מתחבר כ-admin, ומודד בקשות
+/api/score של quiz-app: remote (עם ובלי מטמון התוצאות) מול local.
+
+הרצה:
+    python3 benchmarks/bench_auth_verify.py [מספר בקשות]
+"""
+
+import importlib.util
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_service(name, directory, workdir=None):
+    """טעינת app.py של שירות בשם מודול ייחודי (לשני השירותים אותו שם קובץ)"""
+    path = os.path.join(ROOT, directory)
+    sys.path.insert(0, path)
+    cwd = os.getcwd()
+    os.chdir(workdir or path)
+    try:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(path, 'app.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    # עותק של users.db - לא נוגעים בקובץ שב-repo
+    workdir = tempfile.mkdtemp()
+    shutil.copy(os.path.join(ROOT, 'auth-service', 'users.db'), workdir)
+    auth = load_service('auth_app', 'auth-service', workdir)
+    # HTTP/1.1 כדי ששרת הבדיקה ישאיר חיבורים פתוחים (keep-alive)
+    WSGIRequestHandler.protocol_version = 'HTTP/1.1'
+    server = make_server('127.0.0.1', 0, auth.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    auth_url = f'http://127.0.0.1:{server.server_port}'
+
+    os.environ['AUTH_SERVICE_URL'] = auth_url
+    quiz = load_service('quiz_app', 'quiz-app')
+
+    login = requests.Session()
+    response = login.post(f'{auth_url}/auth', data={'username': 'admin', 'password': 'admin123'},
+                          allow_redirects=False)
+    assert response.status_code == 302, 'התחברות נכשלה'
+
+    client = quiz.app.test_client()
+    client.set_cookie('session', login.cookies['session'])
+
+    print(f"{'mode':>14} {'requests':>9} {'req/s':>10} {'µs/req':>10}")
+    for mode, cache_ttl in (('remote', 0), ('remote+cache', 5), ('local', 0)):
+        quiz.AUTH_VERIFY_MODE = mode.split('+')[0]
+        quiz.verification_cache.positive_ttl = cache_ttl
+        assert client.get('/api/score').status_code == 200
+
+        started = time.perf_counter()
+        for _ in range(count):
+            client.get('/api/score')
+        elapsed = time.perf_counter() - started
+
+        print(f"{mode:>14} {count:>9} {count / elapsed:>10.0f} {elapsed / count * 1e6:>10.0f}")
+
+    server.shutdown()
+    shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
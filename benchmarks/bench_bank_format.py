@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק: questions.json מול המאגר המהודר (.qbank)
+
+לכל גודל מאגר מודד גודל קובץ, זמן טעינה (פענוח JSON מלא מול mmap),
+זיכרון Python שהטעינה הקצתה (tracemalloc) וזמן הגשת שאלה
+(pick_unanswered + find).
+
+הרצה:
+    python3 benchmarks/bench_bank_format.py
+"""
+
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from packed_bank import compile_bank
+from question_bank import load_bank
+from selection import pick_unanswered
+
+BANK_SIZES = [1_000, 10_000, 100_000]
+
+
+def write_json(path, size):
+    questions = [
+        {
+            'id': i,
+            'type': 'multiple_choice',
+            'question': f'שאלה מספר {i} - מהי התשובה הנכונה?',
+            'options': [f'תשובה {i}-{k}' for k in range(4)],
+            'correct_answer': i % 4,
+            'explanation': f'הסבר מפורט לשאלה {i} עם מעט טקסט נוסף',
+        }
+        for i in range(1, size + 1)
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'questions': questions}, f, ensure_ascii=False, indent=2)
+
+
+def measure_load(path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    bank = load_bank(path)
+    elapsed = time.perf_counter() - started
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return bank, elapsed * 1000, allocated / 1024 / 1024
+
+
+def measure_serve(bank, size):
+    answered = set(random.sample(range(1, size + 1), size // 2))
+    serve = min(timeit.repeat(lambda: pick_unanswered(bank, answered), number=2000, repeat=3)) / 2000
+    ids = [random.randint(1, size) for _ in range(2000)]
+    find = min(timeit.repeat(lambda: [bank.find(i) for i in ids], number=1, repeat=3)) / len(ids)
+    return serve * 1e6, find * 1e6
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"{'N':>8} {'format':>7} {'size KB':>9} {'load ms':>9} {'heap MB':>9} "
+              f"{'pick µs':>9} {'find µs':>9}")
+        for size in BANK_SIZES:
+            source = os.path.join(workdir, f'questions-{size}.json')
+            target = os.path.join(workdir, f'questions-{size}.qbank')
+            write_json(source, size)
+            compile_bank(source, target)
+            for name, path in (('json', source), ('qbank', target)):
+                bank, load_ms, heap_mb = measure_load(path)
+                pick_us, find_us = measure_serve(bank, size)
+                print(f"{size:>8} {name:>7} {os.path.getsize(path) / 1024:>9.0f} {load_ms:>9.2f} "
+                      f"{heap_mb:>9.2f} {pick_us:>9.2f} {find_us:>9.2f}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק: סינון שאלות לפי תגיות / נושא / קושי
+
+על מאגר של 100k שאלות עם 200 תגיות ו-20 נושאים מודד: בניית תת-מאגר
+לסינון (חיתוך מפות ביטים, פעם אחת לכל סינון), הגשת שאלה מסוננת
+מהמטמון, בדיקת "האם נשאר משהו פתוח" (filter & ~answered) - מול סריקת
+כל המאגר בכל בקשה.
+
+הרצה:
+    python3 benchmarks/bench_filters.py
+"""
+
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from answered import AnsweredSet
+from question_bank import QuestionBank
+from question_index import QuestionFilter, question_index
+from selection import pick_unanswered
+
+BANK_SIZE = 100_000
+TAGS = [f'tag{i}' for i in range(200)]
+TOPICS = [f'topic{i}' for i in range(20)]
+FILTERS = {
+    'tag': {'tags': 'tag1'},
+    '2 tags': {'tags': 'tag1,tag2'},
+    'topic+level': {'topic': 'topic3', 'difficulty': 'easy'},
+    '2 tags+topic+level': {'tags': 'tag1,tag2', 'topic': 'topic3,topic4', 'difficulty': 'easy,medium'},
+}
+
+
+def make_bank(rng):
+    # התפלגות תגיות לא אחידה - מעט תגיות נפוצות והרבה נדירות
+    weights = [1 / (rank + 1) for rank in range(len(TAGS))]
+    return QuestionBank([
+        {'id': i, 'type': 'true_false', 'question': f'שאלה {i}', 'correct_answer': True,
+         'topic': rng.choice(TOPICS), 'tags': rng.choices(TAGS, weights, k=3),
+         'difficulty': rng.gauss(0, 1)}
+        for i in range(1, BANK_SIZE + 1)
+    ])
+
+
+def scan(bank, args, answered):
+    """החלופה הנאיבית: סינון כל המאגר בכל בקשה"""
+    tags = set(args.get('tags', '').split(',')) - {''}
+    topics = set(args.get('topic', '').split(',')) - {''}
+    matching = [q for q in bank.questions
+                if tags <= set(q['tags']) and (not topics or q['topic'] in topics)
+                and q['id'] not in answered]
+    return random.choice(matching) if matching else None
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    rng = random.Random(1)
+    bank = make_bank(rng)
+    index = question_index(bank)
+    answered = AnsweredSet()
+    for question_id in rng.sample(range(1, BANK_SIZE + 1), BANK_SIZE // 2):
+        answered.add(question_id)
+    answered_bits = answered.bitmap()
+
+    print(f"{'filter':>20} {'matches':>8} {'build ms':>9} {'pick µs':>8} {'open? µs':>9} {'scan µs':>9}")
+    for name, args in FILTERS.items():
+        question_filter = QuestionFilter.from_args(args)
+        started = time.perf_counter()
+        subset = index.subset(bank, question_filter)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        pick_us = per_call_us(lambda: pick_unanswered(index.subset(bank, question_filter), answered, rng), 2000)
+        open_us = per_call_us(lambda: subset.bitmap & ~answered_bits != 0, 2000)
+        scan_us = per_call_us(lambda: scan(bank, args, answered), 3)
+        print(f"{name:>20} {len(subset):>8} {build_ms:>9.2f} {pick_us:>8.2f} {open_us:>9.2f} {scan_us:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
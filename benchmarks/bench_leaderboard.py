@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק: טבלת מובילים מתוחזקת (skip list) מול מיון מלא בכל בקשה
+
+לכל מספר שחקנים מודד עדכון ניקוד, top-10 ומקום של משתמש - פעם עם
+Leaderboard ופעם עם sorted() על מילון הניקודים, כמו שהיה נדרש בלי
+מבנה מתוחזק.
+
+הרצה:
+    python3 benchmarks/bench_leaderboard.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from leaderboard import Leaderboard
+
+PLAYER_COUNTS = [1_000, 10_000, 100_000]
+TOP_K = 10
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def sorted_top(scores):
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:TOP_K]
+
+
+def sorted_rank(scores, username):
+    score = scores[username]
+    return 1 + sum(1 for other in scores.values() if other > score)
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{'N':>8} {'update µs':>10} {'top µs':>10} {'rank µs':>10} "
+          f"{'sort top µs':>12} {'scan rank µs':>13}")
+    for count in PLAYER_COUNTS:
+        scores = {f'user{i}': rng.randint(0, 500) for i in range(count)}
+        board = Leaderboard()
+        for username, score in scores.items():
+            board.update(username, score)
+        names = list(scores)
+
+        def update():
+            username = rng.choice(names)
+            scores[username] += 1
+            board.update(username, scores[username])
+
+        update_us = per_call_us(update, 2000)
+        top_us = per_call_us(lambda: board.top(TOP_K), 2000)
+        rank_us = per_call_us(lambda: board.rank_of(rng.choice(names)), 2000)
+        rounds = max(1, 200_000 // count)
+        sort_us = per_call_us(lambda: sorted_top(scores), rounds)
+        scan_us = per_call_us(lambda: sorted_rank(scores, rng.choice(names)), rounds)
+        print(f"{count:>8} {update_us:>10.2f} {top_us:>10.2f} {rank_us:>10.2f} "
+              f"{sort_us:>12.1f} {scan_us:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
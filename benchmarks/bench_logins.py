@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק להתחברויות מול users.db
+
+יוצר מסד נתונים זמני עם הסכמה של create_users_db.py ועוד משתמשים,
+ומשווה התחברויות לשנייה: connect/close בכל ניסיון (השיטה הישנה)
+מול UserDatabase (חיבור לכל thread, WAL, mmap, statement cache).
+
+הרצה:
+    python3 benchmarks/bench_logins.py [מספר התחברויות] [מספר משתמשים]
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'auth-service'))
+
+import create_users_db
+from db import UserDatabase
+
+THREAD_COUNTS = [1, 8]
+
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def build_database(workdir, user_count):
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_users_db.create_database()
+    finally:
+        os.chdir(cwd)
+
+    path = os.path.join(workdir, 'users.db')
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        'INSERT INTO users (username, password) VALUES (?, ?)',
+        ((f'user{i:06d}', hash_password(f'pass{i}')) for i in range(user_count))
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def legacy_verify(path, username, password):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute('SELECT username FROM users WHERE username = ? AND password = ?',
+                   (username, hash_password(password)))
+    user = cursor.fetchone()
+    conn.close()
+    return user is not None
+
+
+def pooled_verify(db, username, password):
+    return db.find_password_hash(username) == hash_password(password)
+
+
+def run(verify, attempts, threads, user_count):
+    logins = [(f'user{i:06d}', f'pass{i}') for i in (random.randrange(user_count) for _ in range(attempts))]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda login: verify(*login), logins))
+    elapsed = time.perf_counter() - started
+    assert all(results)
+    return attempts / elapsed
+
+
+def main():
+    attempts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    user_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = build_database(workdir, user_count)
+        db = UserDatabase(path)
+
+        print(f"{user_count} משתמשים, {attempts} התחברויות")
+        print(f"{'threads':>8} {'legacy logins/s':>16} {'pooled logins/s':>16}")
+        for threads in THREAD_COUNTS:
+            legacy = run(lambda u, p: legacy_verify(path, u, p), attempts, threads, user_count)
+            pooled = run(lambda u, p: pooled_verify(db, u, p), attempts, threads, user_count)
+            print(f"{threads:>8} {legacy:>16.0f} {pooled:>16.0f}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק: התחברויות לשנייה בפרמטרי עלות שונים של ה-KDF
+
+מריץ אימות סיסמאות דרך PasswordHasher (המאגר החסום שמשמש את
+auth-service) עבור SHA-256 הישן, scrypt בכמה ערכי n ו-PBKDF2 בכמה
+מספרי איטרציות, ומדווח התחברויות לשנייה וזמן ממוצע להתחברות.
+
+הרצה:
+    python3 benchmarks/bench_passwords.py [מספר התחברויות] [threads ששולחים]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'auth-service'))
+
+import passwords
+from passwords import PasswordHasher
+
+COSTS = [
+    ('sha256 (legacy)', lambda: passwords.legacy_hash('pass123')),
+    ('scrypt n=2^12', lambda: passwords.hash_password('pass123', scheme='scrypt', n=2 ** 12)),
+    ('scrypt n=2^14', lambda: passwords.hash_password('pass123', scheme='scrypt', n=2 ** 14)),
+    ('scrypt n=2^15', lambda: passwords.hash_password('pass123', scheme='scrypt', n=2 ** 15)),
+    ('pbkdf2 100k', lambda: passwords.hash_password('pass123', scheme='pbkdf2_sha256', iterations=100000)),
+    ('pbkdf2 600k', lambda: passwords.hash_password('pass123', scheme='pbkdf2_sha256', iterations=600000)),
+]
+
+
+def main():
+    attempts = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    # תור גדול מספיק לכל השולחים - כאן מודדים קצב, לא דחייה
+    hasher = PasswordHasher(max_queue=clients)
+    print(f"{attempts} התחברויות, {clients} threads ששולחים, {hasher.workers} workers לחישוב")
+    print(f"{'cost':>16} {'logins/s':>10} {'ms/login':>10}")
+    for name, make_hash in COSTS:
+        stored = make_hash()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(lambda _: hasher.verify('pass123', stored), range(attempts)))
+        elapsed = time.perf_counter() - started
+        assert all(results)
+        print(f"{name:>16} {attempts / elapsed:>10.1f} {elapsed / attempts * 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק: רישום תשובות למאגר ההתקדמות
+
+משווה commit לכל תשובה (טרנזקציה + fsync בכל בקשה) מול ProgressStore,
+שרושם לחוצץ בזיכרון וכותב ברקע בטרנזקציות מקובצות. מודד את הזמן
+שבקשת /api/answer מחכה לרישום.
+
+הרצה:
+    python3 benchmarks/bench_progress.py [מספר תשובות] [מספר משתמשים]
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from progress_store import INSERT_ANSWER_SQL, SCHEMA_SQL, UPSERT_PROGRESS_SQL, ProgressStore
+
+
+def per_answer_commit(path, answers):
+    conn = sqlite3.connect(path)
+    for sql in SCHEMA_SQL:
+        conn.execute(sql)
+    started = time.perf_counter()
+    for username, question_id, correct in answers:
+        with conn:
+            conn.execute(INSERT_ANSWER_SQL, (username, question_id, correct, time.time()))
+            conn.execute(UPSERT_PROGRESS_SQL, (username, correct, 1, time.time()))
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return elapsed
+
+
+def buffered(path, answers):
+    store = ProgressStore(path, flush_interval=0.05)
+    started = time.perf_counter()
+    for username, question_id, correct in answers:
+        store.record(username, question_id, correct)
+    elapsed = time.perf_counter() - started
+    store.close()
+    return elapsed, store.stats()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    answers = [(f'user{random.randrange(users)}', random.randrange(1000), random.random() < 0.5)
+               for _ in range(count)]
+
+    workdir = tempfile.mkdtemp()
+    try:
+        direct = per_answer_commit(os.path.join(workdir, 'direct.db'), answers)
+        recorded, stats = buffered(os.path.join(workdir, 'buffered.db'), answers)
+        print(f"{count} תשובות, {users} משתמשים")
+        print(f"{'mode':>18} {'µs/answer':>10} {'answers/s':>12}")
+        print(f"{'commit per answer':>18} {direct / count * 1e6:>10.1f} {count / direct:>12.0f}")
+        print(f"{'buffered':>18} {recorded / count * 1e6:>10.1f} {count / recorded:>12.0f}")
+        print(f"flushes: {stats['flushes']}, נכתבו: {stats['flushed']}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
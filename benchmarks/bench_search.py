@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק: חיפוש טקסט חופשי במאגר של 100k שאלות
+
+אוצר מילים סינתטי של 50k מילים בעברית בהתפלגות Zipf (כמו טקסט אמיתי -
+מעט מילים נפוצות מאוד והרבה נדירות). מודד בניית אינדקס, הידור ל-.qbank
+וטעינה, וזמן שאילתה (חציון / p99) לסוגי שאילתות שונים - מול סריקה
+לינארית של הטקסט המנורמל.
+
+הרצה:
+    python3 benchmarks/bench_search.py
+"""
+
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from packed_bank import PackedQuestionBank, compile_bank
+from search_index import build_search_index, normalize, search_index
+
+BANK_SIZE = 100_000
+VOCABULARY = 50_000
+LETTERS = 'אבגדהוזחטיכלמנסעפצקרשת'
+ROUNDS = 200
+
+
+def make_questions(rng):
+    words = sorted({''.join(rng.choices(LETTERS, k=rng.randint(2, 7))) for _ in range(VOCABULARY)})
+    rng.shuffle(words)
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+    def text(low, high):
+        return ' '.join(rng.choices(words, cum_weights=cumulative, k=rng.randint(low, high)))
+
+    questions = [
+        {'id': i, 'type': 'multiple_choice', 'question': text(6, 14) + '?',
+         'options': [text(1, 3) for _ in range(4)], 'correct_answer': 0, 'explanation': text(8, 20)}
+        for i in range(1, BANK_SIZE + 1)
+    ]
+    return questions, words
+
+
+def timings(func, rounds=ROUNDS):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def main():
+    rng = random.Random(3)
+    questions, words = make_questions(rng)
+
+    started = time.perf_counter()
+    build_search_index(questions)
+    print(f'בניית אינדקס: {time.perf_counter() - started:.1f}s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'questions.json')
+        with open(source, 'w', encoding='utf-8') as f:
+            json.dump({'questions': questions}, f, ensure_ascii=False)
+        target = os.path.join(directory, 'questions.qbank')
+        started = time.perf_counter()
+        compile_bank(source, target)
+        print(f'הידור .qbank: {time.perf_counter() - started:.1f}s ({os.path.getsize(target) / 2 ** 20:.0f}MB)')
+
+        bank = PackedQuestionBank.from_file(target)
+        started = time.perf_counter()
+        index = search_index(bank)
+        print(f'טעינת האינדקס מהקובץ: {(time.perf_counter() - started) * 1000:.1f}ms, {len(index.terms)} מונחים')
+
+        common, medium, rare = words[0], words[200], words[20_000]
+        queries = {
+            'rare word': rare,
+            'common word': common,
+            'medium word': medium,
+            'two common': f'{common} {words[1]}',
+            'common + rare': f'{common} {rare}',
+            'three words': f'{words[2]} {words[10]} {words[50]}',
+            'three common': f'{words[0]} {words[1]} {words[2]}',
+            'prefix (3)': common[:3] + '*',
+            'prefix (2)': common[:2] + '*',
+            'missing': 'אאאאאאאאאא',
+        }
+        print(f"{'query':>14} {'hits':>5} {'p50 µs':>8} {'p99 µs':>8}")
+        for name, query in queries.items():
+            hits = len(index.search(query, 10))
+            p50, p99 = timings(lambda: index.search(query, 10))
+            print(f'{name:>14} {hits:>5} {p50:>8.0f} {p99:>8.0f}')
+
+        texts = [normalize(' '.join([q['question'], *q['options'], q['explanation']])) for q in questions]
+        started = time.perf_counter()
+        [i for i, text in enumerate(texts) if rare in text]
+        print(f'סריקה לינארית (טקסט מנורמל מראש): {(time.perf_counter() - started) * 1000:.0f}ms')
+        del index, bank
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בנצ'מרק לבחירת שאלה שטרם נענתה
+
+משווה את השיטה הישנה (list comprehension + בדיקת `in` על רשימה)
+לבחירה ב-rejection sampling (ומפות ביטים כשכמעט הכל נענה), בגדלי מאגר ואחוזי מענה שונים.
+
+הרצה:
+    python3 benchmarks/bench_selection.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from answered import AnsweredSet
+from question_bank import QuestionBank
+from selection import pick_unanswered
+
+BANK_SIZES = [1_000, 10_000, 100_000]
+ANSWERED_FRACTIONS = [0.0, 0.5, 0.9, 0.99, 0.999]
+
+
+def make_bank(size):
+    return QuestionBank([
+        {'id': i, 'type': 'true_false', 'question': f'q{i}', 'correct_answer': True}
+        for i in range(1, size + 1)
+    ])
+
+
+def legacy_pick(questions, answered):
+    available = [q for q in questions if q['id'] not in answered]
+    return random.choice(available) if available else None
+
+
+def measure(func, repeat):
+    return min(timeit.repeat(func, number=repeat, repeat=3)) / repeat * 1e6
+
+
+def main():
+    print(f"{'N':>8} {'answered':>9} {'legacy µs':>12} {'new µs':>10}")
+    for size in BANK_SIZES:
+        bank = make_bank(size)
+        for fraction in ANSWERED_FRACTIONS:
+            answered_ids = random.sample(range(1, size + 1), int(size * fraction))
+            # כמו ב-app.py - מפת הביטים של ה-session
+            answered_set = AnsweredSet()
+            for question_id in answered_ids:
+                answered_set.add(question_id)
+
+            # השיטה הישנה איטית מאוד במאגרים גדולים - מגבילים את מספר החזרות
+            legacy_repeat = 1 if size * len(answered_ids) > 10**8 else 5
+            if size * len(answered_ids) > 10**9:
+                legacy = float('nan')
+            else:
+                legacy = measure(lambda: legacy_pick(bank.questions, answered_ids), legacy_repeat)
+            new = measure(lambda: pick_unanswered(bank, answered_set), 2000)
+
+            print(f"{size:>8} {fraction:>9.1%} {legacy:>12.1f} {new:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
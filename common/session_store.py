@@ -0,0 +1,385 @@
+"""
+Session בצד השרת עם backends נשלפים.
+
+ב-cookie נשמר רק מזהה אקראי אטום; תוכן ה-session נשמר ב-store משותף.
+כך ה-headers קטנים ואין צורך לחתום מחדש את כל ה-session בכל תשובה.
+
+backends זמינים (נבחרים לפי SESSION_BACKEND):
+    memory - LRU בזיכרון התהליך (לפיתוח / שירות יחיד - לא משותף בין שירותים)
+    sqlite - קובץ SQLite (SESSION_SQLITE_PATH), משותף דרך volume
+    redis  - כל שרת שמדבר בפרוטוקול Redis (SESSION_REDIS_URL)
+
+המודול משותף ל-auth-service ול-quiz-app (common/); בתמונות הוא מועתק
+לצד קבצי האפליקציה.
+"""
+
+import abc
+import os
+import re
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{43}$')
+
+
+class SessionStore(abc.ABC):
+    """ממשק בסיסי: ערכים הם bytes, expires_at הוא זמן unix"""
+
+    @abc.abstractmethod
+    def get(self, sid):
+        """מחזיר (data, expires_at) או None אם אין session בתוקף"""
+
+    @abc.abstractmethod
+    def set(self, sid, data, ttl):
+        pass
+
+    @abc.abstractmethod
+    def touch(self, sid, ttl):
+        pass
+
+    @abc.abstractmethod
+    def delete(self, sid):
+        pass
+
+
+class MemoryStore(SessionStore):
+    """LRU בזיכרון התהליך עם מספר רשומות מקסימלי"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return entry
+
+    def set(self, sid, data, ttl):
+        with self._lock:
+            self._entries[sid] = (data, time.time() + ttl)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def touch(self, sid, ttl):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None:
+                self._entries[sid] = (entry[0], time.time() + ttl)
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+class SqliteStore(SessionStore):
+    """קובץ SQLite במצב WAL - חיבור אחד לכל thread"""
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._connect().execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid):
+        row = self._connect().execute(
+            'SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?',
+            (sid, time.time())
+        ).fetchone()
+        return row
+
+    def set(self, sid, data, ttl):
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)',
+            (sid, data, time.time() + ttl)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (time.time(),))
+
+    def touch(self, sid, ttl):
+        self._connect().execute(
+            'UPDATE sessions SET expires_at = ? WHERE sid = ?',
+            (time.time() + ttl, sid)
+        )
+
+    def delete(self, sid):
+        self._connect().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+
+class RedisProtocolError(Exception):
+    pass
+
+
+class RedisStore(SessionStore):
+    """לקוח RESP מינימלי - עובד מול Redis או כל תחליף מקומי שמדבר באותו פרוטוקול"""
+
+    def __init__(self, url, prefix='session:', timeout=2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = (sock, sock.makefile('rb'))
+            self._local.conn = conn
+            if self.password:
+                self._execute(('AUTH', self.password))
+            if self.db:
+                self._execute(('SELECT', str(self.db)))
+        return conn
+
+    def _reset(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    @staticmethod
+    def _encode(args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode('utf-8')
+            elif isinstance(arg, (int, float)):
+                arg = str(arg).encode('ascii')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError('redis connection closed')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload
+        if kind == b'-':
+            # לא זורקים כאן כדי לא להשאיר תשובות שלא נקראו ב-pipeline
+            return RedisProtocolError(payload.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(payload)
+            if count < 0:
+                return None
+            return [self._read_reply(reader) for _ in range(count)]
+        raise RedisProtocolError(f'unexpected reply: {line!r}')
+
+    def _execute(self, *commands):
+        """שולח כמה פקודות ב-pipeline אחד ומחזיר את התשובות לפי הסדר"""
+        sock, reader = self._connection()
+        try:
+            sock.sendall(b''.join(self._encode(command) for command in commands))
+            replies = [self._read_reply(reader) for _ in commands]
+        except (OSError, ConnectionError):
+            self._reset()
+            raise
+        for reply in replies:
+            if isinstance(reply, RedisProtocolError):
+                raise reply
+        return replies
+
+    def get(self, sid):
+        key = self.prefix + sid
+        data, pttl = self._execute(('GET', key), ('PTTL', key))
+        if data is None:
+            return None
+        return data, time.time() + max(pttl, 0) / 1000
+
+    def set(self, sid, data, ttl):
+        self._execute(('SET', self.prefix + sid, data, 'PX', int(ttl * 1000)))
+
+    def touch(self, sid, ttl):
+        self._execute(('PEXPIRE', self.prefix + sid, int(ttl * 1000)))
+
+    def delete(self, sid):
+        self._execute(('DEL', self.prefix + sid))
+
+
+class RevocationList:
+    """מזהי התחברות (auth_id) שבוטלו ב-logout, נשמרים ב-store משותף"""
+
+    PREFIX = 'revoked:'
+
+    def __init__(self, store):
+        self.store = store
+
+    def revoke(self, auth_id, ttl):
+        self.store.set(self.PREFIX + auth_id, b'1', ttl)
+
+    def is_revoked(self, auth_id):
+        return self.store.get(self.PREFIX + auth_id) is not None
+
+
+def check_login(session, revocations=None, max_age=None):
+    """
+    בדיקה מקומית שה-session שייך למשתמש מחובר: קיים username ו-auth_id,
+    ההתחברות לא ישנה מ-max_age שניות, ו-auth_id לא בוטל.
+    תוקף ה-session עצמו (חתימה / TTL ב-store) כבר נבדק בפתיחת ה-session.
+    """
+    if 'username' not in session or 'auth_id' not in session:
+        return False
+    if max_age is not None and time.time() - session.get('auth_time', 0) > max_age:
+        return False
+    if revocations is not None and revocations.is_revoked(session['auth_id']):
+        return False
+    return True
+
+
+def create_revocation_list():
+    """AUTH_REVOCATION_BACKEND=sqlite/redis מפעיל ביטול התחברויות משותף; ריק - ללא"""
+    backend = os.getenv('AUTH_REVOCATION_BACKEND', '')
+    return RevocationList(create_store(backend)) if backend else None
+
+
+def create_store(backend):
+    """יצירת store לפי שם, עם הגדרות מתוך משתני הסביבה"""
+    if backend == 'memory':
+        return MemoryStore(int(os.getenv('SESSION_MEMORY_MAX_ENTRIES', '10000')))
+    if backend == 'sqlite':
+        return SqliteStore(os.getenv('SESSION_SQLITE_PATH', 'sessions.db'))
+    if backend == 'redis':
+        return RedisStore(os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/0'))
+    raise ValueError(f'unknown session backend: {backend}')
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.previous_sid = None
+        self.modified = False
+
+    def regenerate(self):
+        """מזהה חדש לאותו תוכן - נקרא בהתחברות כדי למנוע session fixation"""
+        if self.sid is not None:
+            self.previous_sid = self.sid
+            self.sid = None
+        self.modified = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """שומר ב-cookie רק את מזהה ה-session, ללא domain (כמו NoDomainSessionInterface)"""
+
+    serializer = TaggedJSONSerializer()
+    session_class = ServerSideSession
+
+    def __init__(self, store):
+        self.store = store
+
+    def _ttl(self, app):
+        return app.permanent_session_lifetime.total_seconds()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not SESSION_ID_PATTERN.match(sid):
+            return self.session_class()
+
+        entry = self.store.get(sid)
+        if entry is None:
+            return self.session_class()
+
+        data, expires_at = entry
+        try:
+            initial = self.serializer.loads(data.decode('utf-8') if isinstance(data, bytes) else data)
+        except ValueError:
+            return self.session_class()
+        return self.session_class(initial, sid=sid, expires_at=expires_at)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                for sid in (session.sid, session.previous_sid):
+                    if sid:
+                        self.store.delete(sid)
+                response.delete_cookie(name, path=path)
+            return
+
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+            session.previous_sid = None
+
+        ttl = self._ttl(app)
+        set_cookie = False
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+            self.store.set(session.sid, self.serializer.dumps(dict(session)).encode('utf-8'), ttl)
+            set_cookie = True
+        elif session.modified:
+            self.store.set(session.sid, self.serializer.dumps(dict(session)).encode('utf-8'), ttl)
+            set_cookie = session.permanent
+        elif self.should_set_cookie(app, session) and session.expires_at - time.time() < ttl / 2:
+            # חידוש תוקף רק כשעבר חצי מזמן החיים - לא כתיבה בכל בקשה
+            self.store.touch(session.sid, ttl)
+            set_cookie = True
+
+        if not set_cookie:
+            return
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            secure=self.get_cookie_secure(app),
+            path=path,
+            samesite=self.get_cookie_samesite(app),
+            domain=None
+        )
@@ -0,0 +1,108 @@
+"""
+בחירת שאלה לפי יכולת המשתמש.
+
+מודל Rasch (IRT חד-פרמטרי): לכל שאלה קושי b ולכל משתמש יכולת θ באותו
+סולם logit, וההסתברות לתשובה נכונה היא 1 / (1 + e^(b - θ)). אחרי כל
+תשובה היכולת מתעדכנת בעדכון Elo: θ += K * (תוצאה - הסתברות צפויה).
+
+היעד לשאלה הבאה הוא הקושי שבו הסיכוי להצליח הוא target_p (0.5 = המידע
+המרבי במודל). לכל מאגר נבנה פעם אחת אינדקס של המיקומים ממוינים לפי
+קושי; בבקשה מוצאים את היעד ב-bisect, מתרחבים לשני הצדדים עד שנאספו
+SPREAD שאלות פתוחות ומגרילים ביניהן - בלי לעבור על כל המאגר.
+"""
+
+import bisect
+import math
+import random
+import threading
+import weakref
+from array import array
+
+# מספר המועמדות הקרובות ליעד שמגרילים ביניהן (גיוון בין משתמשים באותה יכולת)
+SPREAD = 8
+MAX_ABILITY = 6.0
+
+
+def expected_score(ability, difficulty):
+    """הסיכוי לתשובה נכונה לפי מודל Rasch"""
+    return 1.0 / (1.0 + math.exp(difficulty - ability))
+
+
+def update_ability(ability, difficulty, correct, k):
+    """עדכון Elo ליכולת אחרי תשובה, חסום ל-±MAX_ABILITY"""
+    ability += k * ((1.0 if correct else 0.0) - expected_score(ability, difficulty))
+    return max(-MAX_ABILITY, min(MAX_ABILITY, ability))
+
+
+def target_difficulty(ability, target_p=0.5):
+    """הקושי שבו הסיכוי להצליח הוא target_p"""
+    return ability - math.log(target_p / (1.0 - target_p))
+
+
+class DifficultyIndex:
+    """מיקומי השאלות במאגר (לפי bank.at) ממוינים לפי קושי"""
+
+    def __init__(self, difficulties):
+        order = sorted(range(len(difficulties)), key=difficulties.__getitem__)
+        self.positions = array('I', order)
+        self.difficulties = array('d', (difficulties[i] for i in order))
+
+    def __len__(self):
+        return len(self.positions)
+
+
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def difficulty_index(bank):
+    """האינדקס של המאגר - נבנה בבקשה הראשונה ומשתחרר יחד עם המאגר"""
+    index = _indexes.get(bank)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(bank)
+            if index is None:
+                index = _indexes[bank] = DifficultyIndex(bank.difficulties)
+    return index
+
+
+def pick_adaptive(bank, answered, rng=random, target=0.0, spread=SPREAD):
+    """
+    שאלה אקראית מבין spread השאלות הפתוחות שהקושי שלהן הכי קרוב ל-target,
+    או None אם כל השאלות נענו. answered צריך לתמוך בבדיקת `in` ב-O(1).
+    """
+    index = difficulty_index(bank)
+    difficulties, positions = index.difficulties, index.positions
+    total = len(positions)
+    if not total:
+        return None
+
+    # הערך הקרוב ביותר ליעד; בתוך רצף של קושי זהה (למשל מאגר בלי ערכי
+    # קושי) נקודת ההתחלה אקראית - אחרת כולם יקבלו את אותן שאלות
+    nearest = bisect.bisect_left(difficulties, target)
+    if nearest == total or (nearest > 0 and
+                            target - difficulties[nearest - 1] < difficulties[nearest] - target):
+        nearest -= 1
+    value = difficulties[nearest]
+    run_start = bisect.bisect_left(difficulties, value, 0, nearest + 1)
+    run_end = bisect.bisect_right(difficulties, value, nearest)
+    left = rng.randrange(run_start, run_end)
+    right = left + 1
+
+    ids = bank.ids
+    candidates = []
+    while len(candidates) < spread and (left >= 0 or right < total):
+        # מתקדמים לצד שהקושי שלו קרוב יותר ליעד
+        if left >= 0 and (right >= total or
+                          abs(difficulties[left] - target) <= abs(difficulties[right] - target)):
+            position = positions[left]
+            left -= 1
+        else:
+            position = positions[right]
+            right += 1
+        if ids[position] not in answered:
+            candidates.append(position)
+
+    if not candidates:
+        return None
+    return bank.at(rng.choice(candidates))
@@ -0,0 +1,409 @@
+"""
+סטטיסטיקה לכל שאלה מתוך כל התשובות שנבדקו.
+
+רישום: כל תשובה נכנסת ל-shard של ה-thread הנוכחי (מערכי array לכל
+עמודה, נעילה פרטית שכמעט אף פעם לא מתחרים עליה), ו-thread ברקע מרוקן
+את כל ה-shards פעם ב-flush_interval שניות.
+
+אחסון: כל תהליך כותב לקבצים משלו בתיקייה, כך ש-workers לא נועלים זה
+את זה:
+
+answers-<host>-<pid>.qcol - התשובות הגולמיות. בכל flush נוסף בלוק = כותרת
+'<4sI' (QANS, מספר שורות) ואחריה עמודות ברוחב קבוע (little-endian):
+
+    item     uint64[rows]  - question_id << 8 | אינדקס התשובה (int8: true/false = 1/0, -1 אחר)
+    user     uint64[rows]  - hash של שם המשתמש
+    correct  uint8[rows]
+
+counts-<host>-<pid>-<אקראי>.qagg - מונים מצטברים של התהליך: תשובות ונכונות לכל
+item ולכל משתמש. נכתב מחדש (קובץ זמני + replace) בכל flush; גודלו לפי
+מספר הצירופים (שאלה, תשובה) והמשתמשים, לא לפי מספר התשובות.
+
+דוח (python3 answer_stats.py report DIR): קושי (שיעור התשובות הנכונות)
+ופופולריות התשובות מסכום קבצי המונים בלבד. כוח ההבחנה (27% המשתמשים
+החזקים מול החלשים) צריך את התשובה של כל משתמש לכל שאלה, ולכן רק הוא
+עובר על הקבצים הגולמיים - בלוק אחר בלוק, בלי לטעון את כל ההיסטוריה
+לזיכרון; --no-discrimination מדלג עליו.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import operator
+import os
+import secrets
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from itertools import compress
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'QANS'
+BLOCK_HEADER = struct.Struct('<4sI')
+# (שם, typecode) לפי סדר העמודות בבלוק
+COLUMNS = (('item', 'Q'), ('user', 'Q'), ('correct', 'B'))
+ROW_SIZE = sum(array(code).itemsize for _, code in COLUMNS)
+
+# קובץ המונים: כותרת (QAGG, מספר items, מספר משתמשים) ואחריה עמודות uint64 -
+# items, תשובות, נכונות; משתמשים, תשובות, נכונות
+COUNTS_MAGIC = b'QAGG'
+COUNTS_HEADER = struct.Struct('<4sII')
+COUNTERS = ('item_answers', 'item_right', 'user_answers', 'user_right')
+
+# חלק המשתמשים בכל קבוצה במדד ההבחנה, ומינימום תשובות כדי להשתייך לקבוצה
+GROUP_FRACTION = 0.27
+MIN_USER_ANSWERS = 5
+
+
+def user_key(username):
+    return int.from_bytes(hashlib.blake2b(username.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def encode_item(question_id, answer):
+    """question_id << 8 | אינדקס התשובה (True/False הם 1/0, כל דבר אחר -1)"""
+    choice = int(answer) if isinstance(answer, int) and 0 <= answer < 128 else -1
+    return question_id << 8 | (choice & 0xFF)
+
+
+def decode_item(item):
+    choice = item & 0xFF
+    return item >> 8, choice - 256 if choice >= 128 else choice
+
+
+def _empty():
+    return [array(code) for _, code in COLUMNS]
+
+
+def _empty_counts():
+    return {name: Counter() for name in COUNTERS}
+
+
+def _column(values):
+    column = array('Q', values)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column.tobytes()
+
+
+class _Shard:
+    __slots__ = ('lock', 'columns', 'recorded')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.columns = _empty()
+        self.recorded = 0
+
+
+class AnswerStats:
+    def __init__(self, directory, flush_interval=10.0):
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        process = f'{socket.gethostname()}-{os.getpid()}'
+        self.path = os.path.join(self.directory, f'answers-{process}.qcol')
+        # אסימון אקראי: pid חוזר אחרי הפעלה מחדש של הקונטיינר, וקובץ מונים ישן אסור לדרוס
+        self.counts_path = os.path.join(self.directory, f'counts-{process}-{secrets.token_hex(4)}.qagg')
+        self.flush_interval = flush_interval
+        # המונים של התהליך הזה מתחילתו (נכתבים ל-counts_path בכל flush)
+        self._counts = _empty_counts()
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # מדדים לניטור
+        self.flushed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+
+        self._flusher = threading.Thread(target=self._run, name='answer-stats-flush', daemon=True)
+        self._flusher.start()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def record(self, username, question_id, answer, correct):
+        self.record_many(username, [(question_id, answer, correct)])
+
+    def record_many(self, username, results):
+        """רישום [(question_id, answer, correct)] ל-shard של ה-thread - לא ניגש לדיסק"""
+        user = user_key(username)
+        shard = self._shard()
+        with shard.lock:
+            items, users, correct = shard.columns
+            for question_id, answer, is_correct in results:
+                items.append(encode_item(question_id, answer))
+                users.append(user)
+                correct.append(1 if is_correct else 0)
+            shard.recorded += len(results)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """ריקון כל ה-shards: בלוק אחד בסוף הקובץ הגולמי וכתיבת המונים מחדש"""
+        with self._flush_lock:
+            with self._shards_lock:
+                shards = list(self._shards)
+            merged = _empty()
+            for shard in shards:
+                with shard.lock:
+                    columns, shard.columns = shard.columns, _empty()
+                for target, column in zip(merged, columns):
+                    target.extend(column)
+
+            rows = len(merged[0])
+            if not rows:
+                return
+
+            started = time.perf_counter()
+            _add_counts(self._counts, *merged)
+            if sys.byteorder != 'little':
+                for column in merged:
+                    column.byteswap()
+            try:
+                with open(self.path, 'ab') as f:
+                    f.write(BLOCK_HEADER.pack(MAGIC, rows) + b''.join(column.tobytes() for column in merged))
+                self._write_counts()
+            except OSError:
+                # נתוני סטטיסטיקה - לא מנסים שוב, רק מדווחים (המונים ייכתבו ב-flush הבא)
+                logger.exception('כתיבת סטטיסטיקת התשובות ל-%s נכשלה', self.directory)
+                self.failed_flushes += 1
+                return
+
+            self.last_flush_seconds = time.perf_counter() - started
+            self.flushes += 1
+            self.flushed += rows
+
+    def _write_counts(self):
+        counts = self._counts
+        items = sorted(counts['item_answers'])
+        users = sorted(counts['user_answers'])
+        data = b''.join([
+            COUNTS_HEADER.pack(COUNTS_MAGIC, len(items), len(users)),
+            _column(items), _column(map(counts['item_answers'].__getitem__, items)),
+            _column(map(counts['item_right'].__getitem__, items)),
+            _column(users), _column(map(counts['user_answers'].__getitem__, users)),
+            _column(map(counts['user_right'].__getitem__, users)),
+        ])
+        temp_path = f'{self.counts_path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, self.counts_path)
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+
+    def stats(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        return {
+            'shards': len(shards),
+            'recorded': sum(shard.recorded for shard in shards),
+            'flushed': self.flushed,
+            'pending': sum(len(shard.columns[0]) for shard in shards),
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'last_flush_ms': round(self.last_flush_seconds * 1000, 3),
+        }
+
+
+def _add_counts(counts, items, users, correct):
+    """הוספת עמודות של תשובות למונים (Counter / compress - בלי לולאה על השורות)"""
+    counts['item_answers'].update(items)
+    counts['item_right'].update(compress(items, correct))
+    counts['user_answers'].update(users)
+    counts['user_right'].update(compress(users, correct))
+
+
+def load_counts(directory):
+    """סכום קבצי המונים של כל התהליכים. קובץ פגום מדולג"""
+    counts = _empty_counts()
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.qagg'):
+            continue
+        with open(os.path.join(directory, name), 'rb') as f:
+            data = f.read()
+        if len(data) < COUNTS_HEADER.size:
+            logger.warning('קובץ מונים פגום: %s - מדלגים', name)
+            continue
+        magic, items, users = COUNTS_HEADER.unpack_from(data)
+        if magic != COUNTS_MAGIC or len(data) != COUNTS_HEADER.size + (items + users) * 3 * 8:
+            logger.warning('קובץ מונים פגום: %s - מדלגים', name)
+            continue
+        columns = array('Q')
+        columns.frombytes(data[COUNTS_HEADER.size:])
+        if sys.byteorder != 'little':
+            columns.byteswap()
+        keys, answers, right = (columns[i * items:(i + 1) * items] for i in range(3))
+        counts['item_answers'].update(dict(zip(keys, answers)))
+        counts['item_right'].update(dict(zip(keys, right)))
+        offset = items * 3
+        keys, answers, right = (columns[offset + i * users:offset + (i + 1) * users] for i in range(3))
+        counts['user_answers'].update(dict(zip(keys, answers)))
+        counts['user_right'].update(dict(zip(keys, right)))
+    return counts
+
+
+def iter_blocks(directory):
+    """הבלוקים הגולמיים מכל קבצי התיקייה, אחד אחד, כ-dict של array. בלוק חתוך (כתיבה שנקטעה) מסיים את הקובץ שלו"""
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.qcol'):
+            continue
+        with open(os.path.join(directory, name), 'rb') as f:
+            offset = 0
+            while True:
+                header = f.read(BLOCK_HEADER.size)
+                if not header:
+                    break
+                magic, rows = BLOCK_HEADER.unpack(header) if len(header) == BLOCK_HEADER.size else (None, 0)
+                data = f.read(rows * ROW_SIZE) if magic == MAGIC else b''
+                if magic != MAGIC or len(data) < rows * ROW_SIZE:
+                    logger.warning('בלוק לא שלם ב-%s (offset %d) - מדלגים על שאר הקובץ', name, offset)
+                    break
+                offset += BLOCK_HEADER.size + len(data)
+                block, position = {}, 0
+                for column_name, code in COLUMNS:
+                    chunk = block[column_name] = array(code)
+                    size = rows * chunk.itemsize
+                    chunk.frombytes(data[position:position + size])
+                    if sys.byteorder != 'little':
+                        chunk.byteswap()
+                    position += size
+                yield block
+
+
+def load_columns(directory):
+    """כל העמודות הגולמיות מכל קבצי התיקייה, כ-dict של array (לכלים ולבדיקות - הדוח לא צריך אותן)"""
+    merged = {name: array(code) for name, code in COLUMNS}
+    for block in iter_blocks(directory):
+        for name, column in block.items():
+            merged[name].extend(column)
+    return merged
+
+
+def _per_question(item_counts):
+    """מונה לכל item -> מונה לכל שאלה (לולאה על הצירופים השונים בלבד)"""
+    totals = Counter()
+    for item, count in item_counts.items():
+        totals[item >> 8] += count
+    return totals
+
+
+def discrimination_groups(directory, counts):
+    """
+    (n, נכונות) לכל שאלה בקבוצה העליונה ובתחתונה, או None כשאין מספיק
+    משתמשים. הדירוג מהמונים; רק הספירה לפי קבוצה עוברת על הבלוקים הגולמיים
+    """
+    user_answers, user_right = counts['user_answers'], counts['user_right']
+    ranked = sorted((user_right[user] / count, user)
+                    for user, count in user_answers.items() if count >= MIN_USER_ANSWERS)
+    group_size = int(len(ranked) * GROUP_FRACTION)
+    if not group_size:
+        return None
+
+    members = [frozenset(user for _, user in group).__contains__
+               for group in (ranked[-group_size:], ranked[:group_size])]
+    groups = [(Counter(), Counter()) for _ in members]
+    for block in iter_blocks(directory):
+        items, users, correct = block['item'], block['user'], block['correct']
+        for member, (answered, right) in zip(members, groups):
+            selector = list(map(member, users))
+            answered.update(compress(items, selector))
+            right.update(compress(items, map(operator.and_, selector, correct)))
+    return [(_per_question(answered), _per_question(right)) for answered, right in groups]
+
+
+def item_report(counts, groups=None):
+    """קושי, הבחנה (groups מ-discrimination_groups) ופופולריות תשובות לכל שאלה, ממוין לפי id"""
+    item_answers = counts['item_answers']
+    answers = _per_question(item_answers)
+    right = _per_question(counts['item_right'])
+    options = {}
+    for item, count in sorted(item_answers.items()):
+        question_id, choice = decode_item(item)
+        options.setdefault(question_id, {})[choice] = count
+
+    report = []
+    for question_id in sorted(answers):
+        discrimination = None
+        if groups:
+            (upper_n, upper_right), (lower_n, lower_right) = groups
+            if upper_n[question_id] and lower_n[question_id]:
+                discrimination = round(upper_right[question_id] / upper_n[question_id]
+                                       - lower_right[question_id] / lower_n[question_id], 4)
+        report.append({
+            'id': question_id,
+            'answers': answers[question_id],
+            'difficulty': round(right[question_id] / answers[question_id], 4),
+            'discrimination': discrimination,
+            'options': dict(sorted(options[question_id].items())),
+        })
+    return report
+
+
+def _option_shares(options, total):
+    return ' '.join(f'{"?" if choice < 0 else choice}:{count / total:.0%}'
+                    for choice, count in options.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='סטטיסטיקת תשובות לכל שאלה')
+    sub = parser.add_subparsers(dest='command', required=True)
+    report_parser = sub.add_parser('report', help='קושי, הבחנה ופופולריות תשובות')
+    report_parser.add_argument('directory', help='ANSWER_STATS_DIR')
+    report_parser.add_argument('--bank', help='questions.json / .qbank - להצגת נוסח השאלה')
+    report_parser.add_argument('--json', action='store_true', help='פלט JSON במקום טבלה')
+    report_parser.add_argument('--no-discrimination', action='store_true',
+                               help='בלי מדד ההבחנה - בלי מעבר על התשובות הגולמיות')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = load_counts(args.directory)
+    loaded = time.perf_counter()
+    groups = None if args.no_discrimination else discrimination_groups(args.directory, counts)
+    grouped = time.perf_counter()
+    report = item_report(counts, groups)
+    finished = time.perf_counter()
+
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        bank = None
+        if args.bank:
+            from question_bank import load_bank
+            bank = load_bank(args.bank)
+        print(f"{'id':>6} {'answers':>9} {'p':>6} {'D':>6}  options")
+        for row in report:
+            discrimination = '-' if row['discrimination'] is None else f"{row['discrimination']:.2f}"
+            line = (f"{row['id']:>6} {row['answers']:>9} {row['difficulty']:>6.2f} {discrimination:>6}  "
+                    f"{_option_shares(row['options'], row['answers'])}")
+            question = bank.find(row['id']) if bank is not None else None
+            if question:
+                line += f"  {question['question'][:40]}"
+            print(line)
+
+    print(f'✓ {sum(counts["item_answers"].values())} תשובות, {len(report)} שאלות '
+          f'(מונים {loaded - started:.2f}s, הבחנה {grouped - loaded:.2f}s, '
+          f'חישוב {finished - grouped:.2f}s)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
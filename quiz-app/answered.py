@@ -0,0 +1,130 @@
+"""
+ייצוג קומפקטי של השאלות שמשתמש כבר ענה עליהן.
+
+במקום רשימה של ids שגדלה עם כל תשובה, נשמרת מפת ביטים לפי id
+השאלה (ביט אחד לכל שאלה במאגר). הקידוד ל-session הוא הקצר מבין מפת
+הביטים עצמה ורשימת ההפרשים בין ids עוקבים ב-varint (קצרה יותר כשהמפה
+דלילה), ב-base64; itsdangerous דוחס את המטען ב-zlib כך שמפות מלאות
+כמעט יוצאות קצרות מאוד. מפה שגם כך גדולה מדי ל-cookie נשמרת בצד השרת
+(ראו load_answered / save_answered ב-app.py).
+בדיקת שייכות והוספה הן O(1).
+"""
+
+import base64
+
+SESSION_KEY = 'answered'
+LEGACY_SESSION_KEY = 'answered_questions'
+# קידוד ברשימת הפרשים מתחיל בתו הזה (לא חלק מה-alphabet של base64 ל-URL)
+DELTAS_PREFIX = '.'
+
+
+def _encode_deltas(ids):
+    data = bytearray()
+    previous = -1
+    for question_id in ids:
+        delta = question_id - previous
+        previous = question_id
+        while delta >= 0x80:
+            data.append(delta & 0x7f | 0x80)
+            delta >>= 7
+        data.append(delta)
+    return bytes(data)
+
+
+def _decode_deltas(data):
+    ids = []
+    previous, delta, shift = -1, 0, 0
+    for byte in data:
+        delta |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            previous += delta
+            ids.append(previous)
+            delta, shift = 0, 0
+    return ids
+
+
+class AnsweredSet:
+    """מפת ביטים של ids שנענו - ids הם מספרים שלמים אי-שליליים"""
+
+    def __init__(self, data=b''):
+        self._bits = bytearray(data)
+        self._count = int.from_bytes(self._bits, 'little').bit_count()
+
+    def __contains__(self, question_id):
+        if type(question_id) is not int or question_id < 0:
+            return False
+        index = question_id >> 3
+        return index < len(self._bits) and bool(self._bits[index] & (1 << (question_id & 7)))
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for index, byte in enumerate(self._bits):
+            while byte:
+                low = byte & -byte
+                yield (index << 3) + low.bit_length() - 1
+                byte ^= low
+
+    def bitmap(self):
+        """המפה כמספר שלם (ביט לכל id) - לחיתוך עם מפות של question_index"""
+        return int.from_bytes(self._bits, 'little')
+
+    @classmethod
+    def from_bitmap(cls, bitmap):
+        return cls(bitmap.to_bytes((bitmap.bit_length() + 7) >> 3, 'little'))
+
+    def add(self, question_id):
+        """מסמן שאלה כנענתה. מחזיר False אם כבר הייתה מסומנת"""
+        if type(question_id) is not int or question_id < 0:
+            raise ValueError(f'question id must be a non-negative int: {question_id!r}')
+        if question_id in self:
+            return False
+        index = question_id >> 3
+        if index >= len(self._bits):
+            self._bits.extend(bytes(index + 1 - len(self._bits)))
+        self._bits[index] |= 1 << (question_id & 7)
+        self._count += 1
+        return True
+
+    def encode(self):
+        bitmap = bytes(self._bits).rstrip(b'\0')
+        deltas = _encode_deltas(self) if self._count < len(bitmap) else None
+        if deltas is not None and len(deltas) < len(bitmap):
+            return DELTAS_PREFIX + base64.urlsafe_b64encode(deltas).decode('ascii')
+        return base64.urlsafe_b64encode(bitmap).decode('ascii')
+
+    @classmethod
+    def decode(cls, value):
+        if not value:
+            return cls()
+        try:
+            if value.startswith(DELTAS_PREFIX):
+                answered = cls()
+                for question_id in _decode_deltas(base64.urlsafe_b64decode(value[1:].encode('ascii'))):
+                    answered.add(question_id)
+                return answered
+            return cls(base64.urlsafe_b64decode(value.encode('ascii')))
+        except (ValueError, AttributeError):
+            return cls()
+
+    @classmethod
+    def from_session(cls, session, key=SESSION_KEY):
+        """
+        קריאה מה-session, כולל המרה של רשימת ids מהפורמט הישן. key שונה
+        לכל מאגר שאלות (ids חוזרים בין מאגרים)
+        """
+        if key in session:
+            return cls.decode(session[key])
+        answered = cls()
+        if key == SESSION_KEY:
+            for question_id in session.get(LEGACY_SESSION_KEY, []):
+                if type(question_id) is int and question_id >= 0:
+                    answered.add(question_id)
+        return answered
+
+    def save(self, session, key=SESSION_KEY):
+        session[key] = self.encode()
+        if key == SESSION_KEY:
+            session.pop(LEGACY_SESSION_KEY, None)
@@ -1,9 +1,29 @@
-from flask import Flask, render_template, jsonify, request, redirect, session
+from flask import Flask, render_template, jsonify, request, redirect, session, abort
 from flask.sessions import SecureCookieSessionInterface
-import json
-import random
-import requests
+import atexit
 import os
+import random
+import secrets
+import sys
+import threading
+from datetime import timedelta
+
+# session_store.py משותף לשני השירותים (common/) - בתמונה הוא מועתק לצד app.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+from session_store import ServerSideSessionInterface, check_login, create_revocation_list, create_store
+from question_bank import QuestionBankLoader
+from bank_catalog import BankCatalog, BankNotFound, BankUnavailable
+from selection import Excluding, pick_many, pick_unanswered
+from adaptive import difficulty_index, pick_adaptive, target_difficulty, update_ability
+from question_index import BankSubset, QuestionFilter, question_index
+from search_index import SearchIndexNotReady, search_index
+from answered import SESSION_KEY as ANSWERED_KEY, AnsweredSet
+from auth_cache import VerificationCache
+from response_cache import CachedBody, QuestionResponseCache
+from auth_client import AuthServiceClient, AuthServiceUnavailable
+from progress_store import ProgressStore
+from leaderboard import Leaderboard
+from answer_stats import AnswerStats
 
 app = Flask(__name__)
 # שימוש באותו secret key כמו ב-auth-service כדי לשתף sessions
@@ -12,6 +32,7 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SECURE'] = False
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SESSION_COOKIE_PATH'] = '/'
+app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=30)
 
 # Custom session interface that doesn't set domain
 class NoDomainSessionInterface(SecureCookieSessionInterface):
@@ -50,63 +71,391 @@ class NoDomainSessionInterface(SecureCookieSessionInterface):
             domain=None  # Explicitly set to None to disable domain attribute
         )
 
-app.session_interface = NoDomainSessionInterface()
+# SESSION_BACKEND=cookie (ברירת מחדל) שומר את כל ה-session ב-cookie חתום;
+# memory/sqlite/redis שומרים אותו בצד השרת וב-cookie נשאר רק מזהה
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cookie')
+if SESSION_BACKEND == 'cookie':
+    app.session_interface = NoDomainSessionInterface()
+else:
+    app.session_interface = ServerSideSessionInterface(create_store(SESSION_BACKEND))
+
+AUTH_SERVICE_URL = os.getenv('AUTH_SERVICE_URL', 'http://auth-service:5001')
+
+# חיבורי keep-alive ל-auth-service עם circuit breaker
+auth_client = AuthServiceClient(
+    AUTH_SERVICE_URL,
+    pool_size=int(os.getenv('AUTH_POOL_SIZE', '10')),
+    connect_timeout=float(os.getenv('AUTH_CONNECT_TIMEOUT', '0.5')),
+    read_timeout=float(os.getenv('AUTH_READ_TIMEOUT', '2')),
+    failure_threshold=int(os.getenv('AUTH_BREAKER_FAILURES', '5')),
+    reset_timeout=float(os.getenv('AUTH_BREAKER_RESET', '10'))
+)
+# כש-auth-service לא זמין: local - בדיקה מקומית של ה-session (check_login), deny - דחייה
+AUTH_UNAVAILABLE_POLICY = os.getenv('AUTH_UNAVAILABLE_POLICY', 'local')
+
+# local - אימות ה-session כאן (חתימה/store משותף, תוקף וביטול) ללא קריאה ל-auth-service
+# remote - קריאה ל-/verify של auth-service בכל בקשה (ההתנהגות הקודמת)
+AUTH_VERIFY_MODE = os.getenv('AUTH_VERIFY_MODE', 'local')
+# במצב local: פנייה ל-/verify רק כשהבדיקה המקומית נכשלת
+AUTH_REMOTE_FALLBACK = os.getenv('AUTH_REMOTE_FALLBACK', 'false').lower() in ('1', 'true', 'yes')
+AUTH_MAX_SESSION_AGE = int(os.getenv('AUTH_MAX_SESSION_AGE', '43200'))
+revocations = create_revocation_list()
+
+# מטמון לתוצאות /verify - מונע קריאה חוזרת על אותו cookie תוך שניות
+verification_cache = VerificationCache(
+    max_entries=int(os.getenv('AUTH_CACHE_MAX_ENTRIES', '10000')),
+    positive_ttl=float(os.getenv('AUTH_CACHE_POSITIVE_TTL', '5')),
+    negative_ttl=float(os.getenv('AUTH_CACHE_NEGATIVE_TTL', '1'))
+)
+
+# questions.json לפיתוח; בייצור הגרסה המהודרת questions.qbank (packed_bank.py)
+QUESTIONS_FILE = os.getenv('QUESTIONS_FILE', 'questions.json')
+
+# המאגר נטען פעם אחת בעליית התהליך ומתעדכן רק כשהקובץ משתנה.
+# גרסה קודמת נשארת בזיכרון עד תקרת הזמן, או עד שה-sessions שנספרו עליה עברו
+QUESTIONS_VERSION_RETAIN_SECONDS = float(os.getenv('QUESTIONS_VERSION_RETAIN_SECONDS', '600'))
+question_bank = QuestionBankLoader(
+    QUESTIONS_FILE,
+    check_interval=float(os.getenv('QUESTIONS_RELOAD_INTERVAL', '1.0')),
+    retain_seconds=QUESTIONS_VERSION_RETAIN_SECONDS
+)
+question_bank.get()
+
+# מאגרים נוספים לפי שם (כיתה / לקוח): QUESTION_BANKS_DIR/<שם>.qbank או .json,
+# נבחרים לפי הנתיב (/quiz/<שם>, /api/banks/<שם>/...) ונשמרים ב-session.
+# המאגר של QUESTIONS_FILE הוא מאגר ברירת המחדל - השם הפנימי שלו ''
+QUESTION_BANKS_DIR = os.getenv('QUESTION_BANKS_DIR', '')
+DEFAULT_BANK_NAME = os.getenv('DEFAULT_BANK_NAME', 'default')
+BANK_KEY = 'bank'
+bank_catalog = BankCatalog(
+    QUESTION_BANKS_DIR or None,
+    max_bytes=int(float(os.getenv('QUESTION_BANKS_MAX_MB', '512')) * 2 ** 20),
+    check_interval=float(os.getenv('QUESTIONS_RELOAD_INTERVAL', '1.0')),
+    pinned={'': question_bank},
+    retain_seconds=QUESTIONS_VERSION_RETAIN_SECONDS
+)
+# גרסת המאגר שה-session עובד מולה (hash התוכן, ראו question_bank.py)
+VERSION_KEY = 'bank_version'
+# ה-workers שספרו את ה-session על הגרסה - כל worker סופר בעצמו. המזהה אקראי
+# לכל תהליך: pid חוזר בין הפעלות של קונטיינר ובין שרתים, ו-worker שלא ספר את
+# ה-session אסור לו לשחרר את הגרסה
+VERSION_WORKERS_KEY = 'bank_version_workers'
+VERSION_WORKERS_MAX = 32
+WORKER_TOKEN = secrets.token_hex(8)
+
+def bank_name(sess):
+    return sess.get(BANK_KEY, '')
+
+def bank_key(sess, key):
+    """מפתח ב-session למצב של המאגר הנוכחי - ids חוזרים בין מאגרים"""
+    name = bank_name(sess)
+    return f'{key}:{name}' if name else key
+
+def count_session(sess, loader, version):
+    """רישום ה-session על version בתהליך הזה, פעם אחת לכל worker"""
+    workers_key = bank_key(sess, VERSION_WORKERS_KEY)
+    workers = sess.get(workers_key, [])
+    if WORKER_TOKEN not in workers:
+        loader.acquire(version)
+        # workers שכבר יצאו נשארים ברשימה - שומרים רק את האחרונים
+        sess[workers_key] = (workers + [WORKER_TOKEN])[-VERSION_WORKERS_MAX:]
+
+def release_sessions(sess):
+    """שחרור הגרסאות שה-session נספר עליהן בתהליך הזה (יציאה מהמערכת)"""
+    for key, version in list(sess.items()):
+        base, _, name = key.partition(':')
+        if base != VERSION_KEY:
+            continue
+        workers_key = f'{VERSION_WORKERS_KEY}:{name}' if name else VERSION_WORKERS_KEY
+        loader = bank_catalog.loaded(name)
+        if loader is not None and WORKER_TOKEN in sess.get(workers_key, []):
+            loader.release(version)
+
+def current_bank(sess):
+    """
+    המאגר של ה-session (BankNotFound / BankUnavailable): הגרסה שממנה הוגשו
+    לו השאלות כל עוד היא בזיכרון, כך שתשובה נבדקת מול השאלה שהוצגה
+    """
+    loader = bank_catalog.loader(bank_name(sess))
+    bank = loader.get()
+    version = sess.get(bank_key(sess, VERSION_KEY))
+    if version is None:
+        return bank
+    if version == bank.version:
+        count_session(sess, loader, version)
+        return bank
+    pinned = loader.resident(version)
+    if pinned is None:
+        return bank
+    count_session(sess, loader, version)
+    return pinned
+
+def serving_bank(sess):
+    """
+    המאגר להגשת שאלות. ה-session עובר לגרסה החדשה רק כשאין לו שאלות
+    שמורות שטרם נענו; במעבר, שאלות שהשתנו או נמחקו יוצאות ממפת השאלות
+    שנענו (ה-id שלהן כבר לא אותה שאלה)
+    """
+    loader = bank_catalog.loader(bank_name(sess))
+    bank = loader.get()
+    version_key = bank_key(sess, VERSION_KEY)
+    version = sess.get(version_key)
+    if version == bank.version:
+        count_session(sess, loader, version)
+        return bank
+    
+    reserved_key = bank_key(sess, RESERVED_KEY)
+    workers_key = bank_key(sess, VERSION_WORKERS_KEY)
+    if version is not None:
+        pinned = loader.resident(version)
+        if pinned is not None and sess.get(reserved_key):
+            count_session(sess, loader, version)
+            return pinned
+        # גרסה שכבר לא בזיכרון (תהליך אחר / הפעלה מחדש) - המפה נשארת כמו שהיא
+        changed = loader.changed_since(version)
+        if changed:
+            answered = load_answered(sess)
+            save_answered(sess, AnsweredSet.from_bitmap(answered.bitmap() & ~changed))
+        sess.pop(reserved_key, None)
+        if WORKER_TOKEN in sess.get(workers_key, []):
+            loader.release(version)
+    loader.acquire(bank.version)
+    sess[version_key] = bank.version
+    sess[workers_key] = [WORKER_TOKEN]
+    return bank
+
+def use_bank(sess, name):
+    """בחירת מאגר לפי הנתיב; נשמרת ב-session גם לבקשות הבאות"""
+    if name is None:
+        return
+    if name == DEFAULT_BANK_NAME:
+        name = ''
+    bank_catalog.get(name)
+    if bank_name(sess) != name:
+        if name:
+            sess[BANK_KEY] = name
+        else:
+            sess.pop(BANK_KEY, None)
+
+@app.errorhandler(BankNotFound)
+def bank_not_found(e):
+    return jsonify({'error': 'מאגר השאלות לא נמצא'}), 404
+
+@app.errorhandler(BankUnavailable)
+def bank_unavailable(e):
+    return jsonify({'error': 'מאגר השאלות לא זמין כרגע'}), 503
+
+# התקדמות קבועה לכל משתמש (PROGRESS_DB_PATH ריק = כבוי, המצב נשמר רק ב-session)
+PROGRESS_DB_PATH = os.getenv('PROGRESS_DB_PATH', '')
+progress_store = None
+if PROGRESS_DB_PATH:
+    progress_store = ProgressStore(
+        PROGRESS_DB_PATH,
+        flush_interval=float(os.getenv('PROGRESS_FLUSH_MS', '50')) / 1000
+    )
+    # כתיבת מה שנשאר בחוצץ כשה-worker יוצא
+    atexit.register(progress_store.close)
+
+# סטטיסטיקה לכל שאלה מכל התשובות (ANSWER_STATS_DIR ריק = כבוי); דוח: python3 answer_stats.py report DIR
+ANSWER_STATS_DIR = os.getenv('ANSWER_STATS_DIR', '')
+answer_stats = None
+if ANSWER_STATS_DIR:
+    answer_stats = AnswerStats(
+        ANSWER_STATS_DIR,
+        flush_interval=float(os.getenv('ANSWER_STATS_FLUSH_SECONDS', '10'))
+    )
+    atexit.register(answer_stats.close)
 
-AUTH_SERVICE_URL = 'http://auth-service:5001'
-QUESTIONS_FILE = 'questions.json'
+bank_answer_stats = {}
+bank_answer_stats_lock = threading.Lock()
 
-def load_questions():
-    with open(QUESTIONS_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return data['questions']
+def answer_stats_for(name):
+    """סטטיסטיקת מאגר: ANSWER_STATS_DIR, ולכל מאגר מהקטלוג תת-תיקייה banks/<שם>"""
+    if answer_stats is None or not name:
+        return answer_stats
+    with bank_answer_stats_lock:
+        stats = bank_answer_stats.get(name)
+        if stats is None:
+            stats = bank_answer_stats[name] = AnswerStats(
+                os.path.join(ANSWER_STATS_DIR, 'banks', name),
+                flush_interval=answer_stats.flush_interval
+            )
+            atexit.register(stats.close)
+    return stats
+
+# טבלת המובילים - מתעדכנת מכל תשובה, ומסתנכרנת מ-workers אחרים דרך מאגר ההתקדמות
+LEADERBOARD_SNAPSHOT_PATH = os.getenv('LEADERBOARD_SNAPSHOT_PATH', '')
+LEADERBOARD_MAX_LIMIT = int(os.getenv('LEADERBOARD_MAX_LIMIT', '100'))
+leaderboard = Leaderboard()
+leaderboard_synced_at = 0.0
+
+def progress_updates():
+    """ניקודים שנכתבו למאגר ההתקדמות מאז הסנכרון הקודם (גם ע"י workers אחרים)"""
+    global leaderboard_synced_at
+    updates, leaderboard_synced_at = progress_store.updated_since(leaderboard_synced_at)
+    return updates
+
+if LEADERBOARD_SNAPSHOT_PATH and os.path.exists(LEADERBOARD_SNAPSHOT_PATH):
+    try:
+        leaderboard.load(LEADERBOARD_SNAPSHOT_PATH)
+    except (OSError, ValueError, KeyError):
+        # snapshot פגום לא מונע מה-worker לעלות - הטבלה נבנית מחדש ממאגר ההתקדמות
+        app.logger.exception('טעינת טבלת המובילים מ-%s נכשלה', LEADERBOARD_SNAPSHOT_PATH)
+        leaderboard = Leaderboard()
+        if progress_store is not None:
+            for username, score in progress_updates():
+                leaderboard.update(username, score)
+
+if LEADERBOARD_SNAPSHOT_PATH or progress_store is not None:
+    leaderboard.run_background(
+        LEADERBOARD_SNAPSHOT_PATH or None,
+        interval=float(os.getenv('LEADERBOARD_SYNC_SECONDS', '5')),
+        sync=progress_updates if progress_store is not None else None
+    )
+if LEADERBOARD_SNAPSHOT_PATH:
+    atexit.register(leaderboard.snapshot, LEADERBOARD_SNAPSHOT_PATH)
 
 def verify_authentication():
-    """בדיקת אימות מול שירות ההתחברות"""
+    """בדיקת אימות - מקומית או מול שירות ההתחברות לפי AUTH_VERIFY_MODE"""
+    if AUTH_VERIFY_MODE == 'local':
+        if check_login(session, revocations, AUTH_MAX_SESSION_AGE):
+            return True
+        return AUTH_REMOTE_FALLBACK and verify_remotely()
+    return verify_remotely()
+
+def session_cache_key(cookies):
+    cookie = cookies.get(app.session_interface.get_cookie_name(app))
+    return VerificationCache.key_for(cookie) if cookie else None
+
+def cached_verification(sess, cache_key):
+    """
+    תוצאת /verify מהמטמון, או None. True נבדק שוב מול ה-session ורשימת
+    הביטולים המשותפים - יציאה שטופלה ב-worker או בשירות אחר לא מנקה את
+    המטמון של ה-worker הזה
+    """
+    cached = verification_cache.get(cache_key)
+    if cached and not check_login(sess, revocations):
+        verification_cache.invalidate(cache_key)
+        return None
+    return cached
+
+def auth_unavailable_fallback(sess, error, client=auth_client):
+    """החלטה כש-auth-service לא זמין, לפי AUTH_UNAVAILABLE_POLICY (לא נשמרת במטמון)"""
+    allowed = (AUTH_UNAVAILABLE_POLICY == 'local'
+               and check_login(sess, revocations, AUTH_MAX_SESSION_AGE))
+    client.record_fallback(allowed)
+    app.logger.warning('auth-service לא זמין (%s), fallback=%s allowed=%s',
+                       error, AUTH_UNAVAILABLE_POLICY, allowed)
+    return allowed
+
+def verify_remotely():
+    """בדיקת אימות מול שירות ההתחברות, דרך מטמון התוצאות"""
+    cache_key = session_cache_key(request.cookies)
+    if cache_key is None:
+        # אין cookie - אין מה לאמת
+        return False
+
+    cached = cached_verification(session, cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        # בסביבת Docker, נשתמש בשם השירות
-        # בסביבת פיתוח מקומית, אפשר לשנות ל-localhost
-        response = requests.get(
-            f'{AUTH_SERVICE_URL}/verify',
-            cookies=request.cookies,
-            timeout=5
-        )
-        return response.status_code == 200
-    except:
-        # אם שירות האימות לא זמין, נבדוק session מקומי
-        return 'username' in session
+        authenticated = auth_client.verify(request.headers.get('Cookie', ''))
+    except AuthServiceUnavailable as e:
+        return auth_unavailable_fallback(session, e)
+
+    verification_cache.put(cache_key, authenticated)
+    return authenticated
 
 @app.route('/')
 def index():
     return redirect('/quiz')
 
 @app.route('/quiz')
-def quiz_page():
+@app.route('/quiz/<bank>')
+def quiz_page(bank=None):
     if not verify_authentication():
         return redirect('http://localhost/login')
     
-    if 'score' not in session:
-        session['score'] = 0
-        session['answered_questions'] = []
+    try:
+        use_bank(session, bank)
+    except BankNotFound:
+        abort(404)
+    restore_progress(session)
     
     return render_template('quiz.html')
 
-@app.route('/api/question', methods=['GET'])
-def get_question():
-    if not verify_authentication():
-        return jsonify({'error': 'לא מאומת', 'redirect': '/login'}), 401
-    
-    questions = load_questions()
-    answered = session.get('answered_questions', [])
-    
-    # סינון שאלות שכבר נענו
-    available_questions = [q for q in questions if q['id'] not in answered]
-    
-    if not available_questions:
-        return jsonify({'error': 'אין יותר שאלות זמינות'}), 404
-    
-    question = random.choice(available_questions)
+def restore_progress(sess):
+    """
+    session חדש מתחיל מההתקדמות השמורה של המשתמש (או מאפס), ומאגר
+    שעוד לא שוחק ב-session הזה - מהשאלות שנענו בו בעבר
+    """
+    key = bank_key(sess, ANSWERED_KEY)
+    # במאגר ברירת המחדל המצב ב-session גם בפורמט הישן (AnsweredSet.from_session ממיר)
+    if 'score' in sess and (key in sess or not bank_name(sess)):
+        return
+    if progress_store is not None and 'username' in sess:
+        score, answered = progress_store.load(sess['username'], bank_name(sess))
+    else:
+        score, answered = 0, AnsweredSet()
+    sess.setdefault('score', score)
+    save_answered(sess, answered)
+
+# cookie מוגבל ל-4KB בדפדפן: מפת שאלות שנענו שהקידוד שלה ארוך מ-ANSWERED_MAX_BYTES
+# נקראת ממאגר ההתקדמות, וב-session נשארות רק התשובות האחרונות (שאולי טרם נכתבו
+# למסד מ-worker אחר). 0 - בלי תקרה (ברירת המחדל ב-session בצד השרת)
+ANSWERED_MAX_BYTES = int(os.getenv('ANSWERED_MAX_BYTES', '2048' if SESSION_BACKEND == 'cookie' else '0'))
+ANSWERED_RECENT_MAX = int(os.getenv('ANSWERED_RECENT_MAX', '256'))
+RECENT_KEY = 'answered_recent'
+
+def load_answered(sess):
+    """מפת השאלות שנענו במאגר של ה-session"""
+    recent = sess.get(bank_key(sess, RECENT_KEY))
+    if recent is None:
+        return AnsweredSet.from_session(sess, bank_key(sess, ANSWERED_KEY))
+    if progress_store is not None and 'username' in sess:
+        answered = progress_store.answered(sess['username'], bank_name(sess))
+    else:
+        answered = AnsweredSet()
+    for question_id in recent:
+        answered.add(question_id)
+    return answered
+
+def save_answered(sess, answered, added=()):
+    """שמירת המפה ב-session; added - ids שנוספו בבקשה הזו"""
+    key = bank_key(sess, ANSWERED_KEY)
+    recent_key = bank_key(sess, RECENT_KEY)
+    if not ANSWERED_MAX_BYTES or len(answered.encode()) <= ANSWERED_MAX_BYTES:
+        answered.save(sess, key)
+        sess.pop(recent_key, None)
+        return
     
-    # הסרת התשובה הנכונה מהנתונים שנשלחים ללקוח
+    if progress_store is None and recent_key not in sess:
+        # בלי מאגר התקדמות שאלות ישנות עלולות לחזור
+        app.logger.warning('מפת השאלות שנענו גדולה מ-%d בתים - נשמרות רק %d התשובות האחרונות',
+                           ANSWERED_MAX_BYTES, ANSWERED_RECENT_MAX)
+    added = set(added)
+    recent = [i for i in sess.get(recent_key, ()) if i in answered and i not in added] + sorted(added)
+    sess[recent_key] = recent[-ANSWERED_RECENT_MAX:]
+    AnsweredSet().save(sess, key)
+
+def record_progress(sess, results):
+    """
+    רישום תוצאות [(question_id, answer, correct)] למאגר הקבוע ולסטטיסטיקת
+    השאלות (לחוצצים בלבד) ולטבלת המובילים
+    """
+    if not results or 'username' not in sess:
+        return
+    if progress_store is not None:
+        progress_store.record_many(sess['username'], [(qid, correct) for qid, _, correct in results],
+                                   bank_name(sess))
+    stats = answer_stats_for(bank_name(sess))
+    if stats is not None:
+        stats.record_many(sess['username'], results)
+    leaderboard.update(sess['username'], sess['score'])
+
+def public_question(question):
+    """הנתונים שנשלחים ללקוח עבור שאלה"""
     question_data = {
         'id': question['id'],
         'type': question['type'],
@@ -114,64 +463,406 @@ def get_question():
         'explanation': question.get('explanation', '')
     }
     
+    for field in ('topic', 'tags'):
+        if field in question:
+            question_data[field] = question[field]
+    
     if question['type'] == 'multiple_choice':
         question_data['options'] = question['options']
         question_data['correct_answer'] = question['correct_answer']
     else:
         question_data['correct_answer'] = question['correct_answer']
     
-    return jsonify(question_data)
+    return question_data
 
-@app.route('/api/answer', methods=['POST'])
-def check_answer():
-    if not verify_authentication():
-        return jsonify({'error': 'לא מאומת', 'redirect': '/login'}), 401
+# גוף התשובה לכל שאלה נבנה פעם אחת לכל גרסת מאגר (אותו פלט כמו jsonify)
+question_responses = QuestionResponseCache(
+    public_question,
+    lambda payload: app.json.response(payload).get_data()
+)
+
+# שאלות ששמורות למשתמש (נשלחו ב-prefetch וטרם נענו) - רשימת ids ב-session
+RESERVED_KEY = 'reserved'
+PREFETCH_MAX = int(os.getenv('QUESTIONS_PREFETCH_MAX', '10'))
+
+def reserved_questions(sess, answered):
+    reserved = sess.get(bank_key(sess, RESERVED_KEY), ())
+    return [question_id for question_id in reserved if question_id not in answered]
+
+# random - הגרלה אחידה; adaptive - שאלה בקושי שמתאים ליכולת המשתמש (adaptive.py)
+QUESTION_SELECTION = os.getenv('QUESTION_SELECTION', 'random')
+ADAPTIVE_K = float(os.getenv('ADAPTIVE_K', '0.4'))
+ADAPTIVE_TARGET_P = float(os.getenv('ADAPTIVE_TARGET_P', '0.5'))
+
+if QUESTION_SELECTION == 'adaptive':
+    # בניית אינדקס הקושי מראש, לא בבקשה הראשונה (אחרי טעינה מחדש - בבקשה הראשונה)
+    difficulty_index(question_bank.get())
+
+def question_picker(sess):
+    """פונקציית הבחירה pick(bank, answered, rng) לפי QUESTION_SELECTION"""
+    if QUESTION_SELECTION != 'adaptive':
+        return pick_unanswered
+    target = target_difficulty(sess.get('ability', 0.0), ADAPTIVE_TARGET_P)
+    return lambda bank, answered, rng=random: pick_adaptive(bank, answered, rng, target)
+
+def record_ability(sess, question, is_correct):
+    """עדכון היכולת המשוערת של המשתמש (נשמרת ב-session) אחרי תשובה"""
+    sess['ability'] = update_ability(sess.get('ability', 0.0), question.get('difficulty', 0.0),
+                                     is_correct, ADAPTIVE_K)
+
+def question_pool(bank, args):
+    """
+    המאגר שממנו בוחרים: כולו, או תת-המאגר לפי tags / topic / difficulty
+    ב-args (question_index.py). ValueError על סינון לא תקין.
+    """
+    question_filter = QuestionFilter.from_args(args) if args else None
+    if question_filter is None:
+        return bank
+    return question_index(bank).subset(bank, question_filter)
+
+def in_pool(pool, question_id):
+    return not isinstance(pool, BankSubset) or question_id in pool
+
+def next_question(sess, args=None):
+    """הגרלת השאלה הבאה למשתמש. מחזיר (body, status) - משותף ל-Flask ול-asgi.py"""
+    restore_progress(sess)
+    bank = serving_bank(sess)
+    try:
+        pool = question_pool(bank, args)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    answered = load_answered(sess)
+    if isinstance(pool, BankSubset) and not pool.bitmap & ~answered.bitmap():
+        # כל השאלות בסינון כבר נענו - חיתוך מפות ביטים, בלי לחפש
+        return {'error': 'אין יותר שאלות זמינות'}, 404
+    reserved = [i for i in reserved_questions(sess, answered) if in_pool(pool, i)]
+    
+    # הגרלת שאלה שטרם נענתה ולא שמורה כבר, בלי לבנות את רשימת השאלות הזמינות
+    question = question_picker(sess)(pool, Excluding(answered, set(reserved)))
+    if question is None and reserved:
+        question = bank.find(reserved[0])
+    
+    if question is None:
+        return {'error': 'אין יותר שאלות זמינות'}, 404
+    
+    return question_responses.get(bank, question), 200
+
+def next_questions(sess, count, args=None):
+    """
+    עד count השאלות הבאות בתשובה אחת. השאלות נשמרות ב-session כדי שלא
+    יוגשו שוב; שאלות ששמורות מבקשה קודמת וטרם נענו חוזרות ראשונות
+    (למשל אחרי רענון הדף), והלקוח מסנן את מה שכבר מחזיק.
+    """
+    restore_progress(sess)
+    bank = serving_bank(sess)
+    try:
+        count = min(max(int(count), 1), PREFETCH_MAX)
+    except (TypeError, ValueError):
+        return {'error': 'בקשה לא תקינה'}, 400
+    try:
+        pool = question_pool(bank, args)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    answered = load_answered(sess)
+    reserved = [i for i in reserved_questions(sess, answered) if in_pool(pool, i)]
+    questions = [q for q in map(bank.find, reserved[:count]) if q is not None]
+    questions += pick_many(pool, Excluding(answered, {q['id'] for q in questions}), count - len(questions),
+                           pick=question_picker(sess))
+    
+    if not questions:
+        return {'error': 'אין יותר שאלות זמינות'}, 404
+    
+    sess[bank_key(sess, RESERVED_KEY)] = [q['id'] for q in questions]
+    # גופי השאלות מהמטמון משורשרים כמו שהם, בלי serialization נוסף
+    bodies = b','.join(question_responses.get(bank, q).data.rstrip(b'\n') for q in questions)
+    return CachedBody(b'{"questions":[' + bodies + b']}\n'), 200
+
+def grade_answer(sess, data):
+    """בדיקת תשובה ועדכון הניקוד ב-session. מחזיר (body, status)"""
+    restore_progress(sess)
+    if not isinstance(data, dict):
+        return {'error': 'בקשה לא תקינה'}, 400
     
-    data = request.get_json()
     question_id = data.get('question_id')
     user_answer = data.get('answer')
     
-    questions = load_questions()
-    question = next((q for q in questions if q['id'] == question_id), None)
+    question = current_bank(sess).find(question_id)
     
     if not question:
-        return jsonify({'error': 'שאלה לא נמצאה'}), 404
+        return {'error': 'שאלה לא נמצאה'}, 404
     
     is_correct = user_answer == question['correct_answer']
     
-    # עדכון ניקוד
-    if 'score' not in session:
-        session['score'] = 0
-    
-    if 'answered_questions' not in session:
-        session['answered_questions'] = []
+    answered = load_answered(sess)
+    if question['id'] in answered:
+        # שאלה שכבר נענתה - מחזירים את התוצאה בלי ניקוד ובלי רישום נוסף
+        return {
+            'correct': is_correct,
+            'score': sess['score'],
+            'explanation': question.get('explanation', ''),
+            'already_answered': True
+        }, 200
     
+    # עדכון ניקוד
     if is_correct:
-        session['score'] += 1
+        sess['score'] += 1
+    record_ability(sess, question, is_correct)
     
-    session['answered_questions'].append(question_id)
-    session.modified = True
+    answered.add(question['id'])
+    save_answered(sess, answered, [question['id']])
+    record_progress(sess, [(question['id'], user_answer, is_correct)])
     
-    return jsonify({
+    reserved_key = bank_key(sess, RESERVED_KEY)
+    if question['id'] in sess.get(reserved_key, ()):
+        sess[reserved_key] = [i for i in sess[reserved_key] if i != question['id']]
+    
+    return {
         'correct': is_correct,
-        'score': session['score'],
+        'score': sess['score'],
         'explanation': question.get('explanation', '')
-    })
+    }, 200
+
+ANSWERS_BATCH_MAX = int(os.getenv('ANSWERS_BATCH_MAX', '100'))
+
+def grade_answers(sess, data):
+    """
+    בדיקת רשימת תשובות במעבר אחד: {"answers": [{"question_id", "answer"}, ...]}.
+    הניקוד ומפת השאלות שנענו מתעדכנים פעם אחת בסוף (כתיבת session אחת).
+    מחזיר (body, status) עם תוצאה לכל פריט לפי הסדר.
+    """
+    restore_progress(sess)
+    items = data.get('answers') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return {'error': 'בקשה לא תקינה'}, 400
+    if len(items) > ANSWERS_BATCH_MAX:
+        return {'error': f'ניתן לשלוח עד {ANSWERS_BATCH_MAX} תשובות בבקשה'}, 400
+    
+    bank = current_bank(sess)
+    answered = load_answered(sess)
+    score = sess['score']
+    graded = set()
+    recorded = []
+    results = []
+    
+    for item in items:
+        if not isinstance(item, dict):
+            results.append({'error': 'בקשה לא תקינה'})
+            continue
+        
+        question_id = item.get('question_id')
+        question = bank.find(question_id)
+        if not question:
+            results.append({'question_id': question_id, 'error': 'שאלה לא נמצאה'})
+            continue
+        if question['id'] in graded:
+            results.append({'question_id': question_id, 'error': 'תשובה כפולה לאותה שאלה'})
+            continue
+        if question['id'] in answered:
+            results.append({'question_id': question_id, 'error': 'השאלה כבר נענתה'})
+            continue
+        
+        user_answer = item.get('answer')
+        is_correct = user_answer == question['correct_answer']
+        if is_correct:
+            score += 1
+        record_ability(sess, question, is_correct)
+        graded.add(question['id'])
+        answered.add(question['id'])
+        recorded.append((question['id'], user_answer, is_correct))
+        results.append({
+            'question_id': question['id'],
+            'correct': is_correct,
+            'explanation': question.get('explanation', '')
+        })
+    
+    if graded:
+        sess['score'] = score
+        save_answered(sess, answered, graded)
+        reserved_key = bank_key(sess, RESERVED_KEY)
+        if graded.intersection(sess.get(reserved_key, ())):
+            sess[reserved_key] = [i for i in sess[reserved_key] if i not in graded]
+        record_progress(sess, recorded)
+    
+    return {
+        'results': results,
+        'score': score,
+        'answered': len(answered)
+    }, 200
+
+def score_summary(sess):
+    restore_progress(sess)
+    return {
+        'score': sess.get('score', 0),
+        'answered': len(load_answered(sess))
+    }, 200
+
+def leaderboard_view(sess, limit):
+    """top-K ומקום המשתמש הנוכחי. מחזיר (body, status)"""
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return {'error': 'בקשה לא תקינה'}, 400
+    if not 1 <= limit <= LEADERBOARD_MAX_LIMIT:
+        return {'error': f'ניתן לבקש בין 1 ל-{LEADERBOARD_MAX_LIMIT} מקומות'}, 400
+    
+    return {
+        'top': leaderboard.top(limit),
+        'me': leaderboard.rank_of(sess['username']) if 'username' in sess else None,
+        'players': len(leaderboard)
+    }, 200
+
+SEARCH_MAX_LIMIT = int(os.getenv('SEARCH_MAX_LIMIT', '50'))
+
+def search_questions(sess, query, limit):
+    """חיפוש טקסט במאגר של ה-session (search_index.py). מחזיר (body, status)"""
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return {'error': 'בקשה לא תקינה'}, 400
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        return {'error': f'ניתן לבקש בין 1 ל-{SEARCH_MAX_LIMIT} תוצאות'}, 400
+    if not query or not query.strip():
+        return {'error': 'חסרה שאילתת חיפוש'}, 400
+    
+    bank = current_bank(sess)
+    try:
+        # מאגר JSON שנטען זה עתה - האינדקס נבנה ברקע, לא בתוך הבקשה
+        hits = search_index(bank, wait=False).search(query, limit)
+    except SearchIndexNotReady:
+        return {'error': 'אינדקס החיפוש עדיין נבנה, נסו שוב בעוד רגע'}, 503
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    
+    results = []
+    for position, score in hits:
+        result = public_question(bank.at(position))
+        result['score'] = round(score, 4)
+        results.append(result)
+    return {'query': query, 'results': results}, 200
+
+def api_response(body, status, req):
+    """תשובת JSON; גוף מוכן מהמטמון נשלח כמו שהוא עם ETag (ו-304 כשהלקוח כבר מחזיק אותו)"""
+    if not isinstance(body, CachedBody):
+        response = app.json.response(body)
+        response.status_code = status
+        return response
+    
+    # השאלה משתנה בין בקשות - הלקוח (ו-nginx) שומרים עותק פרטי ומאמתים מחדש בכל פעם
+    headers = {'ETag': body.quoted_etag, 'Cache-Control': 'private, no-cache'}
+    if body.etag in req.if_none_match:
+        return app.response_class(status=304, headers=headers, mimetype='application/json')
+    return app.response_class(body.data, status=status, headers=headers, mimetype='application/json')
+
+@app.route('/api/question', methods=['GET'])
+@app.route('/api/banks/<bank>/question', methods=['GET'])
+def get_question(bank=None):
+    if not verify_authentication():
+        return jsonify({'error': 'לא מאומת', 'redirect': '/login'}), 401
+    
+    use_bank(session, bank)
+    body, status = next_question(session, request.args)
+    return api_response(body, status, request)
+
+@app.route('/api/questions/next', methods=['GET'])
+@app.route('/api/banks/<bank>/questions/next', methods=['GET'])
+def get_next_questions(bank=None):
+    if not verify_authentication():
+        return jsonify({'error': 'לא מאומת', 'redirect': '/login'}), 401
+    
+    use_bank(session, bank)
+    body, status = next_questions(session, request.args.get('count', '5'), request.args)
+    return api_response(body, status, request)
+
+@app.route('/api/answer', methods=['POST'])
+@app.route('/api/banks/<bank>/answer', methods=['POST'])
+def check_answer(bank=None):
+    if not verify_authentication():
+        return jsonify({'error': 'לא מאומת', 'redirect': '/login'}), 401
+    
+    use_bank(session, bank)
+    body, status = grade_answer(session, request.get_json())
+    return jsonify(body), status
+
+@app.route('/api/answers', methods=['POST'])
+@app.route('/api/banks/<bank>/answers', methods=['POST'])
+def check_answers(bank=None):
+    if not verify_authentication():
+        return jsonify({'error': 'לא מאומת', 'redirect': '/login'}), 401
+    
+    use_bank(session, bank)
+    body, status = grade_answers(session, request.get_json())
+    return jsonify(body), status
 
 @app.route('/api/score', methods=['GET'])
-def get_score():
+@app.route('/api/banks/<bank>/score', methods=['GET'])
+def get_score(bank=None):
+    if not verify_authentication():
+        return jsonify({'error': 'לא מאומת'}), 401
+    
+    use_bank(session, bank)
+    body, status = score_summary(session)
+    return jsonify(body), status
+
+@app.route('/api/leaderboard', methods=['GET'])
+@app.route('/api/banks/<bank>/leaderboard', methods=['GET'])
+def get_leaderboard(bank=None):
     if not verify_authentication():
         return jsonify({'error': 'לא מאומת'}), 401
     
+    use_bank(session, bank)
+    body, status = leaderboard_view(session, request.args.get('limit', '10'))
+    return jsonify(body), status
+
+@app.route('/api/search', methods=['GET'])
+@app.route('/api/banks/<bank>/search', methods=['GET'])
+def get_search(bank=None):
+    if not verify_authentication():
+        return jsonify({'error': 'לא מאומת'}), 401
+    
+    use_bank(session, bank)
+    body, status = search_questions(session, request.args.get('q', ''), request.args.get('limit', '10'))
+    return jsonify(body), status
+
+@app.route('/api/banks', methods=['GET'])
+def get_banks():
+    if not verify_authentication():
+        return jsonify({'error': 'לא מאומת'}), 401
+    
+    return jsonify({
+        'banks': [name or DEFAULT_BANK_NAME for name in bank_catalog.names()],
+        'current': bank_name(session) or DEFAULT_BANK_NAME
+    })
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    if not verify_authentication():
+        return jsonify({'error': 'לא מאומת'}), 401
+
     return jsonify({
-        'score': session.get('score', 0),
-        'answered': len(session.get('answered_questions', []))
+        'question_bank': question_bank.stats(),
+        'bank_catalog': bank_catalog.stats(),
+        'question_responses': question_responses.stats(),
+        'auth_cache': verification_cache.stats(),
+        'auth_client': auth_client.stats(),
+        'progress_store': progress_store.stats() if progress_store is not None else None,
+        'leaderboard': leaderboard.stats(),
+        'answer_stats': answer_stats.stats() if answer_stats is not None else None
     })
 
+# nginx מנתב את /logout לכאן (ולא ל-auth-service) - רק כאן ידועות גרסאות המאגר של ה-session
 @app.route('/logout', methods=['GET', 'POST'])
 def logout():
+    cache_key = session_cache_key(request.cookies)
+    if cache_key is not None:
+        verification_cache.invalidate(cache_key)
+    if revocations is not None and 'auth_id' in session:
+        revocations.revoke(session['auth_id'], AUTH_MAX_SESSION_AGE)
+    release_sessions(session)
     session.clear()
     return redirect('/login')
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5002, debug=True)
\ No newline at end of file
+    # שרת פיתוח בלבד - בייצור השירות רץ תחת gunicorn (gunicorn.conf.py)
+    app.run(host='0.0.0.0', port=5002, debug=os.getenv('FLASK_DEBUG', '0') == '1')
\ No newline at end of file
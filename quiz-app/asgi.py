@@ -0,0 +1,286 @@
+"""
+מצב הרצה אסינכרוני (ASGI) ל-API של החידון.
+
+נתיבי ה-API (API_ROUTES) מטופלים ישירות ב-event loop: בדיקת האימות מול auth-service נעשית ב-await על לקוח httpx משותף,
+כך שתהליך אחד מחזיק אלפי בקשות פתוחות בלי לחסום worker לכל אחת.
+הלוגיקה עצמה (שכוללת גישה לדיסק) רצה ב-thread מה-pool של asyncio.
+הלוגיקה, ה-session וה-JSON זהים לנתיב של Flask (אותן פונקציות מ-app.py
+ואותו session_interface). כל נתיב אחר מועבר לאפליקציית Flask ב-thread.
+
+הרצה:
+    uvicorn asgi:application --host 0.0.0.0 --port 5002
+    או: WEB_APP=asgi:application WEB_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+from http.cookiejar import DefaultCookiePolicy
+
+import httpx
+
+import app as quiz
+from auth_client import AuthServiceUnavailable, BaseAuthServiceClient
+
+flask_app = quiz.app
+
+
+class AsyncAuthServiceClient(BaseAuthServiceClient):
+    """אותו breaker ואותם מדדים כמו AuthServiceClient, על httpx.AsyncClient"""
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._http = None
+
+    def _client(self):
+        # נוצר בתוך ה-event loop שמריץ את האפליקציה
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.pool_size,
+                                    max_keepalive_connections=self.pool_size),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+            )
+            # הלקוח משותף לכל המשתמשים - אסור לו לשמור cookies מתשובות
+            self._http.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        return self._http
+
+    async def verify(self, cookie_header):
+        started = self._before_request()
+        try:
+            response = await self._client().get(self.verify_url, headers={'Cookie': cookie_header})
+        except httpx.HTTPError as e:
+            self._request_failed(started, e)
+        return self._response_received(started, response.status_code)
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+auth_client = AsyncAuthServiceClient(
+    quiz.AUTH_SERVICE_URL,
+    pool_size=int(os.getenv('AUTH_POOL_SIZE', '100')),
+    connect_timeout=quiz.auth_client.connect_timeout,
+    read_timeout=quiz.auth_client.read_timeout,
+    failure_threshold=quiz.auth_client.breaker.failure_threshold,
+    reset_timeout=quiz.auth_client.breaker.reset_timeout
+)
+
+# backends של session שניגשים לדיסק/רשת רצים ב-thread כדי לא לחסום את ה-loop
+BLOCKING_SESSION_IO = quiz.SESSION_BACKEND in ('sqlite', 'redis')
+
+
+async def verify_authentication(sess, cookies, cookie_header):
+    """המקבילה האסינכרונית של quiz.verify_authentication"""
+    if quiz.AUTH_VERIFY_MODE == 'local':
+        if quiz.revocations is not None:
+            # רשימת הביטולים ב-sqlite / redis
+            logged_in = await asyncio.to_thread(quiz.check_login, sess, quiz.revocations,
+                                                quiz.AUTH_MAX_SESSION_AGE)
+        else:
+            logged_in = quiz.check_login(sess, None, quiz.AUTH_MAX_SESSION_AGE)
+        if logged_in:
+            return True
+        if not quiz.AUTH_REMOTE_FALLBACK:
+            return False
+
+    cache_key = quiz.session_cache_key(cookies)
+    if cache_key is None:
+        return False
+
+    if quiz.revocations is not None:
+        cached = await asyncio.to_thread(quiz.cached_verification, sess, cache_key)
+    else:
+        cached = quiz.cached_verification(sess, cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        authenticated = await auth_client.verify(cookie_header)
+    except AuthServiceUnavailable as e:
+        return quiz.auth_unavailable_fallback(sess, e, client=auth_client)
+
+    quiz.verification_cache.put(cache_key, authenticated)
+    return authenticated
+
+
+def build_environ(scope, body):
+    """environ של WSGI מתוך scope של ASGI"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif key == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = f'HTTP_{key}'
+            if key in environ:
+                separator = '; ' if key == 'HTTP_COOKIE' else ','
+                value = f'{environ[key]}{separator}{value}'
+            environ[key] = value
+    return environ
+
+
+def run_wsgi(environ):
+    """הרצת אפליקציית Flask על environ ואיסוף התשובה"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    chunks = flask_app.wsgi_app(environ, start_response)
+    try:
+        body = b''.join(chunks)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    return started['status'], started['headers'], body
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_response(send, status, headers, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def split_bank_path(path):
+    """/api/banks/<שם>/question -> ('<שם>', '/api/question'); נתיב בלי מאגר -> (None, path)"""
+    if path.startswith('/api/banks/'):
+        bank, _, rest = path[len('/api/banks/'):].partition('/')
+        if bank and rest:
+            return bank, '/api/' + rest
+    return None, path
+
+
+def dispatch_api(path, sess, flask_request, body, bank):
+    """הפונקציה המשותפת מ-app.py לכל נתיב, אחרי בחירת המאגר. מחזיר (body, status)"""
+    quiz.use_bank(sess, bank)
+    if path == '/api/question':
+        return quiz.next_question(sess, flask_request.args)
+    if path == '/api/questions/next':
+        return quiz.next_questions(sess, flask_request.args.get('count', '5'), flask_request.args)
+    if path in ('/api/answer', '/api/answers'):
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        grade = quiz.grade_answer if path == '/api/answer' else quiz.grade_answers
+        return grade(sess, data)
+    if path == '/api/leaderboard':
+        return quiz.leaderboard_view(sess, flask_request.args.get('limit', '10'))
+    if path == '/api/search':
+        return quiz.search_questions(sess, flask_request.args.get('q', ''), flask_request.args.get('limit', '10'))
+    return quiz.score_summary(sess)
+
+
+async def handle_api(path, method, environ, body, bank=None):
+    flask_request = flask_app.request_class(environ)
+    interface = flask_app.session_interface
+
+    if BLOCKING_SESSION_IO:
+        sess = await asyncio.to_thread(interface.open_session, flask_app, flask_request)
+    else:
+        sess = interface.open_session(flask_app, flask_request)
+
+    authenticated = await verify_authentication(sess, flask_request.cookies,
+                                                environ.get('HTTP_COOKIE', ''))
+    if not authenticated:
+        if path in ('/api/score', '/api/leaderboard', '/api/search'):
+            result = {'error': 'לא מאומת'}, 401
+        else:
+            result = {'error': 'לא מאומת', 'redirect': '/login'}, 401
+    else:
+        try:
+            # הלוגיקה חוסמת (SQLite של ההתקדמות, בדיקת הקובץ של המאגר, בניית
+            # אינדקסים בשימוש הראשון) - ב-thread, כדי שבקשה איטית לא תעצור את ה-loop
+            result = await asyncio.to_thread(dispatch_api, path, sess, flask_request, body, bank)
+        except quiz.BankNotFound:
+            result = {'error': 'מאגר השאלות לא נמצא'}, 404
+        except quiz.BankUnavailable:
+            result = {'error': 'מאגר השאלות לא זמין כרגע'}, 503
+
+    with flask_app.app_context():
+        response = quiz.api_response(result[0], result[1], flask_request)
+
+    if BLOCKING_SESSION_IO:
+        await asyncio.to_thread(interface.save_session, flask_app, sess, response)
+    else:
+        interface.save_session(flask_app, sess, response)
+
+    return response.status_code, response.headers.to_wsgi_list(), response.get_data()
+
+
+API_ROUTES = {
+    '/api/question': 'GET',
+    '/api/questions/next': 'GET',
+    '/api/answer': 'POST',
+    '/api/answers': 'POST',
+    '/api/score': 'GET',
+    '/api/leaderboard': 'GET',
+    '/api/search': 'GET',
+}
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await auth_client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    body = await read_body(receive)
+    environ = build_environ(scope, body)
+    path, method = scope['path'], scope['method']
+    # /api/banks/<שם>/... - אותו נתיב, על המאגר מהנתיב
+    bank, api_path = split_bank_path(path)
+
+    if API_ROUTES.get(api_path) == method:
+        status, headers, payload = await handle_api(api_path, method, environ, body, bank)
+    else:
+        # שאר הנתיבים (/quiz, /logout, /api/stats ...) - אפליקציית Flask הרגילה
+        status, headers, payload = await asyncio.to_thread(run_wsgi, environ)
+
+    await send_response(send, status, headers, payload)
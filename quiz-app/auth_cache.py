@@ -0,0 +1,76 @@
+"""
+מטמון לתוצאות בדיקת האימות מול auth-service.
+
+המפתח הוא hash של ה-cookie (לא ה-cookie עצמו), תוצאה חיובית נשמרת
+ל-positive_ttl שניות ותוצאה שלילית לזמן קצר יותר. כשהמטמון מלא
+מפונה הרשומה שלא נגעו בה הכי הרבה זמן (LRU).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerificationCache:
+    def __init__(self, max_entries=10000, positive_ttl=5.0, negative_ttl=1.0):
+        self.max_entries = max_entries
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key_for(cookie_value):
+        return hashlib.sha256(cookie_value.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """מחזיר True/False אם יש תוצאה בתוקף, אחרת None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            authenticated, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return authenticated
+
+    def put(self, key, authenticated):
+        ttl = self.positive_ttl if authenticated else self.negative_ttl
+        with self._lock:
+            self._entries[key] = (authenticated, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,165 @@
+"""
+לקוח HTTP ל-auth-service.
+
+requests.Session אחד עם מאגר חיבורי keep-alive (במקום חיבור TCP חדש
+בכל קריאה), timeouts נפרדים ל-connect ול-read, ו-circuit breaker:
+אחרי failure_threshold כשלונות רצופים הלקוח מפסיק לפנות לשירות
+למשך reset_timeout שניות ונכשל מיד, ואז מנסה בקשת בדיקה אחת.
+"""
+
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class AuthServiceUnavailable(Exception):
+    """auth-service לא ענה (שגיאת רשת / timeout / 5xx) או שה-breaker פתוח"""
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+
+    def allow(self):
+        """האם מותר לשלוח בקשה עכשיו"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                # בקשת בדיקה אחת בכל פעם
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class BaseAuthServiceClient:
+    """breaker ומדדים משותפים ללקוח הסינכרוני (requests) ולאסינכרוני (asgi.py)"""
+
+    def __init__(self, base_url, pool_size=10, connect_timeout=0.5, read_timeout=2.0,
+                 failure_threshold=5, reset_timeout=10.0):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.short_circuits = 0
+        self.total_latency = 0.0
+        self.fallbacks_allowed = 0
+        self.fallbacks_denied = 0
+
+    @property
+    def verify_url(self):
+        return f'{self.base_url}/verify'
+
+    def _before_request(self):
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuits += 1
+            raise AuthServiceUnavailable('circuit open')
+        return time.perf_counter()
+
+    def _request_failed(self, started, error):
+        self._record(started, failed=True)
+        raise AuthServiceUnavailable(str(error)) from error
+
+    def _response_received(self, started, status_code):
+        if status_code >= 500:
+            self._record(started, failed=True)
+            raise AuthServiceUnavailable(f'auth-service returned {status_code}')
+        self._record(started, failed=False)
+        return status_code == 200
+
+    def _record(self, started, failed):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.requests += 1
+            self.total_latency += elapsed
+            if failed:
+                self.failures += 1
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def record_fallback(self, allowed):
+        """מונה החלטות שהתקבלו בלי auth-service (לפי מדיניות ה-fallback של האפליקציה)"""
+        with self._lock:
+            if allowed:
+                self.fallbacks_allowed += 1
+            else:
+                self.fallbacks_denied += 1
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'failures': self.failures,
+            'short_circuits': self.short_circuits,
+            'fallbacks_allowed': self.fallbacks_allowed,
+            'fallbacks_denied': self.fallbacks_denied,
+            'avg_latency_ms': round(self.total_latency / self.requests * 1000, 3) if self.requests else 0.0,
+            'breaker_state': self.breaker.state,
+            'breaker_opened': self.breaker.times_opened,
+        }
+
+
+class AuthServiceClient(BaseAuthServiceClient):
+    def __init__(self, base_url, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._http = requests.Session()
+        # ה-session משותף לכל המשתמשים - אסור לו לשמור cookies מתשובות
+        self._http.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self._http.mount('http://', adapter)
+        self._http.mount('https://', adapter)
+
+    def verify(self, cookie_header):
+        """
+        מחזיר True/False לפי תשובת /verify.
+        זורק AuthServiceUnavailable אם השירות לא זמין או שה-breaker פתוח.
+        """
+        started = self._before_request()
+        try:
+            response = self._http.get(
+                self.verify_url,
+                headers={'Cookie': cookie_header},
+                timeout=(self.connect_timeout, self.read_timeout)
+            )
+        except requests.RequestException as e:
+            self._request_failed(started, e)
+        return self._response_received(started, response.status_code)
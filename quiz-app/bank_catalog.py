@@ -0,0 +1,163 @@
+"""
+קטלוג של מאגרי שאלות לפי שם - מאגר לכל כיתה / לקוח.
+
+כל מאגר הוא קובץ בתיקיית הקטלוג, <שם>.qbank או <שם>.json, ונטען רק
+בבקשה הראשונה אליו (QuestionBankLoader משלו, עם אותה טעינה מחדש
+כשהקובץ משתנה). המאגרים הטעונים שמורים ב-LRU שחסום בזיכרון: כל מאגר
+מדווח את גודלו (loader.memory_size() - כולל גרסאות קודמות שעדיין
+בשימוש ואינדקסים שנבנו עליו), ואחרי טעינה של מאגר חדש מפנים את אלה
+שלא היו בשימוש הכי הרבה זמן עד שהסכום חוזר מתחת ל-max_bytes. האינדקסים
+נבנים בעצלות ומגדילים מאגר שכבר טעון, ולכן התקרה נבדקת שוב גם בגישה
+למאגר, לכל היותר פעם ב-check_interval.
+בקשה שכבר מחזיקה מאגר שפונה ממשיכה לעבוד איתו, והאינדקסים שנבנו
+עליו (ממופים לפי אובייקט המאגר) משתחררים יחד איתו.
+
+מאגרים קבועים (pinned - למשל QUESTIONS_FILE) לא נספרים ולא מפונים.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from question_bank import QuestionBankLoader
+
+logger = logging.getLogger(__name__)
+
+# השם מגיע מהנתיב - רק תווים שלא יכולים לצאת מהתיקייה
+BANK_NAME = re.compile(r'[A-Za-z0-9_-]{1,64}')
+EXTENSIONS = ('.qbank', '.json')
+
+
+class BankNotFound(LookupError):
+    """אין מאגר בשם הזה בקטלוג"""
+
+
+class BankUnavailable(RuntimeError):
+    """המאגר קיים אבל הטעינה הראשונה שלו נכשלה"""
+
+
+class BankCatalog:
+    def __init__(self, directory=None, max_bytes=512 * 2 ** 20, check_interval=1.0, pinned=None,
+                 retain_seconds=600.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.retain_seconds = retain_seconds
+        self._pinned = dict(pinned or {})
+        self._loaders = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_budget_check = 0.0
+
+        # מדדים לניטור
+        self.hits = 0
+        self.loads = 0
+        self.failed_loads = 0
+        self.evictions = 0
+
+    def path_for(self, name):
+        """הקובץ של המאגר (qbank קודם ל-json), או BankNotFound"""
+        if self.directory and BANK_NAME.fullmatch(name):
+            for extension in EXTENSIONS:
+                path = os.path.join(self.directory, name + extension)
+                if os.path.isfile(path):
+                    return path
+        raise BankNotFound(name)
+
+    def names(self):
+        """כל המאגרים הזמינים - הקבועים וכל קובץ מתאים בתיקייה"""
+        names = set(self._pinned)
+        if self.directory and os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                name, extension = os.path.splitext(filename)
+                if extension in EXTENSIONS and BANK_NAME.fullmatch(name):
+                    names.add(name)
+        return sorted(names)
+
+    def get(self, name):
+        """המאגר הפעיל של name; BankNotFound / BankUnavailable"""
+        return self.loader(name).get()
+
+    def loaded(self, name):
+        """ה-loader של name אם הוא כבר בזיכרון, אחרת None (בלי לטעון)"""
+        loader = self._pinned.get(name)
+        return loader if loader is not None else self._loaders.get(name)
+
+    def loader(self, name):
+        """ה-QuestionBankLoader של name (נטען אם צריך) - לגרסאות של המאגר"""
+        loader = self._pinned.get(name)
+        if loader is not None:
+            return loader
+
+        with self._lock:
+            loader = self._loaders.get(name)
+            if loader is not None:
+                self._loaders.move_to_end(name)
+                self.hits += 1
+                recheck = time.monotonic() >= self._next_budget_check
+                if recheck:
+                    self._next_budget_check = time.monotonic() + self.check_interval
+        if loader is None:
+            return self._load(name)
+        if recheck:
+            # אינדקסים שנבנו מאז הבדיקה הקודמת (חיפוש, סינון) הגדילו את המאגרים
+            self._evict(keep=name)
+        return loader
+
+    def _load(self, name):
+        path = self.path_for(name)
+        with self._lock:
+            # ייתכן ש-thread אחר התחיל לטעון את אותו מאגר בינתיים
+            loader = self._loaders.get(name)
+            if loader is None:
+                loader = self._loaders[name] = QuestionBankLoader(
+                    path, self.check_interval, self.retain_seconds)
+                self.loads += 1
+
+        try:
+            # הנעילה של ה-loader - טעינה אחת גם כשכמה בקשות מגיעות יחד
+            loader.get()
+        except (OSError, ValueError, KeyError) as e:
+            logger.exception('טעינת המאגר %s מ-%s נכשלה', name, path)
+            with self._lock:
+                if self._loaders.get(name) is loader:
+                    del self._loaders[name]
+                self.failed_loads += 1
+            raise BankUnavailable(name) from e
+
+        self._evict(keep=name)
+        return loader
+
+    @staticmethod
+    def _size(loader):
+        # כולל גרסאות קודמות שעדיין בשימוש
+        return loader.memory_size()
+
+    def _evict(self, keep):
+        """פינוי LRU עד שהגודל הכולל חוזר מתחת ל-max_bytes (המאגר keep נשאר)"""
+        with self._lock:
+            total = sum(map(self._size, self._loaders.values()))
+            for name in list(self._loaders):
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                total -= self._size(self._loaders.pop(name))
+                self.evictions += 1
+                logger.info('המאגר %s פונה מהזיכרון (LRU)', name)
+
+    def stats(self):
+        with self._lock:
+            loaders = dict(self._loaders)
+        return {
+            'loaded': len(loaders),
+            'bytes': sum(map(self._size, loaders.values())),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'loads': self.loads,
+            'failed_loads': self.failed_loads,
+            'evictions': self.evictions,
+            'banks': {name: self._size(loader) for name, loader in loaders.items()},
+        }
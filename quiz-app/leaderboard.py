@@ -0,0 +1,230 @@
+"""
+טבלת מובילים עם דירוג שמתעדכן בהדרגה.
+
+המשתמשים מוחזקים ב-skip list עם רוחבי קפיצה (indexable skip list)
+לפי המפתח (-score, username): עדכון ניקוד, מיקום של משתמש ו-top-K
+הם O(log N) בממוצע, בלי מיון של כל המשתמשים בכל בקשה.
+
+הדירוג הוא "דירוג תחרות" - משתמשים עם אותו ניקוד חולקים מקום, והבא
+אחריהם מדלג (1, 2, 2, 4). הטבלה נשמרת לדיסק (JSON) מדי פעם ונטענת
+בעליית התהליך.
+"""
+
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVELS = 24
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        # width[level] = כמה צמתים ברמה התחתונה מדלגת הקפיצה הזו
+        self.width = [1] * levels
+
+
+class IndexableSkipList:
+    """רשימה ממוינת עם הוספה, הסרה, ספירת קטנים מ-key וגישה לפי מיקום ב-O(log N)"""
+
+    def __init__(self, rng=random.random):
+        self._rng = rng
+        self._head = _Node(None, MAX_LEVELS)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _find_chain(self, key):
+        """הצומת האחרון לפני key בכל רמה, ומספר הצעדים שנעשו בכל רמה"""
+        chain = [None] * MAX_LEVELS
+        steps = [0] * MAX_LEVELS
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                steps[level] += node.width[level]
+                node = following
+                following = node.next[level]
+            chain[level] = node
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps_at_level = self._find_chain(key)
+        height = 1
+        while height < MAX_LEVELS and self._rng() < 0.5:
+            height += 1
+
+        node = _Node(key, height)
+        steps = 0
+        for level in range(height):
+            previous = chain[level]
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain, _ = self._find_chain(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def count_less(self, key):
+        """מספר המפתחות הקטנים מ-key"""
+        count = 0
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                count += node.width[level]
+                node = following
+                following = node.next[level]
+        return count
+
+    def iter_from(self, index):
+        """המפתחות החל מהמיקום index לפי הסדר"""
+        if not 0 <= index < self._size:
+            return
+        remaining = index + 1
+        node = self._head
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class Leaderboard:
+    def __init__(self):
+        self._scores = {}
+        self._ranks = IndexableSkipList()
+        self._lock = threading.Lock()
+        # גרסה שעולה בכל שינוי - snapshot נכתב רק כשהיא זזה
+        self.version = 0
+        self.updates = 0
+        self.snapshots = 0
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def update(self, username, score):
+        with self._lock:
+            previous = self._scores.get(username)
+            if previous == score:
+                return
+            if previous is not None:
+                self._ranks.remove((-previous, username))
+            self._ranks.insert((-score, username))
+            self._scores[username] = score
+            self.version += 1
+            self.updates += 1
+
+    def _rank_for_score(self, score):
+        # 1 + מספר המשתמשים עם ניקוד גבוה יותר ממש
+        return self._ranks.count_less((-score, '')) + 1
+
+    def top(self, limit):
+        with self._lock:
+            entries = []
+            rank = None
+            previous_score = None
+            for position, (negative_score, username) in enumerate(self._ranks.iter_from(0)):
+                if position >= limit:
+                    break
+                score = -negative_score
+                if score != previous_score:
+                    rank, previous_score = position + 1, score
+                entries.append({'rank': rank, 'username': username, 'score': score})
+            return entries
+
+    def rank_of(self, username):
+        with self._lock:
+            score = self._scores.get(username)
+            if score is None:
+                return None
+            return {'rank': self._rank_for_score(score), 'username': username, 'score': score}
+
+    def snapshot(self, path):
+        """
+        כתיבה אטומית של הטבלה לקובץ JSON. כל ה-workers כותבים לאותו path
+        (גם ביציאה, כולם יחד) - לכל כתיבה קובץ זמני משלה, שנכתב לדיסק לפני ההחלפה
+        """
+        with self._lock:
+            players = dict(self._scores)
+            version = self.version
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                   prefix=os.path.basename(path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': time.time(), 'players': players}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.snapshots += 1
+        return version
+
+    def load(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            players = json.load(f)['players']
+        for username, score in players.items():
+            self.update(username, score)
+        return len(players)
+
+    def run_background(self, path=None, interval=30.0, sync=None):
+        """
+        thread ברקע שפעם ב-interval שניות מריץ sync() (אם ניתן) - עדכונים
+        מ-workers אחרים דרך מאגר ההתקדמות - ושומר snapshot אם הטבלה השתנתה.
+        """
+        def run():
+            saved_version = self.version
+            while not self._stop.wait(interval):
+                try:
+                    if sync is not None:
+                        for username, score in sync():
+                            self.update(username, score)
+                    if path and self.version != saved_version:
+                        saved_version = self.snapshot(path)
+                except Exception:
+                    logger.exception('עדכון טבלת המובילים ברקע נכשל')
+
+        thread = threading.Thread(target=run, name='leaderboard', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            'players': len(self),
+            'updates': self.updates,
+            'snapshots': self.snapshots,
+        }
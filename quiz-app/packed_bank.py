@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+פורמט מהודר למאגר השאלות (.qbank).
+
+questions.json נשאר פורמט העריכה; שלב build מהדר אותו לקובץ בינארי:
+
+    header   '<4sHHI'  magic, גרסה, שמור, מספר שאלות
+    ids      uint32 * count         ממוינים - חיפוש ב-bisect
+    offsets  uint64 * (count + 1)   תחילת כל רשומה באזור הנתונים
+    difficulty  float64 * count     קושי כל שאלה (ראו adaptive.py), 0 כשחסר
+    data     JSON קומפקטי (UTF-8) לכל שאלה, לפי סדר ה-ids
+    postings JSON של האינדקס ההפוך {'topic': {...}, 'tags': {...}} (ראו question_index.py)
+    search   אינדקס החיפוש בטקסט (ראו search_index.py), מיושר ל-8
+    trailer  '<QQ8s' אורך ה-postings, אורך מקטע החיפוש, גרסת התוכן
+             (blake2b של questions.json - אותה גרסה כמו המאגר מה-JSON)
+
+quiz-app ממפה את הקובץ לזיכרון (mmap) ומפענח רק את השאלות שמוגשות
+בפועל, כך שהעלייה מיידית גם למאגר גדול, ודפי הקובץ משותפים בין כל
+ה-workers דרך ה-page cache במקום עותק מפוענח בכל תהליך.
+
+הרצה:
+    python3 packed_bank.py questions.json questions.qbank
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from question_index import build_postings
+from search_index import build_search_index
+
+MAGIC = b'QBNK'
+VERSION = 5
+TRAILER = struct.Struct('<QQ8s')
+HEADER = struct.Struct('<4sHHI')
+
+
+def _align(offset, size=8):
+    return offset + (-offset % size)
+
+
+# ids הם אינדקסים במפות ביטים (answered.py, question_index.py) - תקרה לגודל המפה
+MAX_QUESTION_ID = 2 ** 24
+
+
+def check_question_id(question_id):
+    """id חייב להיות מספר שלם אי-שלילי מתחת ל-MAX_QUESTION_ID"""
+    if type(question_id) is not int or not 0 <= question_id < MAX_QUESTION_ID:
+        raise ValueError(f'id לא תקין: {question_id!r}')
+
+
+def deep_size(value):
+    """sys.getsizeof כולל התוכן של dict / list (הערכה - אובייקטים משותפים נספרים שוב)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key) + deep_size(item) for key, item in value.items())
+    elif isinstance(value, list):
+        size += sum(map(deep_size, value))
+    return size
+
+
+def content_version(data):
+    """גרסת התוכן של מאגר - hash קצר של הבתים של questions.json"""
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def question_difficulty(question):
+    """קושי השאלה בסולם ה-logit של adaptive.py; שאלה בלי ערך היא 0 (ממוצעת)"""
+    return float(question.get('difficulty', 0.0))
+
+
+def compile_bank(source, target):
+    """הידור questions.json לקובץ .qbank; הכתיבה אטומית (קובץ זמני + rename)"""
+    with open(source, 'rb') as f:
+        data = f.read()
+    version = content_version(data)
+    questions = json.loads(data)['questions']
+
+    questions = sorted(questions, key=lambda q: q['id'])
+    ids = array('I')
+    difficulties = array('d')
+    records = []
+    for question in questions:
+        question_id = question['id']
+        check_question_id(question_id)
+        if ids and ids[-1] == question_id:
+            raise ValueError(f'id כפול: {question_id}')
+        ids.append(question_id)
+        difficulties.append(question_difficulty(question))
+        records.append(json.dumps(question, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    offsets = array('Q', [0])
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+    if sys.byteorder != 'little':
+        ids.byteswap()
+        offsets.byteswap()
+        difficulties.byteswap()
+
+    ids_end = HEADER.size + len(ids) * ids.itemsize
+    padding = _align(ids_end) - ids_end
+    postings = json.dumps(build_postings(questions), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    search = build_search_index(questions).to_bytes()
+
+    tmp = f'{target}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(ids)))
+        f.write(ids.tobytes())
+        f.write(b'\0' * padding)
+        f.write(offsets.tobytes())
+        f.write(difficulties.tobytes())
+        for record in records:
+            f.write(record)
+        f.write(postings)
+        f.write(b'\0' * (_align(f.tell()) - f.tell()))
+        f.write(search)
+        f.write(TRAILER.pack(len(postings), len(search), bytes.fromhex(version)))
+    # inode חדש - מיפויים פתוחים של הקובץ הישן נשארים תקינים
+    os.replace(tmp, target)
+    return len(records)
+
+
+class PackedQuestions:
+    """רצף עצל של השאלות - כל גישה מפענחת רשומה אחת"""
+
+    def __init__(self, bank):
+        self._bank = bank
+
+    def __len__(self):
+        return len(self._bank)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._bank.at(index)
+
+
+class PackedQuestionBank:
+    """מאגר שאלות על גבי קובץ .qbank ממופה; אותו ממשק כמו QuestionBank"""
+
+    def __init__(self, buffer):
+        magic, version, _, count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('קובץ .qbank לא תקין או מגרסה לא נתמכת')
+
+        view = memoryview(buffer)
+        ids_end = HEADER.size + count * 4
+        offsets_start = _align(ids_end)
+        difficulties_start = offsets_start + (count + 1) * 8
+        data_start = difficulties_start + count * 8
+        self._buffer = buffer
+        self._count = count
+
+        if sys.byteorder == 'little':
+            self.ids = view[HEADER.size:ids_end].cast('I')
+            self._offsets = view[offsets_start:difficulties_start].cast('Q')
+            self.difficulties = view[difficulties_start:data_start].cast('d')
+        else:
+            # מכונת big-endian - עותק מומר של הטבלאות, הנתונים עצמם נשארים ממופים
+            self.ids = array('I', bytes(view[HEADER.size:ids_end]))
+            self.ids.byteswap()
+            self._offsets = array('Q', bytes(view[offsets_start:difficulties_start]))
+            self._offsets.byteswap()
+            self.difficulties = array('d', bytes(view[difficulties_start:data_start]))
+            self.difficulties.byteswap()
+        data_end = data_start + self._offsets[count]
+        if len(buffer) < data_end + TRAILER.size:
+            raise ValueError('קובץ .qbank קטוע')
+        postings_size, search_size, version = TRAILER.unpack_from(buffer, len(buffer) - TRAILER.size)
+        search_start = _align(data_end + postings_size)
+        if search_start + search_size + TRAILER.size != len(buffer):
+            raise ValueError('קובץ .qbank קטוע')
+        self._data = view[data_start:data_end]
+        self.version = version.hex()
+        self.postings = json.loads(bytes(view[data_end:data_end + postings_size]))
+        self._postings_size = None
+        # נטען ל-SearchIndex רק בחיפוש הראשון (ראו search_index.search_index)
+        self.search_section = view[search_start:search_start + search_size]
+
+        self.questions = PackedQuestions(self)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def __len__(self):
+        return self._count
+
+    def memory_size(self):
+        """
+        גודל הקובץ הממופה (חסם עליון - הדפים משותפים בין ה-workers ב-page cache)
+        ועוד ה-postings שפוענחו ממנו
+        """
+        if self._postings_size is None:
+            self._postings_size = deep_size(self.postings)
+        return len(self._buffer) + self._postings_size
+
+    def record(self, index):
+        """הבתים של הרשומה במיקום index, בלי פענוח"""
+        return bytes(self._data[self._offsets[index]:self._offsets[index + 1]])
+
+    def at(self, index):
+        """פענוח השאלה במיקום index (לפי סדר ה-ids)"""
+        return json.loads(self.record(index))
+
+    def position(self, question_id):
+        """המיקום של id ב-ids (ל-at), או None אם אינו קיים"""
+        if not isinstance(question_id, int) or isinstance(question_id, bool):
+            return None
+        index = bisect.bisect_left(self.ids, question_id)
+        if index < self._count and self.ids[index] == question_id:
+            return index
+        return None
+
+    def find(self, question_id):
+        """חיפוש שאלה לפי id ב-O(log n), או None אם אינה קיימת"""
+        index = self.position(question_id)
+        return None if index is None else self.at(index)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print('שימוש: python3 packed_bank.py questions.json questions.qbank', file=sys.stderr)
+        sys.exit(2)
+    count = compile_bank(sys.argv[1], sys.argv[2])
+    print(f'✓ {count} שאלות הודרו ל-{sys.argv[2]} ({os.path.getsize(sys.argv[2])} בתים)')
+
+
+if __name__ == '__main__':
+    main()
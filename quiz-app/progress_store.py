@@ -0,0 +1,211 @@
+"""
+מאגר התקדמות קבוע לכל משתמש (ניקוד ושאלות שנענו) ב-SQLite.
+
+/api/answer לא מחכה לדיסק: כל תשובה נרשמת לחוצץ בזיכרון, ו-thread
+ברקע כותב את החוצץ פעם ב-flush_interval שניות בטרנזקציה אחת
+(WAL, synchronous=NORMAL). הכתיבות מצטברות בלבד - שורה לכל תשובה
+ב-answers ותוספת לניקוד ב-progress - כך שכמה workers יכולים לכתוב
+לאותו משתמש בלי לדרוס זה את זה.
+
+כל תשובה נרשמת עם שם מאגר השאלות שלה ('' - מאגר ברירת המחדל), כי ids
+חוזרים בין מאגרים; הניקוד משותף לכל המאגרים.
+
+המצב החי של המשחק נשאר ב-session (זה מה ש-/api/score קורא, בלי גישה
+למסד); המאגר משחזר אותו ל-session חדש, למשל אחרי יציאה והתחברות.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from answered import AnsweredSet
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = [
+    '''CREATE TABLE IF NOT EXISTS answers (
+        id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL,
+        question_id INTEGER NOT NULL,
+        correct INTEGER NOT NULL,
+        answered_at REAL NOT NULL,
+        bank TEXT NOT NULL DEFAULT ''
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_answers_username ON answers (username)',
+    '''CREATE TABLE IF NOT EXISTS progress (
+        username TEXT PRIMARY KEY,
+        score INTEGER NOT NULL,
+        answers INTEGER NOT NULL,
+        updated_at REAL NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_progress_updated_at ON progress (updated_at)',
+]
+# מסד מלפני עמודת bank - כל התשובות הקיימות שייכות למאגר ברירת המחדל
+MIGRATE_BANK_SQL = "ALTER TABLE answers ADD COLUMN bank TEXT NOT NULL DEFAULT ''"
+INSERT_ANSWER_SQL = 'INSERT INTO answers (username, question_id, correct, answered_at, bank) VALUES (?, ?, ?, ?, ?)'
+UPSERT_PROGRESS_SQL = (
+    'INSERT INTO progress (username, score, answers, updated_at) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT (username) DO UPDATE SET score = score + excluded.score, '
+    'answers = answers + excluded.answers, updated_at = excluded.updated_at'
+)
+SELECT_SCORE_SQL = 'SELECT score FROM progress WHERE username = ?'
+SELECT_ANSWERED_SQL = 'SELECT DISTINCT question_id FROM answers WHERE username = ? AND bank = ?'
+SELECT_UPDATED_SQL = 'SELECT username, score, updated_at FROM progress WHERE updated_at >= ?'
+SELECT_LATEST_UPDATE_SQL = 'SELECT MAX(updated_at) FROM progress'
+
+
+class ProgressStore:
+    def __init__(self, path, flush_interval=0.05, max_pending=10000):
+        self.path = os.path.abspath(path)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        # מדדים לניטור
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.last_flush_seconds = 0.0
+
+        with self._connection() as conn:
+            for sql in SCHEMA_SQL:
+                conn.execute(sql)
+            if 'bank' not in {row[1] for row in conn.execute('PRAGMA table_info(answers)')}:
+                conn.execute(MIGRATE_BANK_SQL)
+
+        self._flusher = threading.Thread(target=self._run, name='progress-flush', daemon=True)
+        self._flusher.start()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def record(self, username, question_id, correct, bank=''):
+        self.record_many(username, [(question_id, correct)], bank)
+
+    def record_many(self, username, results, bank=''):
+        """רישום תשובות לחוצץ - לא ניגש לדיסק"""
+        now = time.time()
+        events = [(username, question_id, int(bool(correct)), now, bank) for question_id, correct in results]
+        with self._lock:
+            self._pending.extend(events)
+            self.recorded += len(events)
+            overflow = len(self._pending) >= self.max_pending
+        if overflow:
+            # חוצץ מלא - מעירים את ה-thread עכשיו במקום לחכות למחזור הבא
+            self._wakeup.set()
+
+    def load(self, username, bank=''):
+        """(ניקוד, AnsweredSet במאגר bank) של המשתמש - מהמסד ומהחוצץ שטרם נכתב"""
+        row = self._connection().execute(SELECT_SCORE_SQL, (username,)).fetchone()
+        score = row[0] if row else 0
+        with self._lock:
+            pending = [event for event in self._pending if event[0] == username]
+        score += sum(event[2] for event in pending)
+        return score, self._answered(username, bank, pending)
+
+    def answered(self, username, bank=''):
+        """AnsweredSet במאגר bank בלבד (בלי הניקוד)"""
+        with self._lock:
+            pending = [event for event in self._pending if event[0] == username]
+        return self._answered(username, bank, pending)
+
+    def _answered(self, username, bank, pending):
+        answered = AnsweredSet()
+        for (question_id,) in self._connection().execute(SELECT_ANSWERED_SQL, (username, bank)):
+            answered.add(question_id)
+        for _, question_id, _, _, event_bank in pending:
+            if event_bank == bank:
+                answered.add(question_id)
+        return answered
+
+    def updated_since(self, since):
+        """
+        (משתמש, ניקוד) של מי שההתקדמות שלו נכתבה מאז since, והחותמת
+        לקריאה הבאה. ההשוואה כוללת (>=) - שורה עם אותה חותמת עלולה לחזור
+        פעמיים, ולכן הצרכן צריך להיות אידמפוטנטי.
+        """
+        rows = self._connection().execute(SELECT_UPDATED_SQL, (since,)).fetchall()
+        latest = max((updated_at for _, _, updated_at in rows), default=since)
+        return [(username, score) for username, score, _ in rows], latest
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """כתיבת כל החוצץ בטרנזקציה אחת"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        totals = {}
+        for username, _, correct, _, _ in batch:
+            score, answers = totals.get(username, (0, 0))
+            totals[username] = (score + correct, answers + 1)
+
+        started = time.perf_counter()
+        try:
+            conn = self._connection()
+            with conn:
+                # updated_at הוא סימן המים של updated_since, ולכן זמן הכתיבה ולא זמן התשובה:
+                # נלקח אחרי נעילת הכתיבה ולא קטן מאף חותמת שכבר נכתבה, כך שחוצץ שנכתב
+                # באיחור (או שוב אחרי כישלון) לא נופל מתחת לסימן של קורא שכבר סנכרן
+                conn.execute('BEGIN IMMEDIATE')
+                latest = conn.execute(SELECT_LATEST_UPDATE_SQL).fetchone()[0]
+                updated_at = max(time.time(), latest or 0.0)
+                conn.executemany(INSERT_ANSWER_SQL, batch)
+                conn.executemany(UPSERT_PROGRESS_SQL, [
+                    (username, score, answers, updated_at)
+                    for username, (score, answers) in totals.items()
+                ])
+        except sqlite3.Error:
+            # מחזירים את האירועים לראש החוצץ וננסה שוב במחזור הבא
+            logger.exception('כתיבת ההתקדמות ל-%s נכשלה', self.path)
+            with self._lock:
+                self._pending[:0] = batch
+                excess = len(self._pending) - self.max_pending * 2
+                if excess > 0:
+                    del self._pending[:excess]
+                    self.dropped += excess
+                self.failed_flushes += 1
+            return
+
+        self.last_flush_seconds = time.perf_counter() - started
+        self.flushes += 1
+        self.flushed += len(batch)
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join()
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'pending': pending,
+            'recorded': self.recorded,
+            'flushed': self.flushed,
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'dropped': self.dropped,
+            'last_flush_ms': round(self.last_flush_seconds * 1000, 3),
+        }
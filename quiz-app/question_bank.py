@@ -0,0 +1,312 @@
+"""
+מאגר שאלות בזיכרון התהליך.
+
+הקובץ questions.json נקרא ומפוענח פעם אחת, ונטען מחדש רק כאשר
+ה-inode או זמן השינוי שלו משתנים. מאגר חדש מוחלף באופן אטומי -
+בקשה שכבר מחזיקה הפניה למאגר הישן ממשיכה לעבוד איתו עד סופה.
+קובץ .qbank (ראו packed_bank.py) נטען כמאגר ממופה במקום JSON.
+
+לכל מאגר יש גרסה - hash של תוכן הקובץ. גרסה שהוחלפה נשארת בזיכרון
+(retain_seconds, עד max_retained גרסאות), כך ש-session שהוגשה לו שאלה
+ממנה - גם ב-worker אחר - נבדק מול השאלה שהוצגה. sessions נספרים על
+הגרסה שלהם (acquire / release) רק כדי לשחרר אותה מוקדם: כשה-sessions
+שהתהליך הזה ספר עליה עברו כולם לגרסה החדשה.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from packed_bank import PackedQuestionBank, check_question_id, content_version, deep_size, question_difficulty
+from question_index import bitmap_from_ids, build_postings, question_index_size
+from search_index import prepare_search_index, search_index_size
+
+logger = logging.getLogger(__name__)
+
+# מספר השאלות שנמדדות כדי להעריך את גודל המאגר בזיכרון
+MEMORY_SAMPLE = 200
+# גרסאות קודמות שנשמרות בזיכרון לכל היותר (עריכה חיה שומרת קובץ הרבה פעמים)
+MAX_RETAINED_VERSIONS = 4
+
+
+class QuestionBank:
+    """תמונת מצב של מאגר השאלות - לא משתנה אחרי הבנייה"""
+
+    def __init__(self, questions, version=None):
+        # אותה בדיקה כמו בהידור - id לא תקין או כפול פוסל את המאגר (ValueError)
+        for question in questions:
+            check_question_id(question['id'])
+        self.questions = questions
+        self._version = version
+        # אינדקס id -> שאלה, נבנה יחד עם המאגר ונבנה מחדש בכל טעינה
+        self.by_id = {q['id']: q for q in questions}
+        if len(self.by_id) != len(questions):
+            raise ValueError('id כפול במאגר השאלות')
+        self.ids = [q['id'] for q in questions]
+        self.difficulties = [question_difficulty(q) for q in questions]
+        self.positions = {q['id']: i for i, q in enumerate(questions)}
+        # אינדקס הפוך נושא/תגית -> ids (ראו question_index.py)
+        self.postings = build_postings(questions)
+        self._memory_size = None
+
+    def __len__(self):
+        return len(self.questions)
+
+    @property
+    def version(self):
+        """hash התוכן - מהקובץ בטעינה, או מהשאלות עצמן בשימוש הראשון"""
+        if self._version is None:
+            data = json.dumps({'questions': self.questions}, ensure_ascii=False, sort_keys=True)
+            self._version = content_version(data.encode('utf-8'))
+        return self._version
+
+    def memory_size(self):
+        """הערכה בבתים: מדגם שאלות מוכפל במספר השאלות, ועוד הטבלאות וה-postings"""
+        if self._memory_size is None:
+            sample = self.questions[::max(1, len(self.questions) // MEMORY_SAMPLE)]
+            per_question = sum(map(deep_size, sample)) / len(sample) if sample else 0
+            indexes = sum(map(sys.getsizeof, (self.questions, self.by_id, self.ids,
+                                              self.difficulties, self.positions)))
+            self._memory_size = int(per_question * len(self.questions)) + indexes + deep_size(self.postings)
+        return self._memory_size
+
+    def at(self, index):
+        return self.questions[index]
+
+    def position(self, question_id):
+        """המיקום של id ב-questions (ל-at), או None אם אינו קיים"""
+        try:
+            return self.positions.get(question_id)
+        except TypeError:
+            return None
+
+    def find(self, question_id):
+        """חיפוש שאלה לפי id ב-O(1), או None אם אינה קיימת"""
+        try:
+            return self.by_id.get(question_id)
+        except TypeError:
+            # id לא hashable (למשל רשימה) שהגיע מהלקוח
+            return None
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        return cls(json.loads(data)['questions'], content_version(data))
+
+
+def load_bank(path):
+    """מאגר לפי סוג הקובץ: .qbank ממופה לזיכרון, אחרת JSON"""
+    if path.endswith('.qbank'):
+        return PackedQuestionBank.from_file(path)
+    return QuestionBank.from_file(path)
+
+
+def bank_memory_size(bank):
+    """המאגר ועוד האינדקסים שנבנו עליו בעצלות (סינון, חיפוש) - גדל עם השימוש"""
+    return bank.memory_size() + question_index_size(bank) + search_index_size(bank)
+
+
+def changed_ids(old, new):
+    """מפת ביטים של ids מ-old שהשאלה שלהם שונה ב-new או נמחקה"""
+    # שני מאגרים ממופים - השוואת הבתים של הרשומות, בלי פענוח
+    raw = hasattr(old, 'record') and hasattr(new, 'record')
+    # המקרה הנפוץ - עריכה של שאלות קיימות, אותם ids באותו סדר
+    same_ids = old.ids == new.ids
+    changed = []
+    for index, question_id in enumerate(old.ids):
+        position = index if same_ids else new.position(question_id)
+        if position is None:
+            changed.append(question_id)
+        elif raw:
+            if old.record(index) != new.record(position):
+                changed.append(question_id)
+        elif old.at(index) != new.at(position):
+            changed.append(question_id)
+    return bitmap_from_ids(changed)
+
+
+class QuestionBankLoader:
+    """מחזיק את המאגר הפעיל ובודק אם הקובץ השתנה לכל היותר פעם ב-check_interval שניות"""
+
+    def __init__(self, path, check_interval=1.0, retain_seconds=600.0,
+                 max_retained=MAX_RETAINED_VERSIONS):
+        self.path = path
+        self.check_interval = check_interval
+        self.retain_seconds = retain_seconds
+        self.max_retained = max_retained
+        self._lock = threading.Lock()
+        self._bank = None
+        self._file_key = None
+        self._next_check = 0.0
+        # גרסה -> מספר ה-sessions שעובדים מולה (בתהליך הזה)
+        self._refs = {}
+        # גרסאות שהוחלפו: גרסה -> (מאגר, זמן ההחלפה)
+        self._retained = OrderedDict()
+        # גרסה ישנה -> מפת ה-ids שהשתנו מאז (מול המאגר הפעיל)
+        self._changes = {}
+
+        # מדדים לניטור
+        self.reload_count = 0
+        self.unchanged_reloads = 0
+        self.drained_versions = 0
+        self.failed_reloads = 0
+        self.last_parse_seconds = 0.0
+        self.total_parse_seconds = 0.0
+        self.loaded_at = None
+
+    def _stat_key(self):
+        st = os.stat(self.path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def current(self):
+        """המאגר שנטען אחרון (או None), בלי לבדוק את הקובץ"""
+        return self._bank
+
+    def resident(self, version):
+        """המאגר בגרסה version אם הוא עדיין בזיכרון (הפעיל או גרסה שנשמרה), אחרת None"""
+        bank = self._bank
+        if bank is not None and bank.version == version:
+            return bank
+        entry = self._retained.get(version)
+        return entry[0] if entry is not None else None
+
+    def acquire(self, version):
+        """session התחיל לעבוד מול version"""
+        with self._lock:
+            self._refs[version] = self._refs.get(version, 0) + 1
+
+    def release(self, version):
+        """session עבר מ-version; גרסה ישנה שכל ה-sessions שנספרו עליה עברו - משתחררת"""
+        with self._lock:
+            refs = self._refs.get(version, 0)
+            if refs > 1:
+                self._refs[version] = refs - 1
+                return
+            if not refs:
+                # לא נספר בתהליך הזה - הגרסה נשארת עד תקרת הזמן
+                return
+            del self._refs[version]
+            if version in self._retained:
+                self._drop(version)
+
+    def changed_since(self, version):
+        """
+        מפת ה-ids שהשאלה שלהם השתנתה מגרסה version לגרסה הפעילה (0 - אותה
+        גרסה), או None אם version כבר לא בזיכרון. מחושב פעם אחת לכל גרסה
+        """
+        with self._lock:
+            if self._bank is not None and self._bank.version == version:
+                return 0
+            changed = self._changes.get(version)
+            if changed is None:
+                entry = self._retained.get(version)
+                if entry is None:
+                    return None
+                changed = self._changes[version] = changed_ids(entry[0], self._bank)
+            return changed
+
+    def _drop(self, version):
+        del self._retained[version]
+        self._changes.pop(version, None)
+        self.drained_versions += 1
+        logger.info('גרסה %s של %s שוחררה מהזיכרון', version, self.path)
+
+    def _prune(self):
+        """שחרור גרסאות ישנות שעברו retain_seconds או מעבר ל-max_retained (הישנות קודם)"""
+        now = time.monotonic()
+        for version, (_, retired_at) in list(self._retained.items()):
+            if now - retired_at > self.retain_seconds or len(self._retained) > self.max_retained:
+                self._refs.pop(version, None)
+                self._drop(version)
+
+    def get(self):
+        """מחזיר את המאגר הפעיל, וטוען מחדש אם הקובץ השתנה"""
+        bank = self._bank
+        if bank is not None and time.monotonic() < self._next_check:
+            return bank
+
+        with self._lock:
+            if self._bank is not None and time.monotonic() < self._next_check:
+                return self._bank
+            self._next_check = time.monotonic() + self.check_interval
+            if self._retained:
+                self._prune()
+
+            try:
+                key = self._stat_key()
+            except OSError:
+                if self._bank is None:
+                    raise
+                logger.exception('לא ניתן לבדוק את קובץ השאלות %s', self.path)
+                return self._bank
+
+            if key != self._file_key:
+                self._reload(key)
+            return self._bank
+
+    def _reload(self, key):
+        started = time.perf_counter()
+        try:
+            bank = load_bank(self.path)
+        except (OSError, ValueError, KeyError):
+            # קובץ באמצע עריכה או פגום - ממשיכים עם המאגר הקודם
+            if self._bank is None:
+                raise
+            self.failed_reloads += 1
+            logger.exception('טעינה מחדש של %s נכשלה, ממשיכים עם המאגר הקודם', self.path)
+            return
+        elapsed = time.perf_counter() - started
+
+        old = self._bank
+        if old is not None and bank.version == old.version:
+            # אותו תוכן (touch, שמירה חוזרת) - ממשיכים עם המאגר והאינדקסים שכבר נבנו
+            self._file_key = key
+            self.unchanged_reloads += 1
+            return
+        if bank.version in self._retained:
+            # חזרה לגרסה שעדיין בזיכרון - אותו אובייקט, כדי שה-sessions שלה יתאחדו
+            bank = self._retained.pop(bank.version)[0]
+        if old is not None:
+            # גם בלי sessions שנספרו כאן - ייתכן שהוגשו ממנה שאלות ב-worker אחר
+            self._retained[old.version] = (old, time.monotonic())
+            self._prune()
+        self._changes.clear()
+
+        self._bank = bank
+        self._file_key = key
+        # אינדקס החיפוש מוכן ברקע לפני החיפוש הראשון (ראו search_index.py)
+        prepare_search_index(bank)
+        self.reload_count += 1
+        self.last_parse_seconds = elapsed
+        self.total_parse_seconds += elapsed
+        self.loaded_at = time.time()
+        logger.info('נטענו %d שאלות מ-%s (גרסה %s) תוך %.2fms',
+                    len(bank), self.path, bank.version, elapsed * 1000)
+
+    def memory_size(self):
+        """הגודל של כל הגרסאות שבזיכרון - הפעילה והשמורות"""
+        banks = [entry[0] for entry in list(self._retained.values())]
+        if self._bank is not None:
+            banks.append(self._bank)
+        return sum(map(bank_memory_size, banks))
+
+    def stats(self):
+        bank = self._bank
+        return {
+            'questions': len(bank) if bank is not None else 0,
+            'version': bank.version if bank is not None else None,
+            'sessions': self._refs.get(bank.version, 0) if bank is not None else 0,
+            'retained_versions': {version: self._refs.get(version, 0) for version in list(self._retained)},
+            'drained_versions': self.drained_versions,
+            'reload_count': self.reload_count,
+            'unchanged_reloads': self.unchanged_reloads,
+            'failed_reloads': self.failed_reloads,
+            'last_parse_ms': round(self.last_parse_seconds * 1000, 3),
+            'total_parse_ms': round(self.total_parse_seconds * 1000, 3),
+            'loaded_at': self.loaded_at,
+        }
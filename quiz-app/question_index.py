@@ -0,0 +1,218 @@
+"""
+אינדקס הפוך לסינון שאלות לפי נושא, תגיות ורמת קושי.
+
+לכל נושא ולכל תגית נשמרת רשימה ממוינת של ids (postings), שנבנית יחד
+עם המאגר (ב-.qbank היא חלק מהקובץ המהודר). בשימוש הראשון כל רשימה
+הופכת למפת ביטים לפי id - מספר שלם של Python, באותו מיפוי כמו
+AnsweredSet - כך שסינון לפי כמה תגיות הוא AND בין מספרים, ו"מה נשאר
+פתוח" הוא filter & ~answered, בלי לעבור על רשימות.
+
+תוצאת סינון נשמרת כ-BankSubset: תת-מאגר עם אותו ממשק (ids, at,
+difficulties), כך ש-pick_unanswered ו-pick_adaptive עובדים עליו כמו
+שהם. האינדקס ממופה לפי אובייקט המאגר (WeakKeyDictionary) והתת-מאגרים
+נשמרים ב-LRU קטן בתוכו - הכל משתחרר יחד עם המאגר.
+"""
+
+import sys
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+
+# רמות הקושי בפרמטר difficulty=, כטווחים חצי-פתוחים בסולם של adaptive.py
+DIFFICULTY_LEVELS = {
+    'easy': (float('-inf'), -0.5),
+    'medium': (-0.5, 0.5),
+    'hard': (0.5, float('inf')),
+}
+MAX_FILTER_TAGS = 10
+MAX_CACHED_SUBSETS = 256
+
+
+def build_postings(questions):
+    """{'topic': {נושא: [ids]}, 'tags': {תגית: [ids]}} עם רשימות ממוינות"""
+    postings = {'topic': {}, 'tags': {}}
+    for question in questions:
+        topic = question.get('topic')
+        if topic:
+            postings['topic'].setdefault(topic, []).append(question['id'])
+        for tag in set(question.get('tags', ())):
+            postings['tags'].setdefault(tag, []).append(question['id'])
+    for names in postings.values():
+        for ids in names.values():
+            ids.sort()
+    return postings
+
+
+def bitmap_from_ids(ids):
+    bits = bytearray((max(ids) >> 3) + 1) if ids else bytearray()
+    for question_id in ids:
+        bits[question_id >> 3] |= 1 << (question_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def ids_from_bitmap(bitmap):
+    ids = array('I')
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) >> 3, 'little')
+    for index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            ids.append((index << 3) + low.bit_length() - 1)
+            byte ^= low
+    return ids
+
+
+class QuestionFilter:
+    """סינון מבוקש: כל התגיות (AND), אחד הנושאים (OR), אחת מרמות הקושי (OR)"""
+
+    __slots__ = ('tags', 'topics', 'levels')
+
+    def __init__(self, tags=(), topics=(), levels=()):
+        self.tags = frozenset(tags)
+        self.topics = frozenset(topics)
+        self.levels = frozenset(levels)
+
+    @classmethod
+    def from_args(cls, args):
+        """מפרמטרי ה-URL (tags, topic, difficulty - ערכים מופרדים בפסיק). None אם אין סינון"""
+        def values(name):
+            return [value.strip() for value in args.get(name, '').split(',') if value.strip()]
+
+        tags, topics, levels = values('tags'), values('topic'), values('difficulty')
+        if len(tags) > MAX_FILTER_TAGS:
+            raise ValueError(f'ניתן לסנן לפי עד {MAX_FILTER_TAGS} תגיות')
+        unknown = set(levels) - DIFFICULTY_LEVELS.keys()
+        if unknown:
+            raise ValueError(f'רמת קושי לא מוכרת: {", ".join(sorted(unknown))}')
+        if not (tags or topics or levels):
+            return None
+        return cls(tags, topics, levels)
+
+    def key(self):
+        return (self.tags, self.topics, self.levels)
+
+
+class BankSubset:
+    """תת-מאגר לפי מפת ביטים - אותו ממשק בחירה כמו המאגר המלא"""
+
+    def __init__(self, bank, bitmap):
+        # proxy - התת-מאגר שמור בתוך האינדקס של המאגר, הפניה רגילה הייתה יוצרת מעגל
+        self.bank = weakref.proxy(bank)
+        self.bitmap = bitmap
+        self.ids = ids_from_bitmap(bitmap)
+        self.positions = array('I', map(bank.position, self.ids))
+        self.difficulties = array('d', (bank.difficulties[p] for p in self.positions))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, question_id):
+        return question_id >= 0 and bool(self.bitmap >> question_id & 1)
+
+    def at(self, index):
+        return self.bank.at(self.positions[index])
+
+    def find(self, question_id):
+        return self.bank.find(question_id)
+
+
+class QuestionIndex:
+    def __init__(self, postings, ids, difficulties):
+        self._postings = postings
+        self._ids = ids
+        self._difficulties = difficulties
+        self._bitmaps = {}
+        self._subsets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def names(self, kind):
+        return sorted(self._postings.get(kind, {}))
+
+    def memory_size(self):
+        """מפות הביטים והתת-מאגרים שנבנו עד עכשיו (ה-postings נספרים עם המאגר)"""
+        with self._lock:
+            subsets = list(self._subsets.values())
+        size = sum(map(sys.getsizeof, list(self._bitmaps.values())))
+        for subset in subsets:
+            size += sum(map(sys.getsizeof, (subset.bitmap, subset.ids, subset.positions, subset.difficulties)))
+        return size
+
+    def bitmap(self, kind, name):
+        """מפת הביטים של נושא / תגית (0 אם לא קיים) - נבנית בשימוש הראשון"""
+        key = (kind, name)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            bitmap = self._bitmaps[key] = bitmap_from_ids(self._postings.get(kind, {}).get(name, ()))
+        return bitmap
+
+    def all_bitmap(self):
+        """מפת הביטים של כל השאלות במאגר"""
+        key = ('all', '')
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            bitmap = self._bitmaps[key] = bitmap_from_ids(self._ids)
+        return bitmap
+
+    def level_bitmap(self, level):
+        key = ('difficulty', level)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            low, high = DIFFICULTY_LEVELS[level]
+            ids = [question_id for question_id, difficulty in zip(self._ids, self._difficulties)
+                   if low <= difficulty < high]
+            bitmap = self._bitmaps[key] = bitmap_from_ids(ids)
+        return bitmap
+
+    def match(self, question_filter):
+        """מפת הביטים של כל השאלות שעונות על הסינון"""
+        bitmap = -1
+        for tag in question_filter.tags:
+            bitmap &= self.bitmap('tags', tag)
+        if question_filter.topics:
+            topics = 0
+            for topic in question_filter.topics:
+                topics |= self.bitmap('topic', topic)
+            bitmap &= topics
+        if question_filter.levels:
+            levels = 0
+            for level in question_filter.levels:
+                levels |= self.level_bitmap(level)
+            bitmap &= levels
+        return max(bitmap, 0)
+
+    def subset(self, bank, question_filter):
+        """BankSubset של bank לסינון, מהמטמון אם כבר נבנה"""
+        key = question_filter.key()
+        with self._lock:
+            subset = self._subsets.get(key)
+            if subset is not None:
+                self._subsets.move_to_end(key)
+                return subset
+
+        subset = BankSubset(bank, self.match(question_filter))
+        with self._lock:
+            self._subsets[key] = subset
+            if len(self._subsets) > MAX_CACHED_SUBSETS:
+                self._subsets.popitem(last=False)
+        return subset
+
+
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def question_index_size(bank):
+    """הגודל של האינדקס של המאגר אם כבר נבנה, אחרת 0"""
+    index = _indexes.get(bank)
+    return index.memory_size() if index is not None else 0
+
+
+def question_index(bank):
+    """האינדקס של המאגר (לפי bank.postings) - נבנה בבקשה הראשונה ומשתחרר יחד עם המאגר"""
+    index = _indexes.get(bank)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(bank)
+            if index is None:
+                index = _indexes[bank] = QuestionIndex(bank.postings, bank.ids, bank.difficulties)
+    return index
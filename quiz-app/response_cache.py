@@ -0,0 +1,61 @@
+"""
+מטמון לתשובות /api/question שכבר עברו serialization.
+
+התשובה לשאלה נתונה זהה בכל הגשה, ולכן ה-JSON שלה (וה-ETag) נבנים
+פעם אחת לכל גרסת מאגר. המטמון ממופה לפי אובייקט המאגר עצמו
+(WeakKeyDictionary): טעינה מחדש יוצרת מאגר חדש עם מטמון ריק, והרשומות
+של המאגר הישן משתחררות יחד איתו - אין צורך בפסילה ידנית.
+"""
+
+import hashlib
+import threading
+import weakref
+
+
+class CachedBody:
+    """גוף תשובה מוכן: בתים + ETag חזק לפי התוכן"""
+
+    __slots__ = ('data', 'etag', 'quoted_etag')
+
+    def __init__(self, data):
+        self.data = data
+        self.etag = hashlib.sha1(data).hexdigest()[:20]
+        self.quoted_etag = f'"{self.etag}"'
+
+
+class QuestionResponseCache:
+    def __init__(self, build, serialize):
+        # build(question) -> dict ללקוח, serialize(dict) -> bytes
+        self._build = build
+        self._serialize = serialize
+        self._by_bank = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bank, question):
+        entries = self._by_bank.get(bank)
+        if entries is None:
+            with self._lock:
+                entries = self._by_bank.setdefault(bank, {})
+
+        cached = entries.get(question['id'])
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        # שני threads עלולים לבנות את אותה רשומה במקביל - התוצאה זהה
+        self.misses += 1
+        cached = CachedBody(self._serialize(self._build(question)))
+        entries[question['id']] = cached
+        return cached
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'banks': len(self._by_bank),
+            'entries': sum(len(entries) for entries in list(self._by_bank.values())),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+        }
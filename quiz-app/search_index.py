@@ -0,0 +1,388 @@
+"""
+חיפוש טקסט חופשי במאגר השאלות.
+
+נוסח השאלה, התשובות וההסבר עוברים נרמול (הסרת ניקוד וטעמים, אותיות
+סופיות לרגילות - ם/מ, ך/כ וכו', גרש וגרשיים, אותיות קטנות) ופירוק
+למילים. לכל מילה נשמרת רשימת השאלות שבהן היא מופיעה, ממוינת לפי
+ציון BM25 יורד (impact) - את הציון מחשבים פעם אחת בבנייה ולא בכל
+שאילתה. אוצר המילים ממוין, כך שקידומת (מילה שמסתיימת ב-*) היא טווח
+רציף של מזהי מונחים שנמצא ב-bisect.
+
+שאילתה: כל המילים חייבות להופיע (AND). המילה הנדירה ביותר "מובילה" -
+עוברים על הרשימה שלה מהציון הגבוה לנמוך, כל מועמדת נבדקת מול שאר
+המילים באינדקס קדמי (המונחים הממוינים של כל שאלה, bisect), ועוצרים
+כשאף שאלה שלא נבדקה כבר לא יכולה להיכנס ל-top-K. למילה נפוצה אחת
+זה K צעדים, ולא מעבר על כל המופעים שלה.
+
+כל הטבלאות הן מערכים שטוחים (CSR), כך שב-.qbank האינדקס נשמר כמו
+שהוא וממופה לזיכרון בלי בנייה (ראו packed_bank.py).
+"""
+
+import bisect
+import heapq
+import logging
+import math
+import operator
+import re
+import struct
+import sys
+import threading
+import unicodedata
+import weakref
+from array import array
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# משקל כל שדה בספירת המופעים - מילה בנוסח השאלה שווה יותר ממילה בהסבר
+FIELD_WEIGHTS = (('question', 3.0), ('options', 1.5), ('explanation', 1.0))
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MAX_QUERY_TERMS = 8
+MIN_PREFIX_LENGTH = 2
+# קידומת קצרה יכולה להתאים לאלפי מונחים - מתמזגים רק הנפוצים שבהם
+MAX_PREFIX_TERMS = 128
+# תקרת מועמדות לשאילתה של כמה מילים נפוצות; מעבר לה התוצאה היא הטובה שנמצאה
+MAX_CANDIDATES = 1000
+# מילה שמופיעה ביותר מ-DENSE_FRACTION מהשאלות נבדקת מול מערך ציונים מלא
+# (4 בתים לשאלה) במקום באינדקס הקדמי; נשמרים עד MAX_DENSE_TERMS מערכים
+DENSE_FRACTION = 0.02
+MAX_DENSE_TERMS = 16
+
+MAGIC = b'QSRC'
+# magic, שאלות, מונחים, מופעים, אורך אוצר המילים בבתים
+SECTION_HEADER = struct.Struct('<4sIIII')
+
+_TOKEN = re.compile(r'\w+')
+
+
+def _normalization_table():
+    table = {ord(final): regular for final, regular in zip('ךםןףץ', 'כמנפצ')}
+    # ניקוד וטעמים נמחקים; מקף, פסק וסוף פסוק באותו טווח מפרידים מילים
+    for code in range(0x0591, 0x05C8):
+        table[code] = None if unicodedata.combining(chr(code)) else ' '
+    # סימנים עיליים אחרי NFD (é -> e)
+    for code in range(0x0300, 0x0370):
+        table[code] = None
+    # צה"ל, צה״ל ו-צהל הם אותה מילה
+    for char in '׳״\'"':
+        table[ord(char)] = None
+    return table
+
+
+_NORMALIZE = _normalization_table()
+
+
+def normalize(text):
+    return unicodedata.normalize('NFD', text).translate(_NORMALIZE).casefold()
+
+
+def tokenize(text):
+    return _TOKEN.findall(normalize(text))
+
+
+def _field_texts(question, field):
+    value = question.get(field)
+    if not value:
+        return ()
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return (str(value),)
+
+
+def build_search_index(questions):
+    """אינדקס לשאלות לפי הסדר שלהן במאגר (המיקומים של bank.at)"""
+    documents = []
+    for question in questions:
+        weights = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS:
+            for text in _field_texts(question, field):
+                for token in tokenize(text):
+                    weights[token] = weights.get(token, 0.0) + weight
+                    length += weight
+        documents.append((weights, length))
+
+    count = len(documents)
+    average = sum(length for _, length in documents) / count if count else 0.0
+    terms = sorted({term for weights, _ in documents for term in weights})
+    term_ids = {term: term_id for term_id, term in enumerate(terms)}
+    frequencies = [0] * len(terms)
+    for weights, _ in documents:
+        for term in weights:
+            frequencies[term_ids[term]] += 1
+    idf = [math.log(1.0 + (count - n + 0.5) / (n + 0.5)) for n in frequencies]
+
+    per_term = [[] for _ in terms]
+    forward_starts, forward_terms, forward_impacts = array('I', [0]), array('I'), array('f')
+    for position, (weights, length) in enumerate(documents):
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * length / average) if average else BM25_K1
+        for term_id in sorted(term_ids[term] for term in weights):
+            tf = weights[terms[term_id]]
+            impact = idf[term_id] * tf * (BM25_K1 + 1.0) / (tf + norm)
+            per_term[term_id].append((-impact, position))
+            forward_terms.append(term_id)
+            forward_impacts.append(impact)
+        forward_starts.append(len(forward_terms))
+
+    starts, docs, impacts = array('I', [0]), array('I'), array('f')
+    for entries in per_term:
+        entries.sort()
+        for negative_impact, position in entries:
+            docs.append(position)
+            impacts.append(-negative_impact)
+        starts.append(len(docs))
+
+    return SearchIndex(terms, starts, docs, impacts, forward_starts, forward_terms, forward_impacts)
+
+
+class SearchIndex:
+    """
+    terms                         אוצר המילים הממוין (מזהה מונח = המיקום)
+    starts / docs / impacts       לכל מונח: השאלות שלו לפי ציון יורד
+    forward_starts / _terms / _impacts   לכל שאלה: המונחים שלה ממוינים לפי מזהה
+    """
+
+    def __init__(self, terms, starts, docs, impacts, forward_starts, forward_terms, forward_impacts):
+        self.terms = terms
+        # memoryview - חיתוך לרשימת מונח אחד בלי להעתיק אותה
+        self._starts = memoryview(starts)
+        self._docs = memoryview(docs)
+        self._impacts = memoryview(impacts)
+        self._forward_starts = memoryview(forward_starts)
+        self._forward_terms = memoryview(forward_terms)
+        self._forward_impacts = memoryview(forward_impacts)
+        self._counts = array('I', map(operator.sub, self._starts[1:], self._starts[:-1]))
+        # הציון הגבוה של כל מונח (הראשון ברשימה) - חסם עליון לשאילתות של כמה מילים
+        self._heads = array('f', (self._impacts[start] for start in self._starts[:-1]))
+        self._dense = OrderedDict()
+        self._dense_lock = threading.Lock()
+        self._fixed_size = None
+
+    def __len__(self):
+        return len(self._forward_starts) - 1
+
+    def memory_size(self):
+        """בתים בזיכרון התהליך - טבלאות שממופות מקובץ (.qbank) לא נספרות"""
+        if self._fixed_size is None:
+            tables = (self._starts, self._docs, self._impacts,
+                      self._forward_starts, self._forward_terms, self._forward_impacts)
+            self._fixed_size = (sum(view.nbytes for view in tables if isinstance(view.obj, array))
+                                + sys.getsizeof(self.terms) + sum(map(sys.getsizeof, self.terms))
+                                + sys.getsizeof(self._counts) + sys.getsizeof(self._heads))
+        with self._dense_lock:
+            dense = sum(map(sys.getsizeof, self._dense.values()))
+        return self._fixed_size + dense
+
+    def to_bytes(self):
+        terms = '\n'.join(self.terms).encode('utf-8')
+        tables = [array(view.format, view.tobytes())
+                  for view in (self._starts, self._docs, self._impacts,
+                               self._forward_starts, self._forward_terms, self._forward_impacts)]
+        if sys.byteorder != 'little':
+            for table in tables:
+                table.byteswap()
+        header = SECTION_HEADER.pack(MAGIC, len(self), len(self.terms), len(self._docs), len(terms))
+        return header + b''.join(table.tobytes() for table in tables) + terms
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """אינדקס על גבי באפר (למשל מקטע של .qbank ממופה) - הטבלאות לא מועתקות"""
+        view = memoryview(buffer)
+        magic, count, term_count, postings, terms_size = SECTION_HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError('מקטע החיפוש לא תקין')
+
+        tables = []
+        position = SECTION_HEADER.size
+        for code, size in (('I', term_count + 1), ('I', postings), ('f', postings),
+                           ('I', count + 1), ('I', postings), ('f', postings)):
+            chunk = view[position:position + size * 4]
+            if sys.byteorder == 'little':
+                tables.append(chunk.cast(code))
+            else:
+                table = array(code, bytes(chunk))
+                table.byteswap()
+                tables.append(table)
+            position += size * 4
+        if position + terms_size != len(view):
+            raise ValueError('מקטע החיפוש קטוע')
+        terms = bytes(view[position:]).decode('utf-8').split('\n') if term_count else []
+        return cls(terms, *tables)
+
+    def parse_query(self, query):
+        """[(lo, hi)] - טווח מזהי המונחים של כל מילה בשאילתה (ריק אם המילה לא קיימת)"""
+        groups = []
+        for word in query.split():
+            tokens = tokenize(word)
+            for index, token in enumerate(tokens):
+                is_prefix = word.endswith('*') and index == len(tokens) - 1
+                if is_prefix and len(token) < MIN_PREFIX_LENGTH:
+                    raise ValueError(f'קידומת לחיפוש צריכה לכלול לפחות {MIN_PREFIX_LENGTH} תווים')
+                lo = bisect.bisect_left(self.terms, token)
+                if is_prefix:
+                    hi = bisect.bisect_left(self.terms, token + '\U0010ffff', lo)
+                else:
+                    hi = lo + 1 if lo < len(self.terms) and self.terms[lo] == token else lo
+                if (lo, hi) not in groups:
+                    groups.append((lo, hi))
+        if len(groups) > MAX_QUERY_TERMS:
+            raise ValueError(f'ניתן לחפש עד {MAX_QUERY_TERMS} מילים')
+        return groups
+
+    def _postings(self, term_id):
+        start, end = self._starts[term_id], self._starts[term_id + 1]
+        return zip(self._impacts[start:end], self._docs[start:end])
+
+    def _stream(self, lo, hi):
+        """(ציון, מיקום) של כל המונחים בטווח לפי ציון יורד"""
+        if hi - lo == 1:
+            return self._postings(lo)
+        term_ids = range(lo, hi)
+        if len(term_ids) > MAX_PREFIX_TERMS:
+            term_ids = heapq.nlargest(MAX_PREFIX_TERMS, term_ids, key=self._counts.__getitem__)
+        return heapq.merge(*map(self._postings, term_ids), key=operator.itemgetter(0), reverse=True)
+
+    def _dense_impacts(self, term_id):
+        """הציון של המונח בכל שאלה (0 אם אינו מופיע בה) - נבנה בשימוש הראשון"""
+        with self._dense_lock:
+            dense = self._dense.get(term_id)
+            if dense is not None:
+                self._dense.move_to_end(term_id)
+                return dense
+
+        dense = array('f', bytes(4 * len(self)))
+        for impact, position in self._postings(term_id):
+            dense[position] = impact
+        with self._dense_lock:
+            self._dense[term_id] = dense
+            if len(self._dense) > MAX_DENSE_TERMS:
+                self._dense.popitem(last=False)
+        return dense
+
+    def _matcher(self, lo, hi):
+        """פונקציה position -> ציון המילה בשאלה (0 / None אם אינה מופיעה)"""
+        if hi - lo == 1 and self._counts[lo] > len(self) * DENSE_FRACTION:
+            return self._dense_impacts(lo).__getitem__
+        return lambda position: self._forward_impact(position, lo, hi)
+
+    def _forward_impact(self, position, lo, hi):
+        """הציון הגבוה של מונח מהטווח בשאלה, או None אם אין בה אף אחד"""
+        terms = self._forward_terms
+        end = self._forward_starts[position + 1]
+        index = bisect.bisect_left(terms, lo, self._forward_starts[position], end)
+        if index == end or terms[index] >= hi:
+            return None
+        best = self._forward_impacts[index]
+        # קידומת - כמה מונחים מהטווח יכולים להופיע באותה שאלה
+        for index in range(index + 1, end):
+            if terms[index] >= hi:
+                break
+            best = max(best, self._forward_impacts[index])
+        return best
+
+    def search(self, query, limit=10):
+        """[(מיקום, ציון)] של limit השאלות הטובות ביותר, לפי ציון יורד"""
+        groups = self.parse_query(query)
+        if not groups or any(lo == hi for lo, hi in groups):
+            return []
+
+        # הציון של מילה הוא הגבוה מבין המונחים שלה שמופיעים בשאלה
+        # מהנדירה לנפוצה: הראשונה מובילה, ושאר הבדיקות נכשלות מוקדם ככל האפשר
+        driver, *others = sorted(groups, key=lambda group: self._starts[group[1]] - self._starts[group[0]])
+        bound = sum(max(self._heads[lo:hi]) for lo, hi in others)
+        matchers = [self._matcher(lo, hi) for lo, hi in others]
+
+        top = []  # min-heap של (ציון, -מיקום)
+        seen = set()
+        for impact, position in self._stream(*driver):
+            if len(top) == limit and impact + bound <= top[0][0]:
+                break
+            if position in seen:
+                continue
+            seen.add(position)
+            score = impact
+            for matcher in matchers:
+                match = matcher(position)
+                if not match:
+                    break
+                score += match
+            else:
+                entry = (score, -position)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+            if len(seen) >= MAX_CANDIDATES:
+                break
+        return [(-negative_position, score) for score, negative_position in sorted(top, reverse=True)]
+
+
+class SearchIndexNotReady(RuntimeError):
+    """אינדקס החיפוש של המאגר עדיין נבנה ברקע"""
+
+
+_indexes = weakref.WeakKeyDictionary()
+# מאגר -> Event שמסומן כשהבנייה ברקע מסתיימת
+_builds = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+_ready = threading.Event()
+_ready.set()
+
+
+def prepare_search_index(bank):
+    """
+    מתחיל להכין את אינדקס החיפוש של המאגר - נקרא בטעינת המאגר, כדי שהבנייה
+    לא תקרה בתוך בקשה. ב-.qbank האינדקס ממופה מהקובץ מיד; במאגר JSON הוא
+    נבנה ב-thread ברקע (שניות ארוכות במאגר גדול). מחזיר Event של הסיום
+    """
+    with _indexes_lock:
+        if bank in _indexes:
+            return _ready
+        event = _builds.get(bank)
+        if event is not None:
+            return event
+        section = getattr(bank, 'search_section', None)
+        if section is not None:
+            _indexes[bank] = SearchIndex.from_buffer(section)
+            return _ready
+        event = _builds[bank] = threading.Event()
+    threading.Thread(target=_build, args=(bank, event), name='search-index', daemon=True).start()
+    return event
+
+
+def _build(bank, event):
+    try:
+        index = build_search_index(bank.at(i) for i in range(len(bank)))
+        with _indexes_lock:
+            _indexes[bank] = index
+    except Exception:
+        # הבקשה הבאה תנסה לבנות שוב
+        logger.exception('בניית אינדקס החיפוש נכשלה')
+    finally:
+        with _indexes_lock:
+            _builds.pop(bank, None)
+        event.set()
+
+
+def search_index_size(bank):
+    """הגודל של אינדקס החיפוש של המאגר אם כבר נבנה, אחרת 0"""
+    index = _indexes.get(bank)
+    return index.memory_size() if index is not None else 0
+
+
+def search_index(bank, wait=True):
+    """
+    אינדקס החיפוש של המאגר (משתחרר יחד עם המאגר). אם הוא עדיין נבנה ברקע -
+    מחכים לו, או SearchIndexNotReady כש-wait=False
+    """
+    index = _indexes.get(bank)
+    if index is None:
+        event = prepare_search_index(bank)
+        if wait:
+            event.wait()
+        index = _indexes.get(bank)
+        if index is None:
+            raise SearchIndexNotReady()
+    return index
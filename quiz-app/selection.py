@@ -0,0 +1,97 @@
+"""
+בחירה אקראית של שאלה שטרם נענתה.
+
+במקום לבנות רשימה של כל השאלות הזמינות בכל בקשה, מגרילים מיקום
+במאגר ודוחים שאלות שכבר נענו (rejection sampling). כל עוד חלק
+מהמאגר עדיין פתוח, מספר ההגרלות הצפוי הוא N/(N-A) - קבוע ביחס
+לגודל המאגר. כשכמעט כל המאגר נענה עוברים למפות ביטים: כל ה-ids של
+המאגר AND NOT השאלות שנענו, ובחירת ביט דלוק אקראי בחיפוש בינארי על
+ספירת הביטים - פעולות על מספרים שלמים, בלי לולאה על השאלות.
+"""
+
+import random
+
+from question_index import bitmap_from_ids, question_index
+
+MAX_REJECTION_TRIES = 64
+
+
+def answered_bitmap(answered):
+    """answered כמפת ביטים לפי id (AnsweredSet, Excluding או קבוצת ids)"""
+    bitmap = getattr(answered, 'bitmap', None)
+    return bitmap() if bitmap is not None else bitmap_from_ids(answered)
+
+
+def pool_bitmap(pool):
+    """כל ה-ids של המאגר / התת-מאגר כמפת ביטים"""
+    bitmap = getattr(pool, 'bitmap', None)
+    return bitmap if bitmap is not None else question_index(pool).all_bitmap()
+
+
+def nth_set_bit(bitmap, n):
+    """המיקום של הביט הדלוק ה-n (מ-0) במפה - חצייה לפי bit_count"""
+    offset = 0
+    while bitmap.bit_length() > 64:
+        half = bitmap.bit_length() >> 1
+        low = bitmap & ((1 << half) - 1)
+        count = low.bit_count()
+        if n < count:
+            bitmap = low
+        else:
+            n -= count
+            bitmap >>= half
+            offset += half
+    for _ in range(n):
+        bitmap &= bitmap - 1
+    return offset + (bitmap & -bitmap).bit_length() - 1
+
+
+def pick_unanswered(bank, answered, rng=random):
+    """
+    מחזיר שאלה אקראית (בהתפלגות אחידה) שה-id שלה לא נמצא ב-answered,
+    או None אם כל השאלות נענו. answered צריך לתמוך בבדיקת `in` ב-O(1).
+    """
+    # עובדים על רשימת ה-ids ומפענחים רק את השאלה שנבחרה (חשוב למאגר ממופה)
+    ids = bank.ids
+    total = len(ids)
+    if not total:
+        return None
+
+    for _ in range(MAX_REJECTION_TRIES):
+        index = rng.randrange(total)
+        if ids[index] not in answered:
+            return bank.at(index)
+
+    # כמעט כל המאגר נענה - בחירה מתוך הנותרות בלבד
+    remaining = pool_bitmap(bank) & ~answered_bitmap(answered)
+    count = remaining.bit_count()
+    if not count:
+        return None
+    return bank.find(nth_set_bit(remaining, rng.randrange(count)))
+
+
+class Excluding:
+    """answered יחד עם קבוצת ids נוספת (שמורות / כבר נבחרו) - בדיקת `in` ב-O(1)"""
+
+    def __init__(self, answered, extra):
+        self.answered = answered
+        self.extra = extra
+
+    def __contains__(self, question_id):
+        return question_id in self.extra or question_id in self.answered
+
+    def bitmap(self):
+        return answered_bitmap(self.answered) | bitmap_from_ids(self.extra)
+
+
+def pick_many(bank, answered, count, rng=random, pick=pick_unanswered):
+    """עד count שאלות שונות שלא נמצאות ב-answered; pick(bank, excluded, rng) בוחרת כל אחת"""
+    picked = []
+    excluded = Excluding(answered, set())
+    while len(picked) < count:
+        question = pick(bank, excluded, rng)
+        if question is None:
+            break
+        excluded.extra.add(question['id'])
+        picked.append(question)
+    return picked
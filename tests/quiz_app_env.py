@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טעינת quiz-app/app.py לטסטי יחידה: מאגר שאלות זמני, session ב-cookie
+ואימות מקומי - בלי שירותים פעילים. app.py קורא את משתני הסביבה בייבוא
+הראשון, ולכן כל טסט שמייבא אותו עובר דרך load_app.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = tempfile.mkdtemp(prefix='quiz-app-tests-')
+QUESTIONS_FILE = os.path.join(DATA_DIR, 'questions.json')
+BANKS_DIR = os.path.join(DATA_DIR, 'banks')
+
+QUESTIONS = [
+    {'id': 1, 'type': 'true_false', 'question': 'שאלה 1', 'correct_answer': True, 'explanation': 'הסבר 1'},
+]
+
+
+def write_questions(path, questions):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'questions': questions}, f, ensure_ascii=False)
+
+
+def load_app():
+    if 'app' not in sys.modules:
+        os.makedirs(BANKS_DIR, exist_ok=True)
+        write_questions(QUESTIONS_FILE, QUESTIONS)
+        os.environ.update({
+            'QUESTIONS_FILE': QUESTIONS_FILE,
+            'QUESTIONS_RELOAD_INTERVAL': '0',
+            'QUESTION_BANKS_DIR': BANKS_DIR,
+            'SESSION_BACKEND': 'cookie',
+            'AUTH_VERIFY_MODE': 'local',
+        })
+        sys.path.insert(0, os.path.join(ROOT, 'quiz-app'))
+    import app
+    return app
+
+
+def login_session(username='tester'):
+    """תוכן session של משתמש מחובר (כמו שכותב auth-service)"""
+    return {'username': username, 'auth_id': f'{username}-login', 'auth_time': time.time()}
@@ -12,6 +12,27 @@ import os
 # הוספת הנתיב של התיקיה הראשית
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# טסטי יחידה (pytest) - רצים מול המודולים, בלי שירותים פעילים
+UNIT_TESTS = [
+    'test_question_bank.py',
+    'test_session_store.py',
+    'test_progress_store.py',
+    'test_leaderboard.py',
+    'test_answer_stats.py',
+    'test_passwords.py',
+    'test_user_database.py',
+    'test_asgi.py',
+    'test_quiz_app.py',
+]
+
+def run_unit_tests():
+    """הרצת טסטי היחידה עם pytest"""
+    import pytest
+
+    print("🔬 מריץ טסטי יחידה עם pytest...")
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    return pytest.main(['-q'] + [os.path.join(test_dir, name) for name in UNIT_TESTS])
+
 def run_all_tests():
     """הרצת כל הטסטים"""
 
@@ -45,8 +66,11 @@ def run_all_tests():
         for test, traceback in result.errors:
             print(f"🚫 {test}: {traceback}")
 
+    # טסטי היחידה כתובים ב-pytest ולא נאספים ע"י unittest
+    unit_result = run_unit_tests()
+
     # החזרת קוד יציאה
-    return 0 if result.wasSuccessful() else 1
+    return 0 if result.wasSuccessful() and unit_result == 0 else 1
 
 def run_specific_test(test_name):
     """הרצת טסט ספציפי"""
@@ -70,6 +94,8 @@ def run_specific_test(test_name):
         elif test_name == "security":
             from test_security import TestSecurityFeatures
             suite.addTest(unittest.makeSuite(TestSecurityFeatures))
+        elif test_name == "unit":
+            return 0 if run_unit_tests() == 0 else 1
         elif test_name == "nginx":
             print("🌐 מריץ טסטי nginx integration עם pytest...")
             os.system("python3 test_nginx_integration.py")
@@ -94,6 +120,7 @@ def run_specific_test(test_name):
             print(f"❌ טסט לא מוכר: {test_name}")
             print("טסטים זמינים:")
             print("  בסיסיים: auth, api, basic, security")
+            print("  יחידה: unit")
             print("  מתקדמים: nginx, advanced_api, sessions, advanced_security, integration")
             return 1
 
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טסטים לסטטיסטיקת התשובות לכל שאלה של quiz-app
+ללא צורך בשירותים פעילים
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from answer_stats import (
+    AnswerStats, decode_item, discrimination_groups, encode_item, item_report, load_columns, load_counts
+)
+
+
+class TestAnswerStats:
+    """טסטים ל-AnswerStats"""
+
+    def test_threads_flush_to_columns(self, tmp_path):
+        """כל thread כותב ל-shard משלו, ו-flush אחד מאחד את כולם לבלוק"""
+        stats = AnswerStats(str(tmp_path), flush_interval=60)
+
+        def answer(username):
+            for question_id in range(50):
+                stats.record(username, question_id, question_id % 4, question_id % 2 == 0)
+
+        threads = [threading.Thread(target=answer, args=(f'user{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert stats.stats()['shards'] == 4
+        assert stats.stats()['pending'] == 200
+
+        stats.flush()
+        assert stats.stats()['flushes'] == 1
+        stats.close()
+
+        columns = load_columns(str(tmp_path))
+        assert len(columns['item']) == 200
+        assert sum(columns['correct']) == 100
+        assert len(set(columns['user'])) == 4
+
+    def test_background_flush(self, tmp_path):
+        """ה-thread ברקע כותב את ה-shards בלי קריאה מפורשת"""
+        stats = AnswerStats(str(tmp_path), flush_interval=0.01)
+        stats.record('admin', 1, 2, True)
+        deadline = time.monotonic() + 2
+        while stats.stats()['flushed'] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats.close()
+        assert len(load_columns(str(tmp_path))['item']) == 1
+
+    def test_truncated_block_is_skipped(self, tmp_path):
+        """בלוק שנכתב חלקית (קריסה באמצע) לא מפיל את הקריאה"""
+        stats = AnswerStats(str(tmp_path), flush_interval=60)
+        stats.record_many('admin', [(1, 0, True), (2, 1, False)])
+        stats.flush()
+        stats.record_many('admin', [(3, 2, True)])
+        stats.close()
+        with open(stats.path, 'r+b') as f:
+            f.truncate(os.path.getsize(stats.path) - 3)
+
+        items = load_columns(str(tmp_path))['item']
+        assert [decode_item(item)[0] for item in items] == [1, 2]
+        # המונים נכתבים בקובץ נפרד ולא נפגעים
+        assert [row['id'] for row in item_report(load_counts(str(tmp_path)))] == [1, 2, 3]
+
+    def test_encode_item(self):
+        """true/false נשמרים כ-1/0, ערכים לא צפויים כ-1-"""
+        answers = (2, True, False, None, 'x', 500, -3)
+        assert [decode_item(encode_item(70000, a)) for a in answers] == [
+            (70000, 2), (70000, 1), (70000, 0), (70000, -1), (70000, -1), (70000, -1), (70000, -1)]
+
+
+class TestItemReport:
+    """טסטים ל-item_report"""
+
+    @staticmethod
+    def report(directory, discrimination=True):
+        counts = load_counts(directory)
+        groups = discrimination_groups(directory, counts) if discrimination else None
+        return {row['id']: row for row in item_report(counts, groups)}
+
+    def test_counts_match_raw_rows(self, tmp_path):
+        """המונים המצטברים של כמה תהליכים וכמה flush-ים - כמו ספירה של השורות הגולמיות"""
+        first = AnswerStats(str(tmp_path), flush_interval=60)
+        second = AnswerStats(str(tmp_path), flush_interval=60)
+        first.record_many('admin', [(1, 0, True), (2, 1, False)])
+        first.flush()
+        first.record_many('demo', [(1, 2, False)])
+        second.record_many('admin', [(1, 0, True), (3, True, True)])
+        first.close()
+        second.close()
+
+        report = self.report(str(tmp_path), discrimination=False)
+        assert report[1]['answers'] == 3
+        assert report[1]['options'] == {0: 2, 2: 1}
+        assert report[1]['difficulty'] == round(2 / 3, 4)
+        assert report[2]['difficulty'] == 0.0
+        assert report[3]['options'] == {1: 1}
+        assert report[1]['discrimination'] is None
+        counts = load_counts(str(tmp_path))
+        assert sum(counts['item_answers'].values()) == len(load_columns(str(tmp_path))['item']) == 5
+
+    def test_corrupt_counts_skipped(self, tmp_path):
+        stats = AnswerStats(str(tmp_path), flush_interval=60)
+        stats.record('admin', 1, 0, True)
+        stats.close()
+        (tmp_path / 'counts-broken.qagg').write_bytes(b'QAGG\x05')
+        assert self.report(str(tmp_path), discrimination=False)[1]['answers'] == 1
+
+    def test_difficulty_discrimination_options(self, tmp_path):
+        """שאלה שרק החזקים פותרים מבחינה, שאלה שכולם פותרים לא"""
+        stats = AnswerStats(str(tmp_path), flush_interval=60)
+        for i in range(10):
+            strong = i < 5
+            results = [(1, 0, True)]
+            results.append((2, 1 if strong else 3, strong))
+            results += [(q, 0, strong) for q in range(3, 8)]
+            stats.record_many(f'user{i}', results)
+        stats.close()
+
+        report = self.report(str(tmp_path))
+        assert report[1]['difficulty'] == 1.0
+        assert report[1]['discrimination'] == 0.0
+        assert report[2]['difficulty'] == 0.5
+        assert report[2]['discrimination'] == 1.0
+        assert report[2]['options'] == {1: 5, 3: 5}
+        assert report[2]['answers'] == 10
@@ -265,6 +265,139 @@ class TestQuizAPI(unittest.TestCase):
 
         print("✅ טסט JSON לא תקין - עבר")
 
+    def test_prefetch_questions(self):
+        """בדיקת טעינה מראש של כמה שאלות בבקשה אחת"""
+
+        response = self.session.get(f"{self.base_url}/api/questions/next?count=3")
+        self.assertIn(response.status_code, [200, 404])
+        if response.status_code == 404:
+            print("⚠️  אין שאלות פתוחות למשתמש")
+            return
+
+        questions = response.json()['questions']
+        ids = [q['id'] for q in questions]
+        self.assertLessEqual(len(ids), 3)
+        self.assertEqual(len(ids), len(set(ids)), "שאלה הוחזרה פעמיים באותה תשובה")
+
+        # שאלה בודדת לא מחזירה שאלה ששמורה כבר ב-prefetch
+        single = self.session.get(f"{self.base_url}/api/question")
+        if single.status_code == 200 and len(ids) == 3:
+            self.assertNotIn(single.json()['id'], ids)
+
+        print(f"✅ נטענו מראש {len(ids)} שאלות: {ids}")
+
+    def test_submit_answers_batch(self):
+        """בדיקת שליחת כמה תשובות בבקשה אחת"""
+
+        questions = []
+        for _ in range(3):
+            response = self.session.get(f"{self.base_url}/api/question")
+            if response.status_code == 200:
+                questions.append(response.json())
+        if not questions:
+            print("⚠️  אין שאלות פתוחות למשתמש")
+            return
+
+        initial_score = self.session.get(f"{self.base_url}/api/score").json()['score']
+        answers = [{'question_id': q['id'], 'answer': q['correct_answer']} for q in questions]
+        answers.append({'question_id': 99999, 'answer': 0})
+
+        response = self.session.post(f"{self.base_url}/api/answers", json={'answers': answers})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual(len(data['results']), len(answers))
+        self.assertIn('error', data['results'][-1])
+        self.assertEqual(data['score'], initial_score + len({q['id'] for q in questions}))
+
+        # בקשה לא תקינה
+        response = self.session.post(f"{self.base_url}/api/answers", json={'answers': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+        print(f"✅ נבדקו {len(answers)} תשובות בבקשה אחת, ניקוד: {data['score']}")
+
+    def test_filtered_question(self):
+        """בדיקת סינון שאלות לפי תגיות, נושא ורמת קושי"""
+
+        response = self.session.get(f"{self.base_url}/api/question?topic=מדע&difficulty=easy,medium")
+        self.assertIn(response.status_code, [200, 404])
+        if response.status_code == 200:
+            self.assertEqual(response.json()['topic'], 'מדע')
+
+        response = self.session.get(f"{self.base_url}/api/questions/next?count=3&tags=בעלי חיים")
+        self.assertIn(response.status_code, [200, 404])
+        if response.status_code == 200:
+            for question in response.json()['questions']:
+                self.assertIn('בעלי חיים', question['tags'])
+
+        # תגית שלא קיימת - אין שאלות; רמת קושי לא מוכרת - בקשה לא תקינה
+        response = self.session.get(f"{self.base_url}/api/question?tags=אין-כזו")
+        self.assertEqual(response.status_code, 404)
+        response = self.session.get(f"{self.base_url}/api/question?difficulty=impossible")
+        self.assertEqual(response.status_code, 400)
+
+        print("✅ סינון שאלות לפי תגיות, נושא וקושי")
+
+    def test_search(self):
+        """בדיקת חיפוש טקסט במאגר"""
+
+        # ניקוד ואותיות סופיות לא משנים את התוצאה
+        response = self.session.get(f"{self.base_url}/api/search?q=קַנְבֶּרָה")
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertGreater(len(results), 0)
+        self.assertIn('קנברה', json.dumps(results[0], ensure_ascii=False))
+
+        response = self.session.get(f"{self.base_url}/api/search?q=עכביש*&limit=3")
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(response.json()['results']), 3)
+
+        for query in ("", "ע*"):
+            response = self.session.get(f"{self.base_url}/api/search", params={'q': query})
+            self.assertEqual(response.status_code, 400)
+
+        print("✅ חיפוש טקסט במאגר")
+
+    def test_bank_selection(self):
+        """בדיקת בחירת מאגר שאלות לפי נתיב"""
+
+        response = self.session.get(f"{self.base_url}/api/banks")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('default', response.json()['banks'])
+
+        response = self.session.get(f"{self.base_url}/api/banks/default/question")
+        self.assertIn(response.status_code, [200, 404])
+
+        response = self.session.get(f"{self.base_url}/api/banks/no-such-bank/question")
+        self.assertEqual(response.status_code, 404)
+
+        print("✅ בחירת מאגר שאלות")
+
+    def test_leaderboard(self):
+        """בדיקת טבלת המובילים ומקום המשתמש"""
+
+        question = self.session.get(f"{self.base_url}/api/question")
+        if question.status_code == 200:
+            q = question.json()
+            self.session.post(f"{self.base_url}/api/answer",
+                              json={'question_id': q['id'], 'answer': q['correct_answer']})
+
+        response = self.session.get(f"{self.base_url}/api/leaderboard?limit=5")
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertLessEqual(len(data['top']), 5)
+        scores = [entry['score'] for entry in data['top']]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        if question.status_code == 200:
+            self.assertEqual(data['me']['username'], 'admin')
+            self.assertGreaterEqual(data['me']['rank'], 1)
+
+        response = self.session.get(f"{self.base_url}/api/leaderboard?limit=0")
+        self.assertEqual(response.status_code, 400)
+
+        print(f"✅ טבלת מובילים: {data['players']} שחקנים, המקום שלי: {data['me']}")
+
 if __name__ == '__main__':
     print("🧪 מתחיל טסטים ל-API...")
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טסטים למצב ה-ASGI של quiz-app (asgi.py): גשר ה-WSGI, נתיבי ה-API
+והלקוח האסינכרוני של auth-service
+רצים ישירות מול המודולים, ללא צורך בשירותים פעילים
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from quiz_app_env import load_app, login_session
+
+quiz = load_app()
+import asgi
+from auth_client import AuthServiceUnavailable
+
+
+def signed_cookie(data):
+    return quiz.app.session_interface.get_signing_serializer(quiz.app).dumps(data)
+
+
+def cookie_session(value):
+    return quiz.app.session_interface.get_signing_serializer(quiz.app).loads(value)
+
+
+def flask_flow(initial, calls):
+    """הקריאות דרך Flask - מחזיר (תשובות, ה-session בסוף)"""
+    client = quiz.app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(initial)
+    bodies = []
+    for method, path, payload in calls:
+        response = client.open(path, method=method, json=payload)
+        bodies.append((response.status_code, response.get_json()))
+    with client.session_transaction() as sess:
+        return bodies, dict(sess)
+
+
+def asgi_flow(initial, calls):
+    """אותן קריאות דרך asgi.application"""
+    cookie_name = quiz.app.config['SESSION_COOKIE_NAME']
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            client.cookies.set(cookie_name, signed_cookie(initial), domain='testserver.local')
+            bodies = []
+            for method, path, payload in calls:
+                response = await client.request(method, path, json=payload)
+                bodies.append((response.status_code, response.json()))
+            return bodies, cookie_session(client.cookies[cookie_name])
+
+    return asyncio.run(run())
+
+
+class TestAsgiApi:
+    """נתיבי ה-API ב-ASGI מול אותם נתיבים ב-Flask"""
+
+    CALLS = [
+        ('GET', '/api/question', None),
+        ('POST', '/api/answer', {'question_id': 1, 'answer': True}),
+        ('GET', '/api/score', None),
+    ]
+
+    def test_same_responses_and_session(self):
+        """שאלה, תשובה וניקוד - אותן תשובות ואותו session בשני הנתיבים"""
+        initial = login_session()
+        flask_bodies, flask_session = flask_flow(initial, self.CALLS)
+        asgi_bodies, asgi_session = asgi_flow(initial, self.CALLS)
+
+        assert flask_bodies[0][1]['id'] == 1
+        assert flask_bodies[1] == (200, {'correct': True, 'score': 1, 'explanation': 'הסבר 1'})
+        assert asgi_bodies == flask_bodies
+        assert asgi_session == flask_session
+        assert asgi_session['score'] == 1
+
+    def test_session_round_trips_between_requests(self):
+        """ה-session שנכתב בתשובה אחת נקרא בבקשה הבאה - השאלה היחידה נענתה ולא חוזרת"""
+        bodies, sess = asgi_flow(login_session(), self.CALLS + [('GET', '/api/question', None)])
+        assert bodies[2] == (200, quiz.score_summary(sess)[0])
+        assert bodies[-1] == (404, {'error': 'אין יותר שאלות זמינות'})
+        assert quiz.load_answered(sess).bitmap() == 1 << 1
+
+    def test_unauthenticated(self):
+        bodies, _ = asgi_flow({}, [('GET', '/api/question', None), ('GET', '/api/score', None)])
+        assert bodies[0] == (401, {'error': 'לא מאומת', 'redirect': '/login'})
+        assert bodies[1] == (401, {'error': 'לא מאומת'})
+
+    def test_bank_path(self):
+        """/api/banks/<שם>/... למאגר שלא קיים - 404 כמו ב-Flask"""
+        bodies, _ = asgi_flow(login_session(), [('GET', '/api/banks/missing/question', None)])
+        assert bodies[0][0] == 404
+
+
+class TestWsgiBridge:
+    """build_environ / run_wsgi - נתיבים שעוברים לאפליקציית Flask"""
+
+    def scope(self, path, headers=(), query=b''):
+        return {
+            'type': 'http', 'method': 'POST', 'path': path, 'root_path': '',
+            'query_string': query, 'http_version': '1.1', 'scheme': 'http',
+            'server': ('quiz.local', 8080), 'client': ('10.0.0.7', 5555),
+            'headers': [(name.encode(), value.encode()) for name, value in headers],
+        }
+
+    def test_build_environ(self):
+        scope = self.scope('/api/answer', [
+            ('content-type', 'application/json'), ('content-length', '2'),
+            ('cookie', 'a=1'), ('cookie', 'b=2'), ('x-forwarded-for', '1.1.1.1'),
+            ('x-forwarded-for', '2.2.2.2'),
+        ], query=b'count=3')
+        environ = asgi.build_environ(scope, b'{}')
+        assert environ['REQUEST_METHOD'] == 'POST'
+        assert environ['PATH_INFO'] == '/api/answer'
+        assert environ['QUERY_STRING'] == 'count=3'
+        assert (environ['SERVER_NAME'], environ['SERVER_PORT']) == ('quiz.local', '8080')
+        assert environ['REMOTE_ADDR'] == '10.0.0.7'
+        assert environ['CONTENT_TYPE'] == 'application/json'
+        assert environ['CONTENT_LENGTH'] == '2'
+        # כמה headers של cookie מתאחדים ב-'; ', השאר בפסיק
+        assert environ['HTTP_COOKIE'] == 'a=1; b=2'
+        assert environ['HTTP_X_FORWARDED_FOR'] == '1.1.1.1,2.2.2.2'
+        assert environ['wsgi.input'].read() == b'{}'
+
+    def test_run_wsgi(self):
+        """נתיב שאינו ב-API_ROUTES רץ על Flask עם אותו environ"""
+        scope = self.scope('/quiz')
+        scope['method'] = 'GET'
+        status, headers, body = asgi.run_wsgi(asgi.build_environ(scope, b''))
+        assert status == 302
+        assert dict(headers)['Location'].endswith('/login')
+
+    def test_split_bank_path(self):
+        assert asgi.split_bank_path('/api/banks/math/question') == ('math', '/api/question')
+        assert asgi.split_bank_path('/api/banks/math') == (None, '/api/banks/math')
+        assert asgi.split_bank_path('/api/score') == (None, '/api/score')
+
+
+class TestAsyncAuthClient:
+    """AsyncAuthServiceClient מול תחליף מקומי של auth-service"""
+
+    def client(self, handler, **kwargs):
+        client = asgi.AsyncAuthServiceClient('http://auth', **kwargs)
+        client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    def test_verify(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers['cookie'])
+            return httpx.Response(200 if request.headers['cookie'] == 'session=ok' else 401)
+
+        client = self.client(handler)
+        assert asyncio.run(client.verify('session=ok')) is True
+        assert asyncio.run(client.verify('session=bad')) is False
+        assert seen == ['session=ok', 'session=bad']
+
+    def test_unavailable_opens_breaker(self):
+        def handler(request):
+            raise httpx.ConnectError('refused', request=request)
+
+        client = self.client(handler, failure_threshold=2, reset_timeout=60)
+        for _ in range(2):
+            with pytest.raises(AuthServiceUnavailable):
+                asyncio.run(client.verify('session=ok'))
+        with pytest.raises(AuthServiceUnavailable, match='circuit open'):
+            asyncio.run(client.verify('session=ok'))
+        assert client.stats()['breaker_state'] == 'open'
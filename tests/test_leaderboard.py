@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טסטים לטבלת המובילים של quiz-app
+ללא צורך בשירותים פעילים
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from leaderboard import IndexableSkipList, Leaderboard
+from progress_store import ProgressStore
+
+
+class TestIndexableSkipList:
+    """טסטים ל-IndexableSkipList"""
+
+    def test_matches_sorted_list(self):
+        """הוספות והסרות אקראיות - הסדר, הספירה והגישה לפי מיקום תואמים לרשימה ממוינת"""
+        rng = random.Random(7)
+        skiplist = IndexableSkipList(rng=rng.random)
+        expected = []
+        for _ in range(2000):
+            if expected and rng.random() < 0.4:
+                key = expected.pop(rng.randrange(len(expected)))
+                skiplist.remove(key)
+            else:
+                key = (rng.randint(-50, 0), f'user{rng.randint(0, 10 ** 6)}')
+                if key in expected:
+                    continue
+                skiplist.insert(key)
+                expected.append(key)
+            expected.sort()
+
+        assert len(skiplist) == len(expected)
+        assert list(skiplist.iter_from(0)) == expected
+        for index in (0, len(expected) // 2, len(expected) - 1):
+            assert next(skiplist.iter_from(index)) == expected[index]
+        for key in rng.sample(expected, 50):
+            assert skiplist.count_less(key) == expected.index(key)
+        assert list(skiplist.iter_from(len(expected))) == []
+
+    def test_remove_missing(self):
+        """הסרה של מפתח שלא קיים נכשלת"""
+        skiplist = IndexableSkipList()
+        skiplist.insert((1, 'a'))
+        with pytest.raises(KeyError):
+            skiplist.remove((2, 'a'))
+        assert len(skiplist) == 1
+
+
+class TestLeaderboard:
+    """טסטים ל-Leaderboard"""
+
+    def test_top_and_rank(self):
+        """top-K לפי ניקוד, וניקוד שווה חולק מקום"""
+        board = Leaderboard()
+        for username, score in [('dana', 5), ('avi', 7), ('noa', 5), ('eli', 1)]:
+            board.update(username, score)
+
+        assert board.top(3) == [
+            {'rank': 1, 'username': 'avi', 'score': 7},
+            {'rank': 2, 'username': 'dana', 'score': 5},
+            {'rank': 2, 'username': 'noa', 'score': 5},
+        ]
+        assert board.rank_of('eli')['rank'] == 4
+        assert board.rank_of('nobody') is None
+
+    def test_update_moves_player(self):
+        """עדכון ניקוד מזיז את המשתמש בלי לשכפל אותו"""
+        board = Leaderboard()
+        board.update('dana', 1)
+        board.update('avi', 3)
+        board.update('dana', 4)
+        board.update('dana', 4)
+
+        assert len(board) == 2
+        assert [entry['username'] for entry in board.top(10)] == ['dana', 'avi']
+        assert board.stats()['updates'] == 3
+
+    def test_snapshot_roundtrip(self, tmp_path):
+        """snapshot לדיסק נטען למופע חדש"""
+        path = str(tmp_path / 'leaderboard.json')
+        board = Leaderboard()
+        board.update('dana', 3)
+        board.update('שרה', 8)
+        board.snapshot(path)
+
+        restored = Leaderboard()
+        assert restored.load(path) == 2
+        assert restored.top(2) == board.top(2)
+
+    def test_concurrent_snapshots(self, tmp_path):
+        """כמה כותבים במקביל לאותו path - הקובץ תמיד JSON שלם ולא נשארים קבצים זמניים"""
+        path = str(tmp_path / 'leaderboard.json')
+        boards = []
+        for i in range(4):
+            board = Leaderboard()
+            for j in range(500):
+                board.update(f'player{i}-{j}', j)
+            boards.append(board)
+
+        threads = [threading.Thread(target=lambda b=b: [b.snapshot(path) for _ in range(10)]) for b in boards]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert Leaderboard().load(path) == 500
+        assert os.listdir(tmp_path) == ['leaderboard.json']
+
+    def test_background_sync_and_snapshot(self, tmp_path):
+        """ה-thread ברקע מושך ניקודים ממאגר ההתקדמות ושומר snapshot"""
+        store = ProgressStore(str(tmp_path / 'progress.db'), flush_interval=60)
+        store.record_many('dana', [(1, True), (2, True)])
+        store.flush()
+
+        since = {'value': 0.0}
+
+        def sync():
+            updates, since['value'] = store.updated_since(since['value'])
+            return updates
+
+        path = str(tmp_path / 'leaderboard.json')
+        board = Leaderboard()
+        board.run_background(path, interval=0.01, sync=sync)
+        deadline = time.monotonic() + 2
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        board.stop()
+        store.close()
+
+        assert board.rank_of('dana') == {'rank': 1, 'username': 'dana', 'score': 2}
+        restored = Leaderboard()
+        restored.load(path)
+        assert restored.rank_of('dana')['score'] == 2
@@ -258,7 +258,7 @@ class TestNginxIntegration(unittest.TestCase):
             ('/verify', 200, 'auth-service'),
             ('/quiz', 200, 'quiz-service'),
             ('/api/question', 200, 'quiz-service'),
-            ('/logout', 302, 'auth-service'),
+            ('/logout', 302, 'quiz-service'),
         ]
 
         for endpoint, expected_status, service in endpoints_tests:
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טסטים לגיבוב הסיסמאות של auth-service
+ללא צורך בשירותים פעילים
+"""
+
+import importlib.util
+import multiprocessing
+import os
+import runpy
+import shutil
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'auth-service'))
+
+import passwords
+from db import UserDatabase
+from passwords import HashingQueueFull, PasswordHasher
+
+
+def load_auth_app():
+    spec = importlib.util.spec_from_file_location('auth_app', os.path.join(ROOT, 'auth-service', 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestPasswordHashing:
+    """טסטים לפורמטים של ה-hash"""
+
+    @pytest.mark.parametrize('scheme', ['scrypt', 'pbkdf2_sha256'])
+    def test_round_trip(self, scheme):
+        """סיסמה נכונה מתקבלת, שגויה נדחית, וה-salt שונה בכל פעם"""
+        first = passwords.hash_password('secret', scheme=scheme, n=1024, iterations=1000)
+        second = passwords.hash_password('secret', scheme=scheme, n=1024, iterations=1000)
+        assert first.startswith(scheme + '$')
+        assert first != second
+        assert passwords.verify_password('secret', first)
+        assert not passwords.verify_password('wrong', first)
+
+    def test_legacy_sha256(self):
+        """hash ישן עדיין מאומת ומסומן לגיבוב מחדש"""
+        legacy = passwords.legacy_hash('admin123')
+        assert passwords.verify_password('admin123', legacy)
+        assert not passwords.verify_password('nope', legacy)
+        assert passwords.needs_rehash(legacy)
+        assert not passwords.needs_rehash(passwords.hash_password('admin123'))
+
+    def test_changed_parameters_need_rehash(self):
+        """hash בפרמטרים חלשים מהנוכחיים מסומן לגיבוב מחדש"""
+        assert passwords.needs_rehash(passwords.hash_password('x', scheme='scrypt', n=1024))
+
+    def test_malformed_hash(self):
+        assert not passwords.verify_password('x', 'scrypt$abc$8$1$AAAA$AAAA')
+        assert not passwords.verify_password('x', 'unknown$1$2')
+
+
+class TestPasswordHasher:
+    """טסטים למאגר החישוב החסום"""
+
+    def test_queue_full(self):
+        """כשכל המקומות תפוסים הבקשה נדחית מיד"""
+        hasher = PasswordHasher(workers=1, max_queue=0)
+        release = threading.Event()
+        running = threading.Event()
+
+        def slow():
+            running.set()
+            release.wait()
+
+        worker = threading.Thread(target=hasher._run, args=(slow,))
+        worker.start()
+        running.wait()
+        with pytest.raises(HashingQueueFull):
+            hasher.hash('secret')
+        release.set()
+        worker.join()
+
+        assert hasher.stats()['rejected'] == 1
+        assert hasher.verify('secret', hasher.hash('secret'))
+
+    def test_unknown_user(self):
+        """משתמש שלא קיים נדחה"""
+        assert not PasswordHasher(workers=1).verify('secret', None)
+
+    def test_limits_split_between_workers(self, monkeypatch):
+        """gunicorn.conf.py מחלק את הליבות ואת התור בין ה-workers - המגבלה הכוללת לא גדלה איתם"""
+        monkeypatch.setattr(multiprocessing, 'cpu_count', lambda: 8)
+        # סביבה נפרדת - הקובץ כותב ל-os.environ
+        environ = {k: v for k, v in os.environ.items() if not k.startswith('AUTH_HASH')}
+        environ['WEB_WORKERS'] = '4'
+        monkeypatch.setattr(os, 'environ', environ)
+        config = runpy.run_path(os.path.join(ROOT, 'auth-service', 'gunicorn.conf.py'))
+        assert config['workers'] * int(environ['AUTH_HASH_WORKERS']) == 8
+        assert config['workers'] * int(environ['AUTH_HASH_QUEUE']) == 32
+
+
+class TestRehashOnLogin:
+    """גיבוב מחדש שקוף בהתחברות"""
+
+    def test_legacy_hash_upgraded(self, tmp_path):
+        path = tmp_path / 'users.db'
+        shutil.copy(os.path.join(ROOT, 'auth-service', 'users.db'), path)
+        auth = load_auth_app()
+        auth.users_db = UserDatabase(str(path))
+
+        assert auth.users_db.find_password_hash('admin') == passwords.legacy_hash('admin123')
+        assert auth.verify_user('admin', 'admin123')
+        upgraded = auth.users_db.find_password_hash('admin')
+        assert upgraded.startswith('scrypt$')
+
+        assert auth.verify_user('admin', 'admin123')
+        assert auth.users_db.find_password_hash('admin') == upgraded
+        assert not auth.verify_user('admin', 'wrong')
+        assert not auth.verify_user('ghost', 'admin123')
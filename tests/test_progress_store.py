@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טסטים למאגר ההתקדמות הקבוע של quiz-app
+ללא צורך בשירותים פעילים
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from progress_store import ProgressStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'progress.db')
+
+
+class TestProgressStore:
+    """טסטים ל-ProgressStore"""
+
+    def test_record_is_buffered(self, db_path):
+        """רישום תשובה לא כותב למסד עד ה-flush, אבל load כבר רואה אותה"""
+        store = ProgressStore(db_path, flush_interval=60)
+        store.record('admin', 3, True)
+        store.record_many('admin', [(5, False), (7, True)])
+
+        rows = sqlite3.connect(db_path).execute('SELECT COUNT(*) FROM answers').fetchone()[0]
+        assert rows == 0
+        score, answered = store.load('admin')
+        assert score == 2
+        assert sorted(answered) == [3, 5, 7]
+        store.close()
+
+    def test_flush_persists(self, db_path):
+        """אחרי flush ההתקדמות נשמרת גם למופע חדש"""
+        store = ProgressStore(db_path, flush_interval=60)
+        store.record_many('admin', [(1, True), (2, True), (3, False)])
+        store.record('demo', 1, False)
+        store.flush()
+        assert store.stats()['flushes'] == 1
+        store.close()
+
+        reopened = ProgressStore(db_path, flush_interval=60)
+        score, answered = reopened.load('admin')
+        assert (score, sorted(answered)) == (2, [1, 2, 3])
+        assert reopened.load('demo')[0] == 0
+        score, answered = reopened.load('nobody')
+        assert (score, len(answered)) == (0, 0)
+        reopened.close()
+
+    def test_background_flush(self, db_path):
+        """ה-thread ברקע כותב את החוצץ בלי קריאה מפורשת"""
+        store = ProgressStore(db_path, flush_interval=0.01)
+        store.record('admin', 1, True)
+        deadline = time.monotonic() + 2
+        while store.stats()['flushed'] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.stats()['pending'] == 0
+        store.close()
+
+    def test_writers_are_additive(self, db_path):
+        """שני מופעים (workers) שכותבים לאותו משתמש לא דורסים זה את זה"""
+        first = ProgressStore(db_path, flush_interval=60)
+        second = ProgressStore(db_path, flush_interval=60)
+        first.record('admin', 1, True)
+        second.record('admin', 2, True)
+        first.close()
+        second.close()
+
+        store = ProgressStore(db_path, flush_interval=60)
+        score, answered = store.load('admin')
+        assert (score, sorted(answered)) == (2, [1, 2])
+        store.close()
+
+    def test_late_flush_not_missed_by_sync(self, db_path):
+        """חוצץ של worker שנכתב אחרי סנכרון (עם תשובות ישנות יותר) מופיע בסנכרון הבא"""
+        late = ProgressStore(db_path, flush_interval=60)
+        other = ProgressStore(db_path, flush_interval=60)
+        late.record('alice', 1, True)
+        time.sleep(0.01)
+        other.record('bob', 1, True)
+        other.flush()
+
+        updates, since = other.updated_since(0.0)
+        assert [username for username, _ in updates] == ['bob']
+        late.flush()
+        updates, since = other.updated_since(since)
+        assert 'alice' in [username for username, _ in updates]
+        late.close()
+        other.close()
+
+    def test_answers_per_bank(self, db_path):
+        """השאלות שנענו נפרדות לכל מאגר (ids חוזרים), הניקוד משותף"""
+        store = ProgressStore(db_path, flush_interval=60)
+        store.record_many('admin', [(1, True), (2, False)])
+        store.record_many('admin', [(1, True)], 'class-a')
+        assert sorted(store.load('admin', 'class-a')[1]) == [1]
+        store.flush()
+        score, answered = store.load('admin', 'class-a')
+        assert (score, sorted(answered)) == (2, [1])
+        assert sorted(store.load('admin')[1]) == [1, 2]
+        store.record_many('admin', [(7, True)], 'class-a')
+        assert sorted(store.answered('admin', 'class-a')) == [1, 7]
+        store.close()
+
+    def test_migrates_old_schema(self, db_path):
+        """מסד מלפני עמודת bank - התשובות הקיימות שייכות למאגר ברירת המחדל"""
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE answers (id INTEGER PRIMARY KEY, username TEXT NOT NULL, '
+                     'question_id INTEGER NOT NULL, correct INTEGER NOT NULL, answered_at REAL NOT NULL)')
+        conn.execute("INSERT INTO answers (username, question_id, correct, answered_at) VALUES ('admin', 4, 1, 0)")
+        conn.commit()
+        conn.close()
+
+        store = ProgressStore(db_path, flush_interval=60)
+        assert sorted(store.load('admin')[1]) == [4]
+        assert len(store.load('admin', 'class-a')[1]) == 0
+        store.close()
@@ -0,0 +1,784 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טסטים למאגר השאלות בזיכרון של quiz-app
+רצים ישירות מול המודולים, ללא צורך בשירותים פעילים
+"""
+
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'quiz-app'))
+
+from question_bank import QuestionBank, QuestionBankLoader, bank_memory_size
+from bank_catalog import BankCatalog, BankNotFound, BankUnavailable
+from packed_bank import PackedQuestionBank, compile_bank
+from selection import Excluding, nth_set_bit, pick_many, pick_unanswered
+from adaptive import difficulty_index, expected_score, pick_adaptive, update_ability
+from question_index import QuestionFilter, question_index
+import search_index as search_index_module
+from search_index import SearchIndexNotReady, normalize, prepare_search_index, search_index
+from answered import AnsweredSet
+from response_cache import QuestionResponseCache
+
+
+def write_bank(path, questions):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'questions': questions}, f, ensure_ascii=False)
+
+
+def settled(bank):
+    """מחכה לאינדקס החיפוש שנבנה ברקע מהטעינה - כדי שהגודל של המאגר יהיה קבוע"""
+    assert prepare_search_index(bank).wait(5)
+    return bank
+
+
+def make_questions(count, start=1):
+    return [
+        {
+            'id': i,
+            'type': 'true_false',
+            'question': f'שאלה {i}',
+            'correct_answer': i % 2 == 0,
+            'explanation': f'הסבר {i}'
+        }
+        for i in range(start, start + count)
+    ]
+
+
+class TestQuestionBankLoader:
+    """טסטים לטעינה ולטעינה מחדש של המאגר"""
+
+    @pytest.fixture
+    def bank_file(self, tmp_path):
+        path = tmp_path / 'questions.json'
+        write_bank(path, make_questions(5))
+        return path
+
+    def test_parses_once(self, bank_file):
+        """קריאות חוזרות לא מפענחות את הקובץ שוב"""
+        loader = QuestionBankLoader(str(bank_file), check_interval=0)
+        first = loader.get()
+        for _ in range(10):
+            assert loader.get() is first
+        assert loader.reload_count == 1
+        assert len(first) == 5
+
+    def test_reload_on_change(self, bank_file):
+        """שינוי בקובץ גורם לטעינה מחדש והחלפת המאגר"""
+        loader = QuestionBankLoader(str(bank_file), check_interval=0)
+        first = loader.get()
+
+        write_bank(bank_file, make_questions(8))
+        os.utime(bank_file, ns=(0, os.stat(bank_file).st_mtime_ns + 1_000_000))
+
+        second = loader.get()
+        assert second is not first
+        assert len(second) == 8
+        assert len(first) == 5
+        assert loader.reload_count == 2
+
+    def test_broken_file_keeps_previous_bank(self, bank_file):
+        """קובץ פגום לא מפיל את השירות - המאגר הקודם נשאר פעיל"""
+        loader = QuestionBankLoader(str(bank_file), check_interval=0)
+        first = loader.get()
+
+        bank_file.write_text('{"questions": [', encoding='utf-8')
+        assert loader.get() is first
+        assert loader.failed_reloads == 1
+
+    def test_stats(self, bank_file):
+        """המדדים כוללים מונה טעינות וזמן פענוח"""
+        loader = QuestionBankLoader(str(bank_file))
+        loader.get()
+        stats = loader.stats()
+        assert stats['questions'] == 5
+        assert stats['reload_count'] == 1
+        assert stats['last_parse_ms'] >= 0
+
+
+class TestBankVersions:
+    """טסטים לגרסאות המאגר: hash תוכן, גרסאות שנשמרות לפי sessions"""
+
+    @pytest.fixture
+    def bank_file(self, tmp_path):
+        path = tmp_path / 'questions.json'
+        write_bank(path, make_questions(5))
+        return path
+
+    @staticmethod
+    def rewrite(path, questions):
+        write_bank(path, questions)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+
+    def test_content_version(self, bank_file, tmp_path):
+        """אותו תוכן - אותה גרסה, גם במאגר המהודר; שמירה חוזרת לא מחליפה את המאגר"""
+        loader = QuestionBankLoader(str(bank_file), check_interval=0)
+        first = loader.get()
+        compile_bank(str(bank_file), str(tmp_path / 'questions.qbank'))
+        assert PackedQuestionBank.from_file(str(tmp_path / 'questions.qbank')).version == first.version
+
+        self.rewrite(bank_file, make_questions(5))
+        assert loader.get() is first
+        assert loader.unchanged_reloads == 1
+
+        self.rewrite(bank_file, make_questions(6))
+        assert loader.get().version != first.version
+
+    def test_old_version_retained_until_released(self, bank_file):
+        """גרסה עם sessions נשארת בזיכרון אחרי ההחלפה ומשתחררת עם האחרון"""
+        loader = QuestionBankLoader(str(bank_file), check_interval=0)
+        first = loader.get()
+        loader.acquire(first.version)
+        loader.acquire(first.version)
+
+        self.rewrite(bank_file, make_questions(6))
+        second = loader.get()
+        assert loader.resident(first.version) is first
+        assert loader.resident(second.version) is second
+        assert loader.stats()['retained_versions'] == {first.version: 2}
+        assert loader.memory_size() == bank_memory_size(settled(first)) + bank_memory_size(settled(second))
+
+        loader.release(first.version)
+        assert loader.resident(first.version) is first
+        loader.release(first.version)
+        assert loader.resident(first.version) is None
+        assert loader.drained_versions == 1
+
+    def test_uncounted_version_retained(self, bank_file):
+        """גרסה בלי sessions בתהליך הזה נשארת עד תקרת הזמן"""
+        loader = QuestionBankLoader(str(bank_file), check_interval=0)
+        first = loader.get()
+        self.rewrite(bank_file, make_questions(6))
+        loader.get()
+        assert loader.resident(first.version) is first
+        # release של session שנספר בתהליך אחר לא מפיל כלום
+        loader.release(first.version)
+        assert loader.resident(first.version) is first
+
+        loader.retain_seconds = 0
+        loader.get()
+        assert loader.resident(first.version) is None
+
+    def test_version_retained_in_every_worker(self, bank_file):
+        """ה-session נספר רק ב-worker אחד - גם השני מחזיק את הגרסה הישנה"""
+        counted = QuestionBankLoader(str(bank_file), check_interval=0)
+        other = QuestionBankLoader(str(bank_file), check_interval=0)
+        first = counted.get()
+        other.get()
+        counted.acquire(first.version)
+
+        self.rewrite(bank_file, make_questions(6))
+        counted.get()
+        other.get()
+        assert counted.resident(first.version) is not None
+        assert other.resident(first.version) is not None
+
+    def test_retain_limits(self, bank_file):
+        """תקרת זמן ומספר גרסאות - גם כש-sessions לא חזרו"""
+        loader = QuestionBankLoader(str(bank_file), check_interval=0, max_retained=1)
+        versions = []
+        for count in (6, 7, 8):
+            bank = loader.get()
+            loader.acquire(bank.version)
+            versions.append(bank.version)
+            self.rewrite(bank_file, make_questions(count))
+        loader.get()
+        assert list(loader.stats()['retained_versions']) == [versions[-1]]
+
+        loader.retain_seconds = 0
+        loader.get()
+        assert loader.stats()['retained_versions'] == {}
+
+    def test_revert_reuses_retained_bank(self, bank_file):
+        loader = QuestionBankLoader(str(bank_file), check_interval=0)
+        first = loader.get()
+        loader.acquire(first.version)
+        self.rewrite(bank_file, make_questions(6))
+        loader.get()
+        self.rewrite(bank_file, make_questions(5))
+        assert loader.get() is first
+
+    @pytest.mark.parametrize('extension', ['.json', '.qbank'])
+    def test_changed_since(self, tmp_path, extension):
+        """ids ששאלתם השתנתה או נמחקה מאז הגרסה הישנה"""
+        source = tmp_path / 'questions.json'
+        path = tmp_path / f'bank{extension}'
+
+        def save(questions):
+            self.rewrite(source, questions)
+            if extension == '.qbank':
+                compile_bank(str(source), str(path))
+            else:
+                os.replace(source, path)
+
+        questions = make_questions(5)
+        save(questions)
+        loader = QuestionBankLoader(str(path), check_interval=0)
+        first = loader.get()
+        loader.acquire(first.version)
+
+        questions[1]['question'] = 'שאלה אחרת'
+        save(questions[:4] + make_questions(1, start=9))
+        second = loader.get()
+        assert loader.changed_since(first.version) == 1 << 2 | 1 << 5
+        assert loader.changed_since(second.version) == 0
+        loader.release(first.version)
+        assert loader.changed_since(first.version) is None
+
+
+class TestQuestionIndex:
+    """טסטים לאינדקס id -> שאלה"""
+
+    def test_find_by_id(self, tmp_path):
+        """חיפוש לפי id מחזיר את אותו אובייקט שאלה"""
+        path = tmp_path / 'questions.json'
+        write_bank(path, make_questions(100))
+        bank = QuestionBankLoader(str(path)).get()
+        assert bank.find(42)['question'] == 'שאלה 42'
+        assert bank.find(1000) is None
+        assert bank.find('42') is None
+        assert bank.find([42]) is None
+
+    def test_index_rebuilt_on_reload(self, tmp_path):
+        """האינדקס נבנה מחדש יחד עם המאגר"""
+        path = tmp_path / 'questions.json'
+        write_bank(path, make_questions(3))
+        loader = QuestionBankLoader(str(path), check_interval=0)
+        assert loader.get().find(7) is None
+
+        write_bank(path, make_questions(3, start=7))
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+        assert loader.get().find(7)['question'] == 'שאלה 7'
+        assert loader.get().find(1) is None
+
+
+class TestBankCatalog:
+    """טסטים לקטלוג המאגרים לפי שם"""
+
+    def make_catalog(self, tmp_path, sizes, max_bytes):
+        """מאגר לכל שם עם מספר השאלות ב-sizes"""
+        for name, count in sizes.items():
+            write_bank(tmp_path / f'{name}.json', make_questions(count))
+        return BankCatalog(str(tmp_path), max_bytes=max_bytes, check_interval=60)
+
+    def test_lazy_load_and_names(self, tmp_path):
+        """מאגר נטען רק בשימוש הראשון; שם לא קיים או לא תקין - BankNotFound"""
+        catalog = self.make_catalog(tmp_path, {'a': 3, 'b': 5}, max_bytes=2 ** 30)
+        assert catalog.names() == ['a', 'b']
+        assert catalog.stats()['loaded'] == 0
+        assert len(catalog.get('b')) == 5
+        assert catalog.get('b') is catalog.get('b')
+        assert catalog.stats()['loads'] == 1
+        for name in ('c', '../a', ''):
+            with pytest.raises(BankNotFound):
+                catalog.get(name)
+
+    def test_lru_eviction_by_memory(self, tmp_path):
+        """מעבר לתקרת הזיכרון מפנים את המאגר שלא היה בשימוש הכי הרבה זמן"""
+        sizes = {'a': 200, 'b': 200, 'c': 200}
+        catalog = self.make_catalog(tmp_path, sizes, max_bytes=2 ** 30)
+        one_bank = bank_memory_size(settled(catalog.get('a')))
+        catalog.max_bytes = int(one_bank * 2.5)
+
+        old = catalog.get('a')
+        settled(catalog.get('b'))
+        catalog.get('a')
+        settled(catalog.get('c'))
+        stats = catalog.stats()
+        assert sorted(stats['banks']) == ['a', 'c']
+        assert stats['evictions'] == 1
+        assert stats['bytes'] <= catalog.max_bytes
+        # בקשה שמחזיקה מאגר שפונה ממשיכה לעבוד איתו; הבא נטען מחדש
+        assert catalog.get('a') is old
+        assert old.find(5)['question'] == 'שאלה 5'
+        catalog.get('b')
+        assert catalog.stats()['loads'] == 4
+
+    def test_budget_rechecked_after_index_growth(self, tmp_path):
+        """אינדקסים שנבנים אחרי הטעינה נספרים, והתקרה נבדקת שוב בגישה למאגר"""
+        catalog = self.make_catalog(tmp_path, {'a': 200, 'b': 200}, max_bytes=2 ** 30)
+        catalog.check_interval = 0
+        bank = settled(catalog.get('a'))
+        assert catalog.stats()['bytes'] == bank_memory_size(bank) > bank.memory_size()
+
+        before = catalog.stats()['bytes']
+        question_index(bank).subset(bank, QuestionFilter(levels=['medium']))
+        assert catalog.stats()['bytes'] > before
+
+        settled(catalog.get('b'))
+        catalog.max_bytes = catalog.stats()['bytes'] - 1
+        catalog.get('b')
+        assert catalog.stats()['evictions'] == 1
+        assert sorted(catalog.stats()['banks']) == ['b']
+
+    def test_pinned_and_failed_load(self, tmp_path):
+        """מאגר קבוע לא נספר ולא מפונה; טעינה שנכשלה לא נשמרת"""
+        write_bank(tmp_path / 'main.json', make_questions(2))
+        (tmp_path / 'broken.json').write_text('{', encoding='utf-8')
+        pinned = QuestionBankLoader(str(tmp_path / 'main.json'))
+        catalog = BankCatalog(str(tmp_path), max_bytes=0, pinned={'': pinned})
+
+        assert len(catalog.get('')) == 2
+        with pytest.raises(BankUnavailable):
+            catalog.get('broken')
+        assert catalog.stats()['failed_loads'] == 1
+        assert catalog.stats()['loaded'] == 0
+        assert catalog.get('main') is not pinned.get()
+
+
+class TestPackedBank:
+    """טסטים לפורמט המהודר (.qbank)"""
+
+    @pytest.fixture
+    def packed(self, tmp_path):
+        source = tmp_path / 'questions.json'
+        questions = make_questions(20)
+        questions[3]['options'] = ['א', 'ב', 'ג']
+        write_bank(source, list(reversed(questions)))
+        target = tmp_path / 'questions.qbank'
+        compile_bank(str(source), str(target))
+        return target
+
+    def test_round_trip(self, packed):
+        """כל שאלה מפוענחת זהה למקור"""
+        bank = PackedQuestionBank.from_file(str(packed))
+        assert len(bank) == 20
+        assert list(bank.ids) == list(range(1, 21))
+        assert bank.find(4)['options'] == ['א', 'ב', 'ג']
+        assert bank.find(20) == make_questions(1, start=20)[0]
+        assert bank.questions[-1]['id'] == 20
+
+    def test_find_missing(self, packed):
+        bank = PackedQuestionBank.from_file(str(packed))
+        assert bank.find(0) is None
+        assert bank.find(21) is None
+        assert bank.find('4') is None
+        assert bank.find([4]) is None
+
+    def test_loader_and_selection(self, packed):
+        """הטוען מזהה .qbank, והבחירה עובדת על המאגר הממופה"""
+        bank = QuestionBankLoader(str(packed)).get()
+        assert isinstance(bank, PackedQuestionBank)
+        assert pick_unanswered(bank, set(range(1, 20)))['id'] == 20
+        assert pick_unanswered(bank, set(range(1, 21))) is None
+
+    def test_invalid_ids(self, tmp_path):
+        """ids שאינם מספרים שלמים או כפולים נדחים בהידור"""
+        source = tmp_path / 'questions.json'
+        for questions in (make_questions(2) + make_questions(1), [dict(make_questions(1)[0], id='x')]):
+            write_bank(source, questions)
+            with pytest.raises(ValueError):
+                compile_bank(str(source), str(tmp_path / 'bad.qbank'))
+
+    def test_difficulties(self, tmp_path):
+        """ערכי הקושי נשמרים בעמודה משלהם לפי סדר ה-ids, 0 כשחסר"""
+        source = tmp_path / 'questions.json'
+        questions = make_questions(3)
+        questions[0]['difficulty'] = 1.5
+        questions[2]['difficulty'] = -2
+        write_bank(source, list(reversed(questions)))
+        compile_bank(str(source), str(tmp_path / 'questions.qbank'))
+        bank = PackedQuestionBank.from_file(str(tmp_path / 'questions.qbank'))
+        assert list(bank.difficulties) == [1.5, 0.0, -2.0]
+        assert list(QuestionBank(questions).difficulties) == [1.5, 0.0, -2.0]
+
+    def test_json_bank_ids_validated(self, tmp_path):
+        """מאגר JSON עם id לא תקין, גדול מדי או כפול נפסל בטעינה כמו בהידור"""
+        for bad_id in ('x', -1, True, 2 ** 40):
+            with pytest.raises(ValueError):
+                QuestionBank([dict(make_questions(1)[0], id=bad_id)])
+        with pytest.raises(ValueError):
+            QuestionBank(make_questions(2) + make_questions(1))
+
+    def test_truncated_file(self, packed):
+        data = packed.read_bytes()
+        packed.write_bytes(data[:-5])
+        with pytest.raises(ValueError):
+            PackedQuestionBank.from_file(str(packed))
+
+
+class TestQuestionResponseCache:
+    """טסטים למטמון גופי התשובה של /api/question"""
+
+    def make_cache(self, calls):
+        def build(question):
+            calls.append(question['id'])
+            return {'id': question['id'], 'question': question['question']}
+        return QuestionResponseCache(build, lambda payload: json.dumps(payload).encode('utf-8'))
+
+    def test_serialized_once(self):
+        """אותה שאלה באותו מאגר נבנית פעם אחת"""
+        calls = []
+        cache = self.make_cache(calls)
+        bank = QuestionBank(make_questions(3))
+        first = cache.get(bank, bank.find(2))
+        assert cache.get(bank, bank.find(2)) is first
+        assert calls == [2]
+        assert json.loads(first.data) == {'id': 2, 'question': 'שאלה 2'}
+
+    def test_etag_follows_content(self):
+        cache = self.make_cache([])
+        bank = QuestionBank(make_questions(3))
+        assert cache.get(bank, bank.find(1)).etag != cache.get(bank, bank.find(2)).etag
+
+    def test_new_bank_invalidates(self):
+        """מאגר חדש (טעינה מחדש) מתחיל מטמון ריק, והישן משתחרר"""
+        calls = []
+        cache = self.make_cache(calls)
+        old = QuestionBank(make_questions(3))
+        cache.get(old, old.find(1))
+
+        changed = make_questions(3)
+        changed[0]['question'] = 'שאלה מעודכנת'
+        new = QuestionBank(changed)
+        assert json.loads(cache.get(new, new.find(1)).data)['question'] == 'שאלה מעודכנת'
+        assert calls == [1, 1]
+
+        del old
+        assert cache.stats()['banks'] == 1
+
+
+class TestSelection:
+    """טסטים לבחירת שאלה שטרם נענתה"""
+
+    def test_never_returns_answered(self):
+        """שאלה שכבר נענתה לא נבחרת שוב"""
+        bank = QuestionBank(make_questions(50))
+        answered = set(range(1, 50))
+        for _ in range(20):
+            assert pick_unanswered(bank, answered)['id'] == 50
+
+    def test_all_answered(self):
+        """כשכל השאלות נענו מוחזר None"""
+        bank = QuestionBank(make_questions(10))
+        assert pick_unanswered(bank, set(range(1, 11))) is None
+        assert pick_unanswered(QuestionBank([]), set()) is None
+
+    def test_covers_all_unanswered(self):
+        """כל השאלות הפתוחות יכולות להיבחר"""
+        bank = QuestionBank(make_questions(10))
+        answered = {1, 2, 3}
+        seen = {pick_unanswered(bank, answered)['id'] for _ in range(500)}
+        assert seen == set(range(4, 11))
+
+    def test_nearly_all_answered(self):
+        """כשכמעט הכל נענה הבחירה עוברת למפות ביטים - עדיין רק שאלות פתוחות, מכולן"""
+        bank = QuestionBank(make_questions(5000))
+        answered = AnsweredSet()
+        for question_id in range(1, 5001):
+            if question_id not in (7, 2500, 4999):
+                answered.add(question_id)
+        seen = {pick_unanswered(bank, answered)['id'] for _ in range(200)}
+        assert seen == {7, 2500, 4999}
+        excluded = Excluding(answered, {7, 4999})
+        assert pick_unanswered(bank, excluded)['id'] == 2500
+        answered.add(2500)
+        assert pick_unanswered(bank, Excluding(answered, {7, 4999})) is None
+
+    def test_nth_set_bit(self):
+        bitmap = (1 << 3) | (1 << 70) | (1 << 200) | (1 << 201)
+        assert [nth_set_bit(bitmap, n) for n in range(4)] == [3, 70, 200, 201]
+
+
+class TestPickMany:
+    """טסטים לבחירת כמה שאלות בבת אחת (prefetch)"""
+
+    def test_distinct_and_unanswered(self):
+        bank = QuestionBank(make_questions(30))
+        picked = pick_many(bank, set(range(1, 11)), 8)
+        ids = [q['id'] for q in picked]
+        assert len(ids) == len(set(ids)) == 8
+        assert all(i > 10 for i in ids)
+
+    def test_stops_when_exhausted(self):
+        bank = QuestionBank(make_questions(5))
+        assert {q['id'] for q in pick_many(bank, {1, 2}, 10)} == {3, 4, 5}
+
+    def test_excluding_reserved(self):
+        """שאלות שמורות לא נבחרות שוב"""
+        bank = QuestionBank(make_questions(5))
+        excluded = Excluding(AnsweredSet(), {1, 2, 3, 4})
+        for _ in range(20):
+            assert pick_unanswered(bank, excluded)['id'] == 5
+
+
+class TestAdaptive:
+    """טסטים לבחירה לפי יכולת (adaptive.py)"""
+
+    @staticmethod
+    def graded_bank(count):
+        questions = make_questions(count)
+        for q in questions:
+            q['difficulty'] = (q['id'] - count / 2) / 10
+        return QuestionBank(questions)
+
+    def test_picks_nearest_difficulty(self):
+        """השאלה שנבחרת היא מבין spread הקרובות ביותר ליעד"""
+        bank = self.graded_bank(100)
+        for _ in range(50):
+            question = pick_adaptive(bank, set(), target=1.0, spread=4)
+            assert abs(question['difficulty'] - 1.0) <= 0.2
+
+    def test_skips_answered(self):
+        """שאלות שנענו מדולגות והחיפוש מתרחב הלאה"""
+        bank = self.graded_bank(100)
+        answered = set(range(40, 80))
+        question = pick_adaptive(bank, answered, target=1.0, spread=1)
+        assert question['id'] == 80
+        assert pick_adaptive(bank, set(range(1, 101))) is None
+        assert pick_adaptive(QuestionBank([]), set()) is None
+
+    def test_equal_difficulty_is_spread(self):
+        """מאגר בלי ערכי קושי - הבחירה לא נתקעת על אותן שאלות"""
+        bank = QuestionBank(make_questions(50))
+        seen = {pick_adaptive(bank, set(), target=2.0)['id'] for _ in range(300)}
+        assert len(seen) > 40
+
+    def test_index_cached_per_bank(self):
+        bank = self.graded_bank(10)
+        assert difficulty_index(bank) is difficulty_index(bank)
+        assert list(difficulty_index(bank).difficulties) == sorted(bank.difficulties)
+
+    def test_pick_many_adaptive(self):
+        bank = self.graded_bank(100)
+        pick = lambda bank, answered, rng: pick_adaptive(bank, answered, rng, target=0.0)
+        ids = [q['id'] for q in pick_many(bank, set(), 10, pick=pick)]
+        assert len(set(ids)) == 10
+        assert all(abs(i - 50) <= 10 for i in ids)
+
+    def test_ability_update(self):
+        """תשובה נכונה מעלה את היכולת, יותר כשהשאלה קשה"""
+        assert expected_score(0.0, 0.0) == 0.5
+        easy = update_ability(0.0, -2.0, True, 0.4)
+        hard = update_ability(0.0, 2.0, True, 0.4)
+        assert 0 < easy < hard
+        assert update_ability(0.0, 0.0, False, 0.4) == -0.2
+        assert update_ability(5.9, 6.0, True, 10) == 6.0
+
+
+class TestQuestionFilter:
+    """טסטים לסינון לפי נושא / תגיות / קושי (question_index.py)"""
+
+    @staticmethod
+    def tagged_questions(count=30):
+        questions = make_questions(count)
+        for q in questions:
+            q['topic'] = 'מדע' if q['id'] % 2 else 'היסטוריה'
+            q['tags'] = [tag for tag, step in (('א', 3), ('ב', 5)) if q['id'] % step == 0]
+            q['difficulty'] = -1.0 if q['id'] <= 10 else 1.0
+        return questions
+
+    def test_filter_from_args(self):
+        assert QuestionFilter.from_args({}) is None
+        assert QuestionFilter.from_args({'tags': ' , '}) is None
+        question_filter = QuestionFilter.from_args({'tags': 'א,ב', 'difficulty': 'easy,hard'})
+        assert question_filter.tags == {'א', 'ב'}
+        assert question_filter.levels == {'easy', 'hard'}
+        with pytest.raises(ValueError):
+            QuestionFilter.from_args({'difficulty': 'impossible'})
+
+    def test_tags_are_intersected(self):
+        """כמה תגיות = חיתוך; נושאים ורמות קושי = איחוד"""
+        bank = QuestionBank(self.tagged_questions())
+        index = question_index(bank)
+        assert list(index.subset(bank, QuestionFilter(tags=['א', 'ב'])).ids) == [15, 30]
+        assert list(index.subset(bank, QuestionFilter(tags=['א'], topics=['מדע'])).ids) == [3, 9, 15, 21, 27]
+        easy = index.subset(bank, QuestionFilter(tags=['ב'], levels=['easy']))
+        assert list(easy.ids) == [5, 10]
+        assert easy.at(1)['id'] == 10
+        assert len(index.subset(bank, QuestionFilter(tags=['אין כזו']))) == 0
+
+    def test_subset_selection_and_answered(self):
+        """הבחירה על תת-מאגר לא יוצאת מהסינון, ו-filter & ~answered מזהה סינון שמוצה"""
+        bank = QuestionBank(self.tagged_questions())
+        subset = question_index(bank).subset(bank, QuestionFilter(tags=['ב']))
+        answered = AnsweredSet()
+        for question_id in (5, 10, 15):
+            answered.add(question_id)
+        for _ in range(30):
+            assert pick_unanswered(subset, answered)['id'] in (20, 25, 30)
+        assert subset.bitmap & ~answered.bitmap()
+        for question_id in (20, 25, 30):
+            answered.add(question_id)
+        assert not subset.bitmap & ~answered.bitmap()
+        assert 25 in subset and 26 not in subset
+        assert pick_adaptive(subset, set(), target=-1.0, spread=2)['id'] in (5, 10)
+
+    def test_subset_cached_and_released(self):
+        bank = QuestionBank(self.tagged_questions())
+        question_filter = QuestionFilter(topics=['מדע'])
+        subset = question_index(bank).subset(bank, question_filter)
+        assert question_index(bank).subset(bank, QuestionFilter(topics=['מדע'])) is subset
+
+        cache = QuestionResponseCache(lambda q: q, lambda p: b'')
+        cache.get(bank, bank.at(0))
+        del bank, subset
+        assert cache.stats()['banks'] == 0
+
+    def test_packed_postings(self, tmp_path):
+        """האינדקס ההפוך נשמר בקובץ המהודר"""
+        source = tmp_path / 'questions.json'
+        questions = self.tagged_questions()
+        write_bank(source, questions)
+        compile_bank(str(source), str(tmp_path / 'questions.qbank'))
+        packed = PackedQuestionBank.from_file(str(tmp_path / 'questions.qbank'))
+        assert packed.postings == QuestionBank(questions).postings
+        subset = question_index(packed).subset(packed, QuestionFilter(tags=['א', 'ב'], levels=['hard']))
+        assert [subset.at(i)['id'] for i in range(len(subset))] == [15, 30]
+
+
+class TestSearchIndex:
+    """טסטים לחיפוש הטקסט (search_index.py)"""
+
+    def search_questions(self):
+        return [
+            {'id': 1, 'type': 'multiple_choice', 'question': 'מהי עִיר הבירה של אוסטרליה?',
+             'options': ['סידני', 'קנברה'], 'correct_answer': 1, 'explanation': 'קנברה נבחרה כפשרה'},
+            {'id': 2, 'type': 'true_false', 'question': 'לעכביש יש 8 רגליים', 'correct_answer': True,
+             'explanation': 'עכבישים הם ערכנאים'},
+            {'id': 3, 'type': 'true_false', 'question': 'צה״ל הוקם ב-1948', 'correct_answer': True},
+            {'id': 4, 'type': 'true_false', 'question': 'בירה היא משקה', 'correct_answer': True,
+             'explanation': 'לא עיר'},
+        ]
+
+    def hits(self, bank, query, limit=10):
+        return [bank.at(position)['id'] for position, _ in search_index(bank).search(query, limit)]
+
+    def test_normalize(self):
+        """ניקוד, אותיות סופיות וגרשיים לא משנים את המילה"""
+        assert normalize('עִיר') == 'עיר'
+        assert normalize('שלום') == 'שלומ'
+        assert normalize('צה״ל') == normalize('צה"ל') == 'צהל'
+        assert normalize('Café') == 'cafe'
+
+    def test_search_fields_and_ranking(self):
+        """כל המילים חייבות להופיע; מילה בנוסח השאלה שווה יותר ממילה בהסבר"""
+        bank = QuestionBank(self.search_questions())
+        assert self.hits(bank, 'עיר') == [1, 4]
+        assert self.hits(bank, 'עִיר אוסטרליה') == [1]
+        assert self.hits(bank, 'קנברה') == [1]
+        assert self.hits(bank, 'צה"ל') == [3]
+        assert self.hits(bank, 'עיר לונדון') == []
+        assert self.hits(bank, 'עיר', limit=1) == [1]
+
+    def test_prefix(self):
+        """מילה שמסתיימת ב-* היא קידומת; קידומת קצרה מדי נדחית"""
+        bank = QuestionBank(self.search_questions())
+        assert self.hits(bank, 'עכביש*') == [2]
+        assert self.hits(bank, 'עכב* רגל*') == [2]
+        assert self.hits(bank, 'הב* קנ*') == [1]
+        with pytest.raises(ValueError):
+            search_index(bank).search('ע*')
+
+    def test_packed_search(self, tmp_path):
+        """אינדקס החיפוש נשמר בקובץ המהודר ונותן את אותן תוצאות"""
+        source = tmp_path / 'questions.json'
+        questions = self.search_questions()
+        write_bank(source, questions)
+        compile_bank(str(source), str(tmp_path / 'questions.qbank'))
+        packed = PackedQuestionBank.from_file(str(tmp_path / 'questions.qbank'))
+        bank = QuestionBank(questions)
+        for query in ('עיר', 'בירה*', 'עכבישים ערכנאים'):
+            assert search_index(packed).search(query) == search_index(bank).search(query)
+
+    def test_built_in_background_on_load(self, tmp_path, monkeypatch):
+        """מאגר JSON: האינדקס נבנה ברקע מהטעינה; בלי המתנה - SearchIndexNotReady עד שמוכן"""
+        release = threading.Event()
+        build = search_index_module.build_search_index
+
+        def slow_build(questions):
+            release.wait(5)
+            return build(questions)
+
+        monkeypatch.setattr(search_index_module, 'build_search_index', slow_build)
+        source = tmp_path / 'questions.json'
+        write_bank(source, self.search_questions())
+        bank = QuestionBankLoader(str(source)).get()
+        with pytest.raises(SearchIndexNotReady):
+            search_index(bank, wait=False)
+        release.set()
+        assert self.hits(bank, 'קנברה') == [1]
+
+
+class TestAnsweredSet:
+    """טסטים למפת הביטים של שאלות שנענו"""
+
+    def test_add_and_contains(self):
+        """הוספה ובדיקת שייכות"""
+        answered = AnsweredSet()
+        assert answered.add(3)
+        assert not answered.add(3)
+        assert 3 in answered
+        assert 4 not in answered
+        assert 10_000 not in answered
+        assert 'x' not in answered
+        assert len(answered) == 1
+
+    def test_session_key_per_bank(self):
+        """מפתח נפרד לכל מאגר; המרת הפורמט הישן רק במפתח ברירת המחדל"""
+        session = {'answered_questions': [1, 2]}
+        answered = AnsweredSet.from_session(session, 'answered:class-a')
+        assert len(answered) == 0
+        answered.add(5)
+        answered.save(session, 'answered:class-a')
+        assert 'answered_questions' in session
+        assert set(AnsweredSet.from_session(session)) == {1, 2}
+        assert set(AnsweredSet.from_session(session, 'answered:class-a')) == {5}
+
+    def test_sparse_encoding(self):
+        """מפה דלילה מקודדת כרשימת הפרשים - קצרה בהרבה ממפת הביטים"""
+        answered = AnsweredSet()
+        for question_id in (5, 70_000, 99_999):
+            answered.add(question_id)
+        encoded = answered.encode()
+        assert encoded.startswith('.')
+        assert len(encoded) < 20
+        assert set(AnsweredSet.decode(encoded)) == {5, 70_000, 99_999}
+
+        dense = AnsweredSet()
+        for question_id in range(1000):
+            dense.add(question_id)
+        assert not dense.encode().startswith('.')
+        assert len(AnsweredSet.decode(dense.encode())) == 1000
+
+    def test_from_bitmap(self):
+        answered = AnsweredSet.from_bitmap(1 << 3 | 1 << 900)
+        assert set(answered) == {3, 900}
+        assert len(AnsweredSet.from_bitmap(0)) == 0
+
+    def test_roundtrip(self):
+        """קידוד ופענוח שומרים על אותה קבוצה"""
+        answered = AnsweredSet()
+        ids = {0, 1, 7, 8, 63, 500}
+        for question_id in ids:
+            answered.add(question_id)
+        decoded = AnsweredSet.decode(answered.encode())
+        assert set(decoded) == ids
+        assert len(decoded) == len(ids)
+
+    def test_encoding_bounded_by_bank_size(self):
+        """גודל הקידוד תלוי במזהה הגבוה ולא במספר התשובות"""
+        answered = AnsweredSet()
+        for question_id in range(1, 1001):
+            answered.add(question_id)
+        assert len(answered.encode()) <= 4 * (1001 // 8 + 3) // 3 + 4
+
+    def test_legacy_session_list(self):
+        """session ישן עם רשימת ids מומר לפורמט החדש"""
+        session = {'answered_questions': [1, 2, 5, 'bad']}
+        answered = AnsweredSet.from_session(session)
+        assert set(answered) == {1, 2, 5}
+
+        session = {}
+        answered.save(session)
+        assert 'answered_questions' not in session
+        assert set(AnsweredSet.from_session(session)) == {1, 2, 5}
+
+    def test_corrupt_value(self):
+        """ערך פגום ב-session מפוענח כקבוצה ריקה"""
+        assert len(AnsweredSet.decode('%%%')) == 0
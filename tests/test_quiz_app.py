@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טסטים ללוגיקה של quiz-app/app.py מול session (dict) - בדיקת תשובות
+וגרסאות המאגר של ה-session
+רצים ישירות מול המודולים, ללא צורך בשירותים פעילים
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from quiz_app_env import BANKS_DIR, load_app, login_session, write_questions
+
+quiz = load_app()
+from session_store import MemoryStore, RevocationList
+
+
+class TestGrading:
+    """ניקוד על תשובות - פעם אחת לכל שאלה"""
+
+    def test_repeated_answer_not_scored(self):
+        """תשובה נכונה שנשלחת שוב לא מעלה את הניקוד"""
+        sess = login_session()
+        body, status = quiz.grade_answer(sess, {'question_id': 1, 'answer': True})
+        assert (status, body['score']) == (200, 1)
+
+        body, status = quiz.grade_answer(sess, {'question_id': 1, 'answer': True})
+        assert status == 200
+        assert body['correct'] is True
+        assert body['already_answered'] is True
+        assert body['score'] == sess['score'] == 1
+
+    def test_batch_skips_answered(self):
+        """ב-/api/answers שאלה שכבר נענתה מקבלת שגיאה לפריט ולא ניקוד"""
+        sess = login_session()
+        quiz.grade_answer(sess, {'question_id': 1, 'answer': True})
+
+        body, status = quiz.grade_answers(sess, {'answers': [{'question_id': 1, 'answer': True}]})
+        assert status == 200
+        assert body['results'] == [{'question_id': 1, 'error': 'השאלה כבר נענתה'}]
+        assert body['score'] == sess['score'] == 1
+
+    def test_batch_duplicate_in_request(self):
+        sess = login_session()
+        body, _ = quiz.grade_answers(sess, {'answers': [
+            {'question_id': 1, 'answer': True}, {'question_id': 1, 'answer': True}
+        ]})
+        assert body['results'][1] == {'question_id': 1, 'error': 'תשובה כפולה לאותה שאלה'}
+        assert body['score'] == 1
+
+
+def make_questions(count, text='שאלה'):
+    return [{'id': i, 'type': 'true_false', 'question': f'{text} {i}', 'correct_answer': True}
+            for i in range(1, count + 1)]
+
+
+class TestBankVersions:
+    """current_bank / serving_bank / release_sessions - ספירת sessions על גרסת המאגר"""
+
+    @staticmethod
+    def write(name, questions):
+        path = os.path.join(BANKS_DIR, f'{name}.json')
+        mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+        write_questions(path, questions)
+        os.utime(path, ns=(0, max(os.stat(path).st_mtime_ns, mtime + 1_000_000)))
+
+    def start(self, name, sessions=1):
+        """מאגר חדש בשם name ו-sessions שהוגשה להם שאלה ממנו"""
+        self.write(name, make_questions(3))
+        loader = quiz.bank_catalog.loader(name)
+        result = []
+        for _ in range(sessions):
+            sess = login_session()
+            quiz.use_bank(sess, name)
+            quiz.serving_bank(sess)
+            result.append(sess)
+        return loader, loader.get(), result
+
+    def test_switch_after_reserved_answered(self):
+        """גרסה ישנה משרתת את ה-session כל עוד יש לו שאלה שמורה, ומשתחררת כשהוא עובר"""
+        loader, first, [sess] = self.start('versions-switch')
+        sess[quiz.bank_key(sess, quiz.RESERVED_KEY)] = [1]
+
+        self.write('versions-switch', make_questions(3, 'נוסח חדש'))
+        assert loader.get().version != first.version
+        assert quiz.current_bank(sess) is first
+        assert quiz.serving_bank(sess) is first
+        assert loader.stats()['retained_versions'] == {first.version: 1}
+
+        sess.pop(quiz.bank_key(sess, quiz.RESERVED_KEY))
+        second = quiz.serving_bank(sess)
+        assert second is loader.get()
+        assert sess[quiz.bank_key(sess, quiz.VERSION_KEY)] == second.version
+        # כל השאלות השתנו - יוצאות ממפת השאלות שנענו
+        assert len(quiz.load_answered(sess)) == 0
+        assert loader.resident(first.version) is None
+        assert loader.drained_versions == 1
+
+    def test_session_counted_in_another_worker(self):
+        """
+        session שנספר רק ב-worker אחר: ה-worker הזה סופר אותו בבקשה הראשונה,
+        ולא משחרר הפניה שלא הוא רשם
+        """
+        loader, first, [ours, theirs] = self.start('versions-workers', sessions=2)
+        theirs[quiz.bank_key(theirs, quiz.VERSION_WORKERS_KEY)] = ['another-worker']
+        loader.release(first.version)
+        self.write('versions-workers', make_questions(4))
+        loader.get()
+        assert loader.stats()['retained_versions'] == {first.version: 1}
+
+        # המעבר של session שלא נספר כאן לא מוריד את ההפניה של ours
+        assert quiz.serving_bank(theirs) is loader.get()
+        assert loader.stats()['retained_versions'] == {first.version: 1}
+        assert theirs[quiz.bank_key(theirs, quiz.VERSION_WORKERS_KEY)] == [quiz.WORKER_TOKEN]
+
+        # session על הגרסה הישנה מ-worker אחר נספר כאן פעם אחת
+        other = login_session()
+        quiz.use_bank(other, 'versions-workers')
+        other[quiz.bank_key(other, quiz.VERSION_KEY)] = first.version
+        other[quiz.bank_key(other, quiz.VERSION_WORKERS_KEY)] = ['another-worker']
+        assert quiz.current_bank(other) is first
+        assert quiz.current_bank(other) is first
+        assert loader.stats()['retained_versions'] == {first.version: 2}
+        assert quiz.WORKER_TOKEN in other[quiz.bank_key(other, quiz.VERSION_WORKERS_KEY)]
+
+    def test_release_sessions(self):
+        """יציאה משחררת את הגרסה שה-session נספר עליה כאן, ורק אותה"""
+        loader, first, [sess, foreign] = self.start('versions-logout', sessions=2)
+        foreign[quiz.bank_key(foreign, quiz.VERSION_WORKERS_KEY)] = ['another-worker']
+        self.write('versions-logout', make_questions(4))
+        loader.get()
+        assert loader.stats()['retained_versions'] == {first.version: 2}
+
+        quiz.release_sessions(foreign)
+        assert loader.stats()['retained_versions'] == {first.version: 2}
+        quiz.release_sessions(sess)
+        assert loader.stats()['retained_versions'] == {first.version: 1}
+
+    def test_logout_releases_version(self):
+        """/logout (דרך nginx מגיע ל-quiz-app) משחרר את הגרסה שה-session נספר עליה"""
+        self.write('versions-route', make_questions(3))
+        client = quiz.app.test_client()
+        with client.session_transaction() as sess:
+            sess.update(login_session())
+        assert client.get('/api/banks/versions-route/question').status_code == 200
+        loader = quiz.bank_catalog.loader('versions-route')
+        first = loader.get()
+
+        self.write('versions-route', make_questions(4))
+        loader.get()
+        assert loader.stats()['retained_versions'] == {first.version: 1}
+
+        response = client.get('/logout')
+        assert response.status_code == 302
+        assert loader.resident(first.version) is None
+        with client.session_transaction() as sess:
+            assert 'username' not in sess
+
+
+class TestVerificationCache:
+    """תוצאה חיובית במטמון של /verify נבדקת שוב מול ה-session ורשימת הביטולים"""
+
+    @pytest.fixture
+    def revocations(self, monkeypatch):
+        revocations = RevocationList(MemoryStore())
+        monkeypatch.setattr(quiz, 'revocations', revocations)
+        return revocations
+
+    def test_logged_out_session(self, revocations):
+        key = quiz.VerificationCache.key_for('logged-out-cookie')
+        quiz.verification_cache.put(key, True)
+        assert quiz.cached_verification({}, key) is None
+        # התוצאה יצאה מהמטמון - הבקשה הבאה הולכת ל-auth-service
+        assert quiz.verification_cache.get(key) is None
+
+    def test_revoked_login(self, revocations):
+        sess = login_session()
+        key = quiz.VerificationCache.key_for('revoked-cookie')
+        quiz.verification_cache.put(key, True)
+        assert quiz.cached_verification(sess, key) is True
+
+        revocations.revoke(sess['auth_id'], 60)
+        assert quiz.cached_verification(sess, key) is None
+
+    def test_negative_result_kept(self, revocations):
+        key = quiz.VerificationCache.key_for('rejected-cookie')
+        quiz.verification_cache.put(key, False)
+        assert quiz.cached_verification(login_session(), key) is False
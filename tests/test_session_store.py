@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טסטים ל-session בצד השרת (session_store.py) ולאימות ב-quiz-app
+רצים ישירות מול המודולים, ללא צורך בשירותים פעילים
+"""
+
+import os
+import socketserver
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'common'))
+sys.path.insert(1, os.path.join(ROOT, 'quiz-app'))
+
+from flask import Flask, session
+
+from session_store import (
+    MemoryStore, RedisStore, RevocationList, ServerSideSessionInterface, SqliteStore, check_login
+)
+from auth_cache import VerificationCache
+from auth_client import AuthServiceClient, AuthServiceUnavailable, CircuitBreaker
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """תחליף מקומי מינימלי לשרת Redis - GET/SET PX/PTTL/PEXPIRE/DEL"""
+
+    data = {}
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            now = time.time()
+            if command == b'SET':
+                self.data[args[1]] = (args[2], now + int(args[4]) / 1000)
+                self.wfile.write(b'+OK\r\n')
+            elif command == b'GET':
+                entry = self.data.get(args[1])
+                if entry is None or entry[1] <= now:
+                    self.wfile.write(b'$-1\r\n')
+                else:
+                    self.wfile.write(b'$%d\r\n%s\r\n' % (len(entry[0]), entry[0]))
+            elif command == b'PTTL':
+                entry = self.data.get(args[1])
+                self.wfile.write(b':%d\r\n' % (int((entry[1] - now) * 1000) if entry else -2))
+            elif command == b'PEXPIRE':
+                entry = self.data.get(args[1])
+                if entry:
+                    self.data[args[1]] = (entry[0], now + int(args[2]) / 1000)
+                self.wfile.write(b':%d\r\n' % bool(entry))
+            elif command == b'DEL':
+                self.wfile.write(b':%d\r\n' % (self.data.pop(args[1], None) is not None))
+            else:
+                self.wfile.write(b'-ERR unknown command\r\n')
+
+
+@pytest.fixture
+def fake_redis():
+    FakeRedisHandler.data = {}
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeRedisHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'redis://127.0.0.1:{server.server_address[1]}/0'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def store(request, tmp_path, fake_redis):
+    if request.param == 'memory':
+        return MemoryStore(max_entries=100)
+    if request.param == 'sqlite':
+        return SqliteStore(str(tmp_path / 'sessions.db'))
+    return RedisStore(fake_redis)
+
+
+class TestSessionStores:
+    """טסטים משותפים לכל ה-backends"""
+
+    def test_set_get_delete(self, store):
+        """שמירה, קריאה ומחיקה"""
+        assert store.get('missing') is None
+        store.set('abc', b'payload', 60)
+        data, expires_at = store.get('abc')
+        assert data == b'payload'
+        assert expires_at > time.time()
+        store.delete('abc')
+        assert store.get('abc') is None
+
+    def test_expiry(self, store):
+        """session שפג תוקפו לא מוחזר"""
+        store.set('old', b'x', 0.05)
+        time.sleep(0.1)
+        assert store.get('old') is None
+
+    def test_touch_extends(self, store):
+        """touch מאריך את התוקף"""
+        store.set('abc', b'x', 0.2)
+        store.touch('abc', 60)
+        time.sleep(0.3)
+        assert store.get('abc') is not None
+
+    def test_memory_lru_eviction(self):
+        """LRU מפנה את ה-session שלא נגעו בו הכי הרבה זמן"""
+        store = MemoryStore(max_entries=2)
+        store.set('a', b'1', 60)
+        store.set('b', b'2', 60)
+        store.get('a')
+        store.set('c', b'3', 60)
+        assert store.get('b') is None
+        assert store.get('a') is not None
+
+
+class TestServerSideSessionInterface:
+    """טסטים לממשק ה-session מול אפליקציית Flask"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.secret_key = 'test'
+        app.session_interface = ServerSideSessionInterface(MemoryStore())
+
+        @app.route('/login')
+        def login():
+            session.regenerate()
+            session.permanent = True
+            session['username'] = 'admin'
+            return 'ok'
+
+        @app.route('/whoami')
+        def whoami():
+            return session.get('username', '')
+
+        @app.route('/logout')
+        def logout():
+            session.clear()
+            return 'ok'
+
+        return app.test_client()
+
+    def test_cookie_holds_only_id(self, client):
+        """ה-cookie מכיל מזהה אטום בלבד"""
+        response = client.get('/login')
+        cookie = client.get_cookie('session').value
+        assert len(cookie) == 43
+        assert 'admin' not in response.headers['Set-Cookie']
+        assert client.get('/whoami').text == 'admin'
+
+    def test_no_set_cookie_on_read(self, client):
+        """בקשה שלא משנה את ה-session לא שולחת Set-Cookie"""
+        client.get('/login')
+        response = client.get('/whoami')
+        assert 'Set-Cookie' not in response.headers
+
+    def test_login_rotates_id(self, client):
+        """התחברות מחדש מחליפה את מזהה ה-session"""
+        client.get('/login')
+        first = client.get_cookie('session').value
+        client.get('/login')
+        assert client.get_cookie('session').value != first
+
+    def test_logout_deletes(self, client):
+        """יציאה מוחקת את ה-session מה-store"""
+        client.get('/login')
+        sid = client.get_cookie('session').value
+        client.get('/logout')
+        client.set_cookie('session', sid)
+        assert client.get('/whoami').text == ''
+
+
+class TestLocalVerification:
+    """טסטים לאימות מקומי של session (check_login)"""
+
+    def make_session(self, age=0):
+        return {'username': 'admin', 'auth_id': 'abc', 'auth_time': time.time() - age}
+
+    def test_valid_session(self):
+        """session תקין מאומת ללא פנייה לשירות"""
+        assert check_login(self.make_session(), RevocationList(MemoryStore()), 3600)
+
+    def test_missing_fields(self):
+        """session ללא username או auth_id לא מאומת"""
+        assert not check_login({})
+        assert not check_login({'username': 'admin'})
+
+    def test_expired_login(self):
+        """התחברות ישנה מהגיל המקסימלי נדחית"""
+        assert not check_login(self.make_session(age=7200), None, 3600)
+
+    def test_revoked(self):
+        """auth_id שבוטל ב-logout נדחה"""
+        revocations = RevocationList(MemoryStore())
+        revocations.revoke('abc', 60)
+        assert not check_login(self.make_session(), revocations, 3600)
+
+
+class TestVerificationCache:
+    """טסטים למטמון תוצאות האימות"""
+
+    def test_hit_and_miss(self):
+        """תוצאה שנשמרה מוחזרת מהמטמון"""
+        cache = VerificationCache()
+        key = VerificationCache.key_for('cookie-value')
+        assert cache.get(key) is None
+        cache.put(key, True)
+        assert cache.get(key) is True
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_negative_ttl_shorter(self):
+        """תוצאה שלילית פגה לפני חיובית"""
+        cache = VerificationCache(positive_ttl=60, negative_ttl=0.01)
+        cache.put('good', True)
+        cache.put('bad', False)
+        time.sleep(0.02)
+        assert cache.get('good') is True
+        assert cache.get('bad') is None
+        assert cache.stats()['expirations'] == 1
+
+    def test_lru_eviction(self):
+        """כשהמטמון מלא מפונה הרשומה הישנה ביותר בשימוש"""
+        cache = VerificationCache(max_entries=2)
+        cache.put('a', True)
+        cache.put('b', True)
+        cache.get('a')
+        cache.put('c', True)
+        assert cache.get('b') is None
+        assert cache.get('a') is True
+        assert cache.stats()['evictions'] == 1
+
+    def test_invalidate(self):
+        """logout מסיר את הרשומה"""
+        cache = VerificationCache()
+        cache.put('a', True)
+        cache.invalidate('a')
+        assert cache.get('a') is None
+        assert cache.stats()['invalidations'] == 1
+
+
+class TestAuthServiceClient:
+    """טסטים ללקוח auth-service ול-circuit breaker"""
+
+    def test_breaker_opens_after_failures(self):
+        """אחרי סף הכשלונות ה-breaker נפתח ודוחה בקשות"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_breaker_half_open_probe(self):
+        """אחרי reset_timeout עוברת בקשת בדיקה אחת בלבד"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow()
+
+    def test_unreachable_service_short_circuits(self):
+        """שירות שלא זמין מפסיק לקבל פניות אחרי סף הכשלונות"""
+        client = AuthServiceClient('http://127.0.0.1:9', connect_timeout=0.2,
+                                   failure_threshold=2, reset_timeout=60)
+        for _ in range(3):
+            with pytest.raises(AuthServiceUnavailable):
+                client.verify('session=abc')
+        stats = client.stats()
+        assert stats['failures'] == 2
+        assert stats['short_circuits'] == 1
+        assert stats['breaker_state'] == 'open'
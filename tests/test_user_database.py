@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טסטים לשכבת מסד הנתונים של auth-service
+רצים מול עותק זמני של users.db, ללא צורך בשירותים פעילים
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'auth-service'))
+
+import passwords
+from db import UserDatabase
+from import_users import import_users
+
+
+@pytest.fixture
+def users_db_path(tmp_path):
+    path = tmp_path / 'users.db'
+    shutil.copy(os.path.join(ROOT, 'auth-service', 'users.db'), path)
+    return str(path)
+
+
+class TestUserDatabase:
+    """טסטים ל-UserDatabase"""
+
+    def test_find_existing_user(self, users_db_path):
+        """משתמש קיים מחזיר את ה-hash השמור"""
+        db = UserDatabase(users_db_path)
+        assert len(db.find_password_hash('admin')) == 64
+        assert db.find_password_hash('no-such-user') is None
+
+    def test_connection_per_thread(self, users_db_path):
+        """כל thread פותח חיבור אחד ומשתמש בו שוב"""
+        db = UserDatabase(users_db_path)
+        for _ in range(5):
+            db.find_password_hash('admin')
+        assert db.connections_opened == 1
+
+        worker = threading.Thread(target=lambda: [db.find_password_hash('demo') for _ in range(5)])
+        worker.start()
+        worker.join()
+        assert db.connections_opened == 2
+
+    def test_wal_mode(self, users_db_path):
+        """החיבור עובד במצב WAL"""
+        db = UserDatabase(users_db_path)
+        mode = db.connection().execute('PRAGMA journal_mode').fetchone()[0]
+        assert mode == 'wal'
+
+
+class TestImportUsers:
+    """טסטים לייבוא משתמשים בכמויות"""
+
+    @pytest.fixture(autouse=True)
+    def cheap_hashing(self, monkeypatch):
+        # פרמטרים זולים - תהליכי הגיבוב יורשים אותם ב-fork
+        monkeypatch.setattr(passwords, 'SCRYPT_N', 1024)
+
+    def test_import_csv(self, users_db_path, tmp_path):
+        """משתמשים חדשים נוספים, קיימים ושורות פגומות מדולגים"""
+        source = tmp_path / 'users.csv'
+        rows = [f'student{i},pw{i}' for i in range(25)] + ['admin,changed', ',missing']
+        source.write_text('username,password\n' + '\n'.join(rows) + '\n', encoding='utf-8')
+
+        stats = import_users(str(source), users_db_path, batch_size=10, workers=2)
+        assert (stats['inserted'], stats['skipped']) == (25, 1)
+
+        db = UserDatabase(users_db_path)
+        assert passwords.verify_password('pw7', db.find_password_hash('student7'))
+        assert db.find_password_hash('admin') == passwords.legacy_hash('admin123')
+
+    def test_upsert_jsonl(self, users_db_path, tmp_path):
+        """במצב upsert סיסמה של משתמש קיים מוחלפת"""
+        source = tmp_path / 'users.jsonl'
+        records = [{'username': 'admin', 'password': 'rotated'}, {'username': 'newbie', 'password': 'pw'}]
+        source.write_text('\n'.join(json.dumps(r) for r in records), encoding='utf-8')
+
+        stats = import_users(str(source), users_db_path, workers=1, upsert=True)
+        assert (stats['inserted'], stats['updated']) == (1, 1)
+
+        db = UserDatabase(users_db_path)
+        assert passwords.verify_password('rotated', db.find_password_hash('admin'))
+        count = sqlite3.connect(users_db_path).execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        assert count == 4
+
+    def test_stats_with_duplicates(self, users_db_path, tmp_path):
+        """כפילויות בתוך מנה ובין מנות נספרות נכון: read לפני הסינון, upsert לפי מה שנכתב"""
+        source = tmp_path / 'users.csv'
+        rows = ['dup,a', 'dup,b', 'x1,pw', 'x2,pw', 'dup,c', 'x3,pw']
+        source.write_text('username,password\n' + '\n'.join(rows) + '\n', encoding='utf-8')
+
+        stats = import_users(str(source), users_db_path, batch_size=3, workers=1, upsert=True)
+        assert stats['read'] == 6
+        assert (stats['inserted'], stats['updated'], stats['skipped']) == (4, 1, 1)
+        assert passwords.verify_password('c', UserDatabase(users_db_path).find_password_hash('dup'))